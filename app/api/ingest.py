@@ -1,5 +1,6 @@
 # /mentormind-backend/app/api/ingest.py
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status, Form
+from starlette.concurrency import run_in_threadpool
 from typing import Annotated
 import os
 
@@ -49,9 +50,9 @@ async def upload_pdf_for_ingestion(
         status=IngestionStatus.PENDING
     )
 
-    # Process the file synchronously
+    # Process the file before responding, on a worker thread so streams on this worker keep flowing
     try:
-        process_pdf_ingestion_sync(job.id)
+        await run_in_threadpool(process_pdf_ingestion_sync, job.id)
     except Exception as e:
         # The processing function handles setting the FAILED status
         raise HTTPException(
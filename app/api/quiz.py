@@ -1,12 +1,22 @@
 # /mentormind-backend/app/api/quiz.py
+import datetime
+import json
+import logging
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+from typing import List, Dict, Optional
 from app.db.models import User
 from app.db import crud
-from app.core.dependencies import get_current_active_user
+from app.db.base import release_connection
+from app.config import settings
+from app.core.admission import AdmissionRejected, retry_after_header
+from app.core.dependencies import get_current_active_user, get_quiz_service, rate_limited
 from app.services.quiz_service import QuizService
+from app.services.quiz_store import canonical_questions, public_questions, quiz_store
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
@@ -18,62 +28,143 @@ class QuizRequest(BaseModel):
 class QuizQuestion(BaseModel):
     question_text: str
     options: List[str]
-    correct_answer: str
 
 class QuizSubmission(BaseModel):
-    topic: str
-    grade: int
-    questions: List[QuizQuestion]
+    quiz_id: int
     answers: Dict[str, str] # { question_text: selected_answer }
 
+class SyncedQuizAttempt(QuizSubmission):
+    idempotency_key: str = Field(min_length=1, max_length=64) # Chosen by the client, reused on every retry
+    attempted_at: Optional[datetime.datetime] = None # When the attempt was taken offline
+
+class QuizBatchSubmission(BaseModel):
+    attempts: List[SyncedQuizAttempt] = Field(min_length=1, max_length=settings.QUIZ_BATCH_MAX_ATTEMPTS)
+
+
+def score_attempt(correct_count: int, total_questions: int) -> float:
+    return (correct_count / total_questions) * 100 if total_questions else 0
+
+
+def feedback_for(score: float) -> str:
+    return "Great job! Keep it up." if score >= 70 else "You can do better. Keep practicing."
+
 
 @router.post("/generate")
 def generate_quiz(
     request: QuizRequest,
-    current_user: User = Depends(get_current_active_user),
-    quiz_service: QuizService = Depends(QuizService)
+    current_user: User = Depends(rate_limited(get_current_active_user, cost=settings.QUIZ_REQUEST_COST)),
+    quiz_service: QuizService = Depends(get_quiz_service)
 ):
     """
     Generates a new quiz for a given topic and grade.
+    Returns its `quiz_id` and the questions, in canonical order and
+    without their answers; the answers stay on the server, which grades
+    the submission.
     """
     if not (8 <= request.grade <= 12):
         raise HTTPException(status_code=400, detail="Grade must be between 8 and 12.")
 
-    quiz = quiz_service.generate_quiz_for_topic(
-        topic=request.topic,
-        grade=request.grade,
-        num_questions=request.num_questions
-    )
+    try:
+        quiz = quiz_service.generate_quiz_for_topic(
+            topic=request.topic,
+            grade=request.grade,
+            num_questions=request.num_questions,
+            owner=current_user.id
+        )
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=retry_after_header(e))
 
     if quiz.get("error"):
         raise HTTPException(status_code=500, detail=quiz["error"])
 
+    quiz["quiz_id"] = quiz_store.save(request.topic, request.grade, quiz["questions"])
+    quiz["questions"] = public_questions(canonical_questions(quiz["questions"]))
     return quiz
 
 
+@router.post("/generate/stream")
+async def stream_quiz(
+    request: QuizRequest,
+    current_user: User = Depends(rate_limited(get_current_active_user, cost=settings.QUIZ_REQUEST_COST)),
+    quiz_service: QuizService = Depends(get_quiz_service)
+):
+    """
+    Generates a new quiz and streams it as NDJSON: one `{"question": {...}}`
+    line per question as soon as it is ready (without its answer), then
+    `{"done": true, "count": n, "quiz_id": id}`. Questions the LLM gets
+    wrong are left out, so `count` can be lower than requested.
+    """
+    if not (8 <= request.grade <= 12):
+        raise HTTPException(status_code=400, detail="Grade must be between 8 and 12.")
+
+    questions = quiz_service.astream_quiz_for_topic(
+        topic=request.topic,
+        grade=request.grade,
+        num_questions=request.num_questions,
+        owner=current_user.id
+    )
+    # Start generating before responding, so a shed request gets a clean 429
+    try:
+        first_question = await questions.__anext__()
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=retry_after_header(e))
+    except StopAsyncIteration:
+        first_question = None
+    except Exception as e:
+        first_question = e  # Reported in the stream
+    # The quiz is only stored once the LLM has finished
+    release_connection()
+
+    async def remaining_questions():
+        if isinstance(first_question, Exception):
+            raise first_question
+        if first_question is not None:
+            yield first_question
+        async for question in questions:
+            yield question
+
+    async def generate_stream():
+        served = []
+        try:
+            async for question in remaining_questions():
+                served.append(question)
+                yield json.dumps({"question": QuizQuestion(**question).model_dump()}) + "\n"
+            quiz_id = await run_in_threadpool(quiz_store.save, request.topic, request.grade, served) if served else None
+            yield json.dumps({"done": True, "count": len(served), "quiz_id": quiz_id}) + "\n"
+        except AdmissionRejected as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+        except Exception as e:
+            logger.error(f"Quiz stream failed after {len(served)} questions: {e}")
+            yield json.dumps({"error": "Failed to generate a valid quiz."}) + "\n"
+        finally:
+            await questions.aclose()
+
+    return StreamingResponse(generate_stream(), media_type="application/json")
+
+
 @router.post("/submit")
 def submit_quiz(
     submission: QuizSubmission,
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Submits a user's quiz answers, calculates the score, and saves the attempt.
+    Grades a user's answers against the stored quiz and saves the attempt.
     """
-    correct_count = 0
-    for question in submission.questions:
-        user_answer = submission.answers.get(question.question_text)
-        if user_answer == question.correct_answer:
-            correct_count += 1
+    graded = quiz_store.grade(submission.quiz_id, submission.answers)
+    if graded is None:
+        raise HTTPException(status_code=404, detail="Quiz not found.")
+    answer_key, correct_count = graded
+    total_questions = len(answer_key.answers)
     
-    score = (correct_count / len(submission.questions)) * 100 if submission.questions else 0
+    score = score_attempt(correct_count, total_questions)
     
     # Save the attempt to the database
     try:
         crud.create_quiz_attempt(
             student_id=current_user.id,
-            topic=submission.topic,
-            grade=submission.grade,
-            questions=[q.dict() for q in submission.questions],
+            quiz_id=answer_key.quiz_id,
+            topic=answer_key.topic,
+            grade=answer_key.grade,
             answers=submission.answers,
             score=score
         )
@@ -81,11 +172,88 @@ def submit_quiz(
         # In a real app, log this error properly
         raise HTTPException(status_code=500, detail=f"Failed to save quiz attempt: {e}")
 
-    feedback = "Great job! Keep it up." if score >= 70 else "You can do better. Keep practicing."
-
     return {
         "score": round(score),
-        "feedback": feedback,
+        "feedback": feedback_for(score),
         "correct_count": correct_count,
-        "total_questions": len(submission.questions)
+        "total_questions": total_questions
     }
+
+
+@router.post("/submit/batch")
+def submit_quiz_batch(
+    submission: QuizBatchSubmission,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Grades and saves many attempts at once, e.g. when an offline device syncs.
+    All new attempts are stored in one transaction. Returns one result per
+    attempt, in order, with a `status` of:
+    - "created": stored now
+    - "duplicate": its `idempotency_key` was already used, so the stored
+      attempt's result is returned and nothing is saved again. A key used
+      earlier in the same batch belongs to that first use, even when it was
+      rejected; then there is no stored result, only a `detail`.
+    - "rejected": the quiz does not exist; see `detail`
+    A stored attempt whose quiz no longer exists keeps its score, but its
+    `correct_count` and `total_questions` are null.
+    """
+    quiz_store.answer_keys({attempt.quiz_id for attempt in submission.attempts})  # One query for the whole batch
+    first_use: dict[str, int] = {}
+    for index, attempt in enumerate(submission.attempts):
+        first_use.setdefault(attempt.idempotency_key, index)
+    graded, rejected = {}, set()
+    for index, attempt in enumerate(submission.attempts):
+        if first_use[attempt.idempotency_key] != index:
+            continue  # Repeating a key within the batch counts as a replay of its first use
+        grading = quiz_store.grade(attempt.quiz_id, attempt.answers)
+        if grading is None:
+            rejected.add(attempt.idempotency_key)
+            continue
+        answer_key, correct_count = grading
+        graded[attempt.idempotency_key] = {
+            "idempotency_key": attempt.idempotency_key,
+            "quiz_id": answer_key.quiz_id,
+            "topic": answer_key.topic,
+            "grade": answer_key.grade,
+            "answers": attempt.answers,
+            "score": score_attempt(correct_count, len(answer_key.answers)),
+            "attempted_at": attempt.attempted_at or datetime.datetime.now(),
+        }
+
+    try:
+        stored, created = crud.create_quiz_attempts(current_user.id, list(graded.values())) if graded else ({}, set())
+        if rejected:
+            # A key stored by an earlier sync is a replay, whatever it names now
+            stored.update(crud.get_quiz_attempts_by_keys(current_user.id, rejected))
+    except Exception as e:
+        logger.error(f"Saving a batch of {len(graded)} quiz attempts failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to save quiz attempts: {e}")
+
+    results = []
+    for index, attempt in enumerate(submission.attempts):
+        key = attempt.idempotency_key
+        first = first_use[key] == index
+        if key not in stored:
+            if first:
+                results.append({"idempotency_key": key, "status": "rejected", "detail": "Quiz not found."})
+            else:
+                results.append({"idempotency_key": key, "status": "duplicate",
+                                "detail": "Key already used by a rejected attempt in this batch."})
+            continue
+        saved = stored[key]
+        # A replay reports what was stored the first time, not what it sent now
+        regraded = quiz_store.grade(saved.quiz_id, json.loads(saved.answers))
+        # None when the quiz was deleted or the attempt predates stored quizzes; the stored score still stands
+        correct_count, total_questions = (regraded[1], len(regraded[0].answers)) if regraded else (None, None)
+        results.append({
+            "idempotency_key": key,
+            "status": "created" if key in created and first else "duplicate",
+            "attempt_id": saved.id,
+            "quiz_id": saved.quiz_id,
+            "score": round(saved.score),
+            "feedback": feedback_for(saved.score),
+            "correct_count": correct_count,
+            "total_questions": total_questions,
+        })
+    return {"results": results}
@@ -1,19 +1,23 @@
 # /mentormind-backend/app/api/rag.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel
 from peewee import DoesNotExist
 from fastapi.responses import StreamingResponse
 import json
 import datetime
 
+from app.config import settings
 from app.db.models import User, StudentProfile, Conversation, Message
 from app.db import crud
-from app.core.dependencies import get_current_student_user
+from app.db.base import release_connection
+from app.core.admission import AdmissionRejected, retry_after_header
+from app.core.dependencies import get_current_student_user, get_rag_manager, rate_limited
 from app.core.rag_manager import RagManager
+from app.api.pagination import NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER, decode_cursor, encode_cursor
 from app.api.schemas import ConversationResponse, MessageResponse
+from app.api.sse import HEARTBEAT, SSE_HEADERS, coalesce_chunks, format_event
 
 router = APIRouter()
-rag_manager = RagManager()
 
 class AskRequest(BaseModel):
     question: str
@@ -22,11 +26,16 @@ class AskRequest(BaseModel):
 @router.post("/ask")
 async def ask_question(
     request: AskRequest,
-    current_user: User = Depends(get_current_student_user)
+    http_request: Request,
+    current_user: User = Depends(rate_limited(get_current_student_user)),
+    rag_manager: RagManager = Depends(get_rag_manager)
 ):
     """
     Receives a student's question and returns an answer using the RAG system.
     Handles conversation creation and message storage.
+    Streams NDJSON lines by default, or Server-Sent Events (`conversation`,
+    `queue`, `sources`, `chunk`, `error`, `done`) when the client sends
+    `Accept: text/event-stream`.
     """
     try:
         student_profile = StudentProfile.get(StudentProfile.user == current_user.id)
@@ -46,74 +55,202 @@ async def ask_question(
                 detail="Conversation not found or does not belong to the current student."
             )
     
+    # Start the answer before writing anything, so a shed request gets a clean 429
+    events = rag_manager.aget_answer_events(request.question, student_grade, owner=current_user.id)
+    try:
+        first_event = await events.__anext__()
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers=retry_after_header(e)
+        )
+    except StopAsyncIteration:
+        first_event = None
+    except Exception as e:
+        first_event = e  # Reported in the stream like any other RAG failure
+
     if not conversation:
         conversation = crud.create_conversation(student_id=current_user.id)
     
     # Save student's question as a message
-    crud.create_message(
+    crud.log_message(
         conversation_id=conversation.id,
         sender="student",
         content=request.question
     )
+    # Nothing else touches the database until the answer is saved
+    release_connection()
+
+    # A question that has to wait for the LLM reports its queue position before anything else
+    queued = isinstance(first_event, tuple) and first_event[0] == "queue"
+
+    async def remaining_events():
+        if isinstance(first_event, Exception):
+            raise first_event
+        if first_event is not None and not queued:
+            yield first_event
+        async for event in events:
+            yield event
+
+    answer_parts: list[str] = []
+
+    async def save_answer():
+        await events.aclose()
+        # Save the full LLM answer as a message after streaming is complete
+        if answer_parts:
+            crud.log_message(
+                conversation_id=conversation.id,
+                sender="tutor",
+                content="".join(answer_parts)
+            )
 
     async def generate_stream():
-        full_answer_content = ""
-        # Yield the conversation_id first as a JSON object
+        if queued:
+            yield json.dumps({"queue": first_event[1]}) + "\n"
+        # Then the conversation_id as a JSON object
         yield json.dumps({"conversation_id": conversation.id}) + "\n"
 
         try:
-            for chunk in rag_manager.get_answer_stream(request.question, student_grade):
-                full_answer_content += chunk
-                yield json.dumps({"message_chunk": chunk}) + "\n"
+            async for kind, payload in remaining_events():
+                if kind == "queue":
+                    # Where the question waits for a free LLM slot
+                    yield json.dumps({"queue": payload}) + "\n"
+                elif kind == "chunk":
+                    answer_parts.append(payload)
+                    yield json.dumps({"message_chunk": payload}) + "\n"
+        except AdmissionRejected as e:
+            yield json.dumps({"error": str(e)})
         except Exception as e:
             import traceback
             traceback.print_exception(e)
             yield json.dumps({"error": "Failed to get an answer from the RAG system."})
         finally:
-            # Save the full LLM answer as a message after streaming is complete
-            if full_answer_content:
-                crud.create_message(
-                    conversation_id=conversation.id,
-                    sender="tutor",
-                    content=full_answer_content
-                )
+            await save_answer()
 
+    async def generate_event_stream():
+        if queued:
+            yield format_event("queue", first_event[1])
+        yield format_event("conversation", {"conversation_id": conversation.id})
+
+        coalesced = coalesce_chunks(
+            remaining_events(),
+            flush_interval_s=settings.SSE_FLUSH_INTERVAL_MS / 1000,
+            flush_bytes=settings.SSE_FLUSH_BYTES,
+            heartbeat_s=settings.SSE_HEARTBEAT_S,
+        )
+        try:
+            async for event in coalesced:
+                if event is None:
+                    yield HEARTBEAT
+                    continue
+                kind, payload = event
+                if kind == "chunk":
+                    answer_parts.append(payload)
+                    yield format_event("chunk", {"text": payload})
+                else:
+                    yield format_event(kind, payload)
+            yield format_event("done", {})
+        except AdmissionRejected as e:
+            yield format_event("error", {"error": str(e)})
+        except Exception as e:
+            import traceback
+            traceback.print_exception(e)
+            yield format_event("error", {"error": "Failed to get an answer from the RAG system."})
+        finally:
+            await coalesced.aclose()
+            await save_answer()
+
+    if "text/event-stream" in http_request.headers.get("accept", ""):
+        return StreamingResponse(generate_event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
     return StreamingResponse(generate_stream(), media_type="application/json")
 
 @router.get("/conversations", response_model=list[ConversationResponse])
 def get_conversations(
+    response: Response,
+    limit: int = Query(settings.CONVERSATION_PAGE_SIZE, ge=1, le=settings.CONVERSATION_MAX_PAGE_SIZE),
+    cursor: str | None = None,
     current_user: User = Depends(get_current_student_user)
 ):
     """
-    Retrieves all conversations for the authenticated student.
+    Retrieves the authenticated student's conversations, most recently
+    updated first, one page at a time. When more follow, the response has an
+    `X-Next-Cursor` header; pass it back as `cursor` for the next page.
     """
-    conversations = crud.get_conversations_by_student(current_user.id)
-    response_conversations = []
-    for conv in conversations:
-        last_message = crud.get_messages_by_conversation(conv.id)
-        last_message_snippet = last_message[-1].content[:100] + "..." if last_message else None
-        response_conversations.append(ConversationResponse(
+    before = decode_cursor(cursor) if cursor else None
+    conversations, has_more = crud.get_conversations_page(current_user.id, limit, before)
+    if has_more:
+        last = conversations[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.updated_at, last.id)
+    return [
+        ConversationResponse(
             id=conv.id,
-            student_id=conv.student.id,
+            student_id=conv.student_id,
             created_at=conv.created_at,
             updated_at=conv.updated_at,
-            last_message_snippet=last_message_snippet
-        ))
-    return response_conversations
+            last_message_snippet=conv.last_message_snippet + "..." if conv.last_message_snippet is not None else None,
+            last_message_sender=conv.last_message_sender,
+            message_count=conv.message_count
+        )
+        for conv in conversations
+    ]
+
+def get_owned_conversation(conversation_id: int, current_user: User) -> Conversation:
+    conversation = crud.get_conversation_by_id(conversation_id)
+    if not conversation or conversation.student_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation not found or does not belong to the current student."
+        )
+    return conversation
 
 @router.get("/conversations/{conversation_id}/messages", response_model=list[MessageResponse])
 def get_conversation_messages(
     conversation_id: int,
+    response: Response,
+    limit: int = Query(settings.MESSAGE_PAGE_SIZE, ge=1, le=settings.MESSAGE_MAX_PAGE_SIZE),
+    before: str | None = None,
+    after: str | None = None,
     current_user: User = Depends(get_current_student_user)
 ):
     """
-    Retrieves all messages for a specific conversation.
+    Retrieves a page of a conversation's messages, oldest first. Without a
+    cursor it returns the newest messages. `X-Prev-Cursor` is set when older
+    messages exist (pass it as `before`), `X-Next-Cursor` when newer ones do
+    (pass it as `after`).
     """
-    conversation = crud.get_conversation_by_id(conversation_id)
-    if not conversation or conversation.student.id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Conversation not found or does not belong to the current student."
-        )
-    messages = crud.get_messages_by_conversation(conversation_id)
+    if before and after:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Pass either before or after, not both.")
+    get_owned_conversation(conversation_id, current_user)
+    before_key = decode_cursor(before) if before else None
+    after_key = decode_cursor(after) if after else None
+    messages, has_more = crud.get_messages_page(conversation_id, limit, before=before_key, after=after_key)
+    has_older = has_more if after_key is None else True
+    has_newer = has_more if after_key is not None else before_key is not None
+    if messages and has_older:
+        response.headers[PREV_CURSOR_HEADER] = encode_cursor(messages[0].created_at, messages[0].id)
+    if messages and has_newer:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(messages[-1].created_at, messages[-1].id)
     return [MessageResponse.from_orm(msg) for msg in messages]
+
+@router.get("/conversations/{conversation_id}/messages/export")
+def export_conversation_messages(
+    conversation_id: int,
+    current_user: User = Depends(get_current_student_user)
+):
+    """
+    Streams every message of a conversation, oldest first, as NDJSON (one
+    `MessageResponse` per line). Messages are read in chunks of
+    `MESSAGE_EXPORT_CHUNK_SIZE`, so memory use does not grow with the
+    conversation.
+    """
+    get_owned_conversation(conversation_id, current_user)
+
+    def generate_lines():
+        for chunk in crud.iter_message_chunks(conversation_id, settings.MESSAGE_EXPORT_CHUNK_SIZE):
+            release_connection()  # A slow reader must not hold a pooled connection between chunks
+            for row in chunk:
+                message = MessageResponse(conversation_id=row.pop("conversation"), **row)
+                yield message.model_dump_json() + "\n"
+
+    return StreamingResponse(generate_lines(), media_type="application/x-ndjson")
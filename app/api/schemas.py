@@ -27,6 +27,8 @@ class ConversationResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     last_message_snippet: Optional[str] = None
+    last_message_sender: Optional[str] = None
+    message_count: int = 0
 
     class Config:
         from_attributes = True
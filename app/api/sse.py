@@ -0,0 +1,80 @@
+# /mentormind-backend/app/api/sse.py
+import asyncio
+import json
+from typing import Any, AsyncIterator, Tuple
+
+HEARTBEAT = ": keep-alive\n\n"
+
+# Keep intermediaries (nginx, CDNs) from buffering or transforming the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_event(event: str, data: Any) -> str:
+    """One Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def coalesce_chunks(
+    events: AsyncIterator[Tuple[str, Any]],
+    flush_interval_s: float,
+    flush_bytes: int,
+    heartbeat_s: float,
+) -> AsyncIterator[Tuple[str, Any] | None]:
+    """
+    Re-yields `(kind, payload)` events, merging consecutive "chunk" texts.
+
+    Buffered text is flushed as one chunk `flush_interval_s` after its first
+    piece arrived, once it reaches `flush_bytes`, or before any other event.
+    Yields None whenever nothing was sent for `heartbeat_s`, so the caller
+    can write a heartbeat while the answer waits in a queue or the LLM stalls.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = events.__aiter__()
+    pending: asyncio.Future | None = None
+    buffer: list[str] = []
+    buffered_bytes = 0
+    flush_at = 0.0
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = flush_at - loop.time() if buffer else heartbeat_s
+            done, _ = await asyncio.wait({pending}, timeout=max(0.0, timeout))
+            if not done:
+                if buffer:
+                    yield "chunk", "".join(buffer)
+                    buffer, buffered_bytes = [], 0
+                else:
+                    yield None
+                continue
+
+            next_event, pending = pending, None
+            try:
+                kind, payload = next_event.result()
+            except StopAsyncIteration:
+                break
+            except BaseException:
+                if buffer:
+                    yield "chunk", "".join(buffer)
+                raise
+
+            if kind != "chunk":
+                if buffer:
+                    yield "chunk", "".join(buffer)
+                    buffer, buffered_bytes = [], 0
+                yield kind, payload
+                continue
+            if not buffer:
+                flush_at = loop.time() + flush_interval_s
+            buffer.append(payload)
+            buffered_bytes += len(payload.encode("utf-8"))
+            if buffered_bytes >= flush_bytes:
+                yield "chunk", "".join(buffer)
+                buffer, buffered_bytes = [], 0
+        if buffer:
+            yield "chunk", "".join(buffer)
+    finally:
+        if pending is not None:
+            # Let the cancelled step finish so `events` can be closed afterwards
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
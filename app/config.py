@@ -18,6 +18,10 @@ class Settings(BaseSettings):
     """
     # Database configuration
     DATABASE_URL: str = f"sqlite:///{DATABASE_DIR}/test.db"
+    DB_POOL_ENABLED: bool = True  # Pool connections for postgres:// and sqlite:// URLs
+    DB_POOL_MAX_CONNECTIONS: int = 20  # Per process; size it against the threadpool and Postgres max_connections
+    DB_POOL_STALE_TIMEOUT_S: int = 300  # Idle connections older than this are reopened
+    DB_POOL_TIMEOUT_S: int = 10  # How long a request waits for a free connection before failing
 
     # Redis configuration for Celery
     REDIS_URL: str = "redis://redis:6379/0"
@@ -31,12 +35,121 @@ class Settings(BaseSettings):
     # LLM API Key (e.g., Google Gemini)
     GOOGLE_API_KEY: str = "your_google_api_key_here"
 
+    # LLM backend: "gemini", or "fake" for a local deterministic model (load tests, offline dev)
+    LLM_BACKEND: str = "gemini"
+    FAKE_LLM_TTFT_MS: float = 300  # Delay before the fake model's first token
+    FAKE_LLM_TOKENS_PER_SECOND: float = 50
+    FAKE_LLM_ANSWER_TOKENS: int = 120
+
+    # LLM admission control, shared by RAG answers and quiz generation
+    LLM_MAX_CONCURRENCY: int = 8  # Concurrent upstream LLM calls per process
+    LLM_MAX_QUEUE: int = 64  # Callers allowed to wait for a slot; beyond that they get a 429
+    LLM_MAX_QUEUE_WAIT_S: float = 30  # Longest (estimated) wait before a caller is shed
+    LLM_EXPECTED_CALL_S: float = 5  # Initial estimate of how long a call holds its slot
+    LLM_RETRY_ATTEMPTS: int = 3  # Retries of a rate-limited (429) call
+    LLM_RETRY_BASE_DELAY_S: float = 0.5
+    LLM_RETRY_MAX_DELAY_S: float = 8
+
+    # Per-user request budgets (token buckets keyed on User.id) and fair scheduling of queued LLM calls
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # or "redis": buckets in REDIS_URL, shared by every worker
+    RATE_LIMIT_STUDENT_BURST: float = 10  # Requests that can be made back to back
+    RATE_LIMIT_STUDENT_PER_MINUTE: float = 6  # Sustained rate once the burst is spent
+    RATE_LIMIT_PARENT_BURST: float = 5
+    RATE_LIMIT_PARENT_PER_MINUTE: float = 3
+    RATE_LIMIT_ADMIN_BURST: float = 30
+    RATE_LIMIT_ADMIN_PER_MINUTE: float = 30
+    QUIZ_REQUEST_COST: float = 3  # Budget and scheduling share of a quiz generation; a question costs 1
+
+    # Conversation history
+    CONVERSATION_PAGE_SIZE: int = 50  # Conversations per page of /api/rag/conversations
+    CONVERSATION_MAX_PAGE_SIZE: int = 200
+    MESSAGE_PAGE_SIZE: int = 50  # Messages per page of /api/rag/conversations/{id}/messages
+    MESSAGE_MAX_PAGE_SIZE: int = 200
+    MESSAGE_EXPORT_CHUNK_SIZE: int = 500  # Messages read per query while streaming an export
+
+    # Pre-generated quiz questions per (topic, grade), served by /api/quiz/generate
+    QUIZ_BANK_ENABLED: bool = True
+    QUIZ_BANK_TARGET: int = 40  # Servable questions a refill tops a topic up to
+    QUIZ_BANK_LOW_WATER: int = 15  # A topic is refilled in the background below this
+    QUIZ_BANK_MAX_SERVES: int = 3  # A question is retired after this many draws
+    QUIZ_BANK_GENERATION_BATCH: int = 10  # Questions asked of the LLM per call
+    QUIZ_BANK_DUPLICATE_THRESHOLD: float = 0.8  # Token Jaccard similarity at which two questions count as the same
+    QUIZ_BANK_REFILL_INTERVAL_S: float = 900  # Celery beat period of the low-stock sweep
+    QUIZ_ANSWER_KEY_CACHE_SIZE: int = 1024  # Answer keys of served quizzes kept in memory for grading
+    QUIZ_BATCH_MAX_ATTEMPTS: int = 100  # Attempts accepted by one /api/quiz/submit/batch request
+
     # Embedding model
     EMBEDDING_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: str = "sentence-transformers"  # or "hash": deterministic and model-free, for tests and benchmarks
+    HASH_EMBEDDING_DIM: int = 384
+    EMBEDDING_BATCHING_ENABLED: bool = True  # Micro-batch concurrent query embeddings
+    EMBEDDING_BATCH_WINDOW_MS: float = 5  # How long the first query waits for company
+    EMBEDDING_MAX_BATCH: int = 32  # A full batch is encoded immediately
 
     # ChromaDB settings
     CHROMA_PERSIST_DIRECTORY: str = str(BASE_DIR / "data" / "chroma")
     CHROMA_COLLECTION_NAME: str = "physics_tutoring"
+    CHROMA_SHARD_REFRESH_S: float = 60  # How often shards created by other processes are looked for
+
+    # Vector search backend: "chroma" (HNSW) or "quantized" (per-grade NumPy matrices)
+    VECTOR_BACKEND: str = "chroma"
+    QUANTIZED_INDEX_DTYPE: str = "int8"  # or "float16"
+    QUANTIZED_INDEX_DIR: str = str(BASE_DIR / "data" / "vector_index")
+
+    # Grade-preferential retrieval: one over-fetching vector query re-ranked in process
+    RETRIEVAL_OVERFETCH_FACTOR: int = 4  # Candidates fetched = k * factor
+    RETRIEVAL_GRADE_BOOST: float = 0.1  # Added to the relevance of the student's own grade
+    RETRIEVAL_GRADE_DISTANCE_PENALTY: float = 0.05  # Subtracted per grade of distance otherwise
+    RETRIEVAL_GRADE_WINDOW: int = 1  # Grades either side of the student's searched along with it
+
+    # Hybrid lexical + vector retrieval
+    RAG_TOP_K: int = 5  # Chunks sent to the LLM with vector-only retrieval
+    HYBRID_RETRIEVAL_ENABLED: bool = True
+    HYBRID_TOP_K: int = 3  # Chunks sent to the LLM with hybrid retrieval
+    HYBRID_RRF_K: int = 60  # Reciprocal Rank Fusion damping constant
+    HYBRID_VECTOR_BUDGET_MS: int = 250  # Logged when exceeded; the vector stage is never skipped
+    HYBRID_LEXICAL_BUDGET_MS: int = 50  # Past this, the lexical stage is dropped for the request
+    LEXICAL_INDEX_DIR: str = str(BASE_DIR / "data" / "lexical")
+
+    # Optional cross-encoder reranking of retrieved chunks
+    RERANK_ENABLED: bool = False
+    RERANKER_MODEL_NAME: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 20  # Chunks retrieved and scored before keeping the best k
+    RERANK_BUDGET_MS: int = 150  # ANN order is kept when scoring takes longer
+    RERANK_MAX_CONCURRENCY: int = 1  # Parallel forward passes; extra requests skip reranking
+
+    # Prompt context assembly
+    CONTEXT_TOKEN_BUDGET: int = 1500  # Approximate tokens of retrieved text sent to the LLM
+    CONTEXT_MIN_OVERLAP_CHARS: int = 16  # Shorter suffix/prefix matches are treated as coincidence
+    CONTEXT_MAX_OVERLAP_CHARS: int = 400  # Upper bound on the splitter's chunk overlap
+
+    # Server-Sent Events mode of /api/rag/ask
+    SSE_FLUSH_INTERVAL_MS: float = 50  # Answer chunks are merged for at most this long...
+    SSE_FLUSH_BYTES: int = 512  # ...or until this much text is buffered
+    SSE_HEARTBEAT_S: float = 15  # Comment line sent when nothing else was written for this long
+
+    # Worker threads for blocking embedding/vector-store calls made from async routes
+    RAG_EXECUTOR_WORKERS: int = 4
+
+    # Write-behind persistence of chat messages
+    MESSAGE_LOG_ENABLED: bool = True
+    MESSAGE_LOG_MAX_QUEUE: int = 10000  # Beyond this, callers write their message themselves
+    MESSAGE_LOG_BATCH_SIZE: int = 200  # Messages per INSERT
+    MESSAGE_LOG_FLUSH_INTERVAL_MS: float = 200  # Longest a message waits in memory
+
+    # Metrics
+    EVENT_LOOP_MONITOR_INTERVAL_MS: float = 100  # 0 disables the event-loop lag probe
+
+    # Semantic answer cache for /api/rag/ask
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_SIMILARITY_THRESHOLD: float = 0.95  # Minimum cosine similarity for a hit
+    SEMANTIC_CACHE_TTL_SECONDS: int = 6 * 60 * 60
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 5000
+    SEMANTIC_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    SEMANTIC_CACHE_INVALIDATION: str = "memory"  # or "redis": a generation counter in REDIS_URL, bumped by every ingestion
+    SEMANTIC_CACHE_GENERATION_REFRESH_S: float = 1.0  # How long a worker reuses the generation it read from Redis
+    SINGLE_FLIGHT_ENABLED: bool = True  # Identical in-flight questions from one grade share a single LLM stream
 
     # File storage
     PDF_UPLOAD_DIR: str = str(BASE_DIR / "data" / "pdfs")
@@ -54,4 +167,6 @@ print("Database URL:", settings.DATABASE_URL)
 
 # Ensure data directories exist
 os.makedirs(settings.PDF_UPLOAD_DIR, exist_ok=True)
-os.makedirs(settings.CHROMA_PERSIST_DIRECTORY, exist_ok=True)
\ No newline at end of file
+os.makedirs(settings.CHROMA_PERSIST_DIRECTORY, exist_ok=True)
+os.makedirs(settings.LEXICAL_INDEX_DIR, exist_ok=True)
+os.makedirs(settings.QUANTIZED_INDEX_DIR, exist_ok=True)
\ No newline at end of file
@@ -0,0 +1,244 @@
+# /mentormind-backend/app/core/admission.py
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Hashable
+
+from app.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when an LLM call is shed because the queue is full or the wait would be too long."""
+
+    def __init__(self, message: str, retry_after_s: float):
+        super().__init__(message)
+        self.retry_after_s = retry_after_s
+
+
+class AdmissionTicket:
+    """
+    A place in the LLM admission queue. `acquire()` (or `acquire_sync()`)
+    waits for a slot and `release()` frees it, or leaves the queue if the
+    slot was never granted. Release is idempotent.
+    """
+
+    def __init__(self, controller: "AdmissionController", position: int, estimated_wait_s: float,
+                 owner: Hashable = None, cost: float = 1):
+        self._controller = controller
+        self.owner = owner
+        self.cost = cost
+        self.position = position  # 0 when admitted immediately
+        self.estimated_wait_s = estimated_wait_s
+        self.enqueued_at = time.perf_counter()
+        self.granted_at: float | None = None
+        self.released = False
+        self._granted = threading.Event()
+        self._future: asyncio.Future | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def status(self) -> dict:
+        return {"position": self.position, "estimated_wait_ms": round(self.estimated_wait_s * 1000)}
+
+    async def acquire(self):
+        """Waits for a slot without blocking the event loop."""
+        with self._controller._lock:
+            if not self._granted.is_set():
+                self._loop = asyncio.get_running_loop()
+                self._future = self._loop.create_future()
+        if self._future is None:
+            return
+        try:
+            await asyncio.wait_for(self._future, timeout=self._controller.max_wait_s)
+        except asyncio.TimeoutError:
+            self._on_timeout()
+        except BaseException:
+            self.release()
+            raise
+
+    def acquire_sync(self):
+        """Blocks the calling (worker) thread until a slot is granted."""
+        if not self._granted.wait(timeout=self._controller.max_wait_s):
+            self._on_timeout()
+
+    def release(self):
+        self._controller._release(self)
+
+    def _on_timeout(self):
+        if not self._controller._withdraw(self):
+            return  # Granted while timing out; the caller keeps the slot and releases it as usual
+        metrics.increment("llm_admission_timeouts")
+        raise AdmissionRejected("Timed out waiting for an LLM slot.", retry_after_s=self._controller.max_wait_s)
+
+    def _grant(self):
+        """Marks the ticket as admitted. Caller holds the controller lock."""
+        self.granted_at = time.perf_counter()
+        self._granted.set()
+        metrics.observe("llm_queue_wait_ms", (self.granted_at - self.enqueued_at) * 1000)
+        if self._future is not None:
+            self._loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self._future.done():
+            self._future.set_result(None)
+
+
+class AdmissionController:
+    """
+    Limits concurrent LLM calls across the process, for async and sync callers alike.
+
+    Up to `max_concurrency` calls run at once and up to `max_queue` more wait.
+    A caller that would exceed the queue, or whose estimated wait is beyond
+    `max_wait_s`, is rejected at once instead of piling more load onto a
+    saturated upstream. The estimate is the queue position times a moving
+    average of how long calls hold their slot.
+
+    Waiting calls are queued per owner (a user id) and slots are handed out
+    by deficit round-robin: each owner with waiting calls earns `quantum`
+    per turn and spends a call's `cost` when it runs. One user with many
+    queued calls therefore waits behind everyone else's next call instead
+    of starving them. Calls from a single owner run in FIFO order.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, max_wait_s: float, expected_call_s: float,
+                 quantum: float = 1):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait_s = max_wait_s
+        self.quantum = quantum
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._queues: dict[Hashable, deque[AdmissionTicket]] = {}  # owner -> waiting tickets
+        self._owners: deque[Hashable] = deque()  # Round-robin order of owners with waiting tickets
+        self._deficits: dict[Hashable, float] = {}
+        self._avg_call_s = expected_call_s
+
+    def enter(self, owner: Hashable = None, cost: float = 1) -> AdmissionTicket:
+        """
+        Takes a slot or a place in the owner's queue without waiting.
+        Raises AdmissionRejected when the request should be shed.
+        """
+        with self._lock:
+            if self._active < self.max_concurrency and not self._queued:
+                self._active += 1
+                ticket = AdmissionTicket(self, position=0, estimated_wait_s=0.0, owner=owner, cost=cost)
+                ticket._grant()
+            else:
+                position = self._fair_position(owner)
+                estimated_wait_s = position / self.max_concurrency * self._avg_call_s
+                if self._queued >= self.max_queue or estimated_wait_s > self.max_wait_s:
+                    metrics.increment("llm_admission_shed")
+                    raise AdmissionRejected(
+                        "The tutor is busy right now. Please try again shortly.",
+                        retry_after_s=min(estimated_wait_s, self.max_wait_s),
+                    )
+                ticket = AdmissionTicket(self, position=position, estimated_wait_s=estimated_wait_s,
+                                         owner=owner, cost=cost)
+                if owner not in self._queues:
+                    self._queues[owner] = deque()
+                    self._owners.append(owner)
+                    # An owner earns its quantum when its turn starts; with no one else waiting, that is now
+                    self._deficits[owner] = self.quantum if len(self._owners) == 1 else 0.0
+                self._queues[owner].append(ticket)
+                self._queued += 1
+            depth = self._queued
+        metrics.observe("llm_queue_depth", depth)
+        return ticket
+
+    def _fair_position(self, owner: Hashable) -> int:
+        """
+        Approximate place of a new ticket from `owner` under round-robin: its
+        own queue, plus up to as many tickets from each other owner.
+        """
+        own = len(self._queues.get(owner, ())) + 1
+        return own + sum(min(len(queue), own) for other, queue in self._queues.items() if other != owner)
+
+    def _next_ticket(self) -> AdmissionTicket:
+        """Picks the next waiting ticket by deficit round-robin. Caller holds the lock."""
+        while True:
+            owner = self._owners[0]
+            queue = self._queues[owner]
+            ticket = queue[0]
+            if self._deficits[owner] >= ticket.cost:
+                self._deficits[owner] -= ticket.cost
+                queue.popleft()
+                self._queued -= 1
+                if not queue:
+                    self._forget_owner(owner)
+                return ticket
+            # Out of credit: the turn passes to the next owner, which earns its quantum
+            self._owners.rotate(-1)
+            self._deficits[self._owners[0]] += self.quantum
+
+    def _forget_owner(self, owner: Hashable):
+        del self._queues[owner]
+        del self._deficits[owner]
+        had_turn = self._owners[0] == owner
+        self._owners.remove(owner)
+        if had_turn and self._owners:
+            self._deficits[self._owners[0]] += self.quantum
+
+    def _dequeue(self, ticket: AdmissionTicket):
+        """Takes a waiting ticket out of its owner's queue. Caller holds the lock."""
+        ticket.released = True
+        queue = self._queues[ticket.owner]
+        queue.remove(ticket)
+        self._queued -= 1
+        if not queue:
+            self._forget_owner(ticket.owner)
+
+    def _withdraw(self, ticket: AdmissionTicket) -> bool:
+        """
+        Gives up a ticket whose wait timed out. Returns False, leaving the
+        ticket untouched, if it was granted a slot in the meantime.
+        """
+        with self._lock:
+            if ticket.granted_at is not None:
+                return False
+            if not ticket.released:
+                self._dequeue(ticket)
+            return True
+
+    def _release(self, ticket: AdmissionTicket):
+        with self._lock:
+            if ticket.released:
+                return
+            if ticket.granted_at is None:
+                self._dequeue(ticket)
+                return
+            ticket.released = True
+            held_s = time.perf_counter() - ticket.granted_at
+            self._avg_call_s = 0.8 * self._avg_call_s + 0.2 * held_s
+            if self._queued:
+                self._next_ticket()._grant()  # The slot passes straight to the next caller
+            else:
+                self._active -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active": self._active,
+                "queued": self._queued,
+                "waiting_owners": len(self._owners),
+                "avg_call_s": self._avg_call_s,
+            }
+
+
+def retry_after_header(error: AdmissionRejected) -> dict:
+    """The Retry-After header for a 429 response, in whole seconds."""
+    return {"Retry-After": str(max(1, math.ceil(error.retry_after_s)))}
+
+
+# Process-wide controller shared by every Gemini caller
+llm_admission = AdmissionController(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    max_queue=settings.LLM_MAX_QUEUE,
+    max_wait_s=settings.LLM_MAX_QUEUE_WAIT_S,
+    expected_call_s=settings.LLM_EXPECTED_CALL_S,
+)
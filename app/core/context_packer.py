@@ -0,0 +1,101 @@
+# /mentormind-backend/app/core/context_packer.py
+from typing import List, Tuple
+
+from langchain_core.documents import Document
+from app.utils.tokens import estimate_tokens
+
+SEPARATOR = "\n\n"
+
+
+class PackedContext:
+    """
+    The prompt context built from retrieved chunks, with its token accounting.
+    """
+    __slots__ = ("text", "tokens", "raw_tokens", "chunks", "passages")
+
+    def __init__(self, text: str, tokens: int, raw_tokens: int, chunks: int, passages: int):
+        self.text = text
+        self.tokens = tokens
+        self.raw_tokens = raw_tokens  # Tokens the chunks would cost joined verbatim
+        self.chunks = chunks
+        self.passages = passages
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.raw_tokens - self.tokens
+
+
+def find_overlap(previous: str, following: str, min_overlap: int, max_overlap: int) -> int:
+    """
+    Returns the length of the longest suffix of `previous` that is also a
+    prefix of `following`, or 0 if it is shorter than `min_overlap`.
+    """
+    for size in range(min(len(previous), len(following), max_overlap), min_overlap - 1, -1):
+        if previous.endswith(following[:size]):
+            return size
+    return 0
+
+
+def _chunk_position(doc: Document) -> Tuple[str, int] | None:
+    filename = doc.metadata.get("filename")
+    chunk_index = doc.metadata.get("chunk_index")
+    if filename is None or chunk_index is None:
+        return None
+    return filename, int(chunk_index)
+
+
+def pack_context(
+    docs_and_scores: List[Tuple[Document, float]],
+    token_budget: int,
+    min_overlap: int = 16,
+    max_overlap: int = 400,
+) -> PackedContext:
+    """
+    Assembles the prompt context from retrieved chunks.
+
+    Chunks that are consecutive in the same file (by the `filename` and
+    `chunk_index` metadata written at ingestion) are merged into one passage
+    with the splitter's overlap removed. Passages keep the relevance order of
+    their best chunk and are added until `token_budget` is reached; a first
+    passage that alone exceeds the budget is truncated rather than dropped.
+    """
+    docs = [doc for doc, _ in docs_and_scores]
+    raw_tokens = estimate_tokens(SEPARATOR.join(doc.page_content for doc in docs))
+
+    # Each passage is [best relevance rank, text, last chunk position]
+    passages: List[list] = []
+    positioned = sorted(
+        ((rank, doc, _chunk_position(doc)) for rank, doc in enumerate(docs) if _chunk_position(doc)),
+        key=lambda item: item[2],
+    )
+    for rank, doc, position in positioned:
+        previous = passages[-1] if passages else None
+        if previous and previous[2][0] == position[0] and previous[2][1] == position[1] - 1:
+            overlap = find_overlap(previous[1], doc.page_content, min_overlap, max_overlap)
+            rest = doc.page_content[overlap:]
+            if overlap == 0 and rest and previous[1] and not previous[1][-1].isspace() and not rest[0].isspace():
+                rest = " " + rest  # The splitter strips chunks, so keep the words apart
+            previous[1] += rest
+            previous[0] = min(previous[0], rank)
+            previous[2] = position
+        elif previous and previous[2] == position:
+            continue  # The same chunk retrieved twice
+        else:
+            passages.append([rank, doc.page_content, position])
+    passages.extend([rank, doc.page_content, None] for rank, doc in enumerate(docs) if not _chunk_position(doc))
+    passages.sort(key=lambda passage: passage[0])
+
+    selected: List[str] = []
+    used = 0
+    for _, text, _ in passages:
+        cost = estimate_tokens(text) + (estimate_tokens(SEPARATOR) if selected else 0)
+        if used + cost <= token_budget:
+            selected.append(text)
+            used += cost
+        elif not selected:
+            selected.append(text[:token_budget * 4])
+            used = estimate_tokens(selected[0])
+            break
+
+    text = SEPARATOR.join(selected)
+    return PackedContext(text, estimate_tokens(text), raw_tokens, chunks=len(docs), passages=len(selected))
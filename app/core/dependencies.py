@@ -1,20 +1,20 @@
 # /mentormind-backend/app/core/dependencies.py
-from fastapi import Depends, HTTPException, status
+import math
+from fastapi import Depends, HTTPException, Request, status
 from app.db.models import User, UserRole
 from app.core.jwt_handler import get_current_user, oauth2_scheme
+from app.core.rate_limit import RateLimitExceeded, consume_request_budget
+from app.core.rag_manager import RagManager
+from app.core.services import ServiceContainer
+from app.services.quiz_service import QuizService
 from app.db.base import database
 
 def get_db():
     """
-    Dependency to get a database connection for a request.
+    Dependency to get the database for a request. Its pooled connection is
+    opened on first use and released by DatabaseConnectionMiddleware.
     """
-    if database.is_closed():
-        database.connect()
-    try:
-        yield database
-    finally:
-        if not database.is_closed():
-            database.close()
+    return database
 
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """
@@ -57,3 +57,42 @@ def get_current_student_user(current_user: User = Depends(get_current_active_use
             detail="The user doesn't have enough privileges (student required)",
         )
     return current_user
+
+def rate_limited(user_dependency, cost: float = 1):
+    """
+    Wraps a user dependency so each request also spends `cost` from the
+    user's token bucket (limits per role), answering 429 once it is empty.
+    """
+    def dependency(current_user: User = Depends(user_dependency)) -> User:
+        try:
+            consume_request_budget(current_user.id, current_user.role, cost)
+        except RateLimitExceeded as e:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=str(e),
+                headers={"Retry-After": str(max(1, math.ceil(e.retry_after_s)))},
+            )
+        return current_user
+    return dependency
+
+def get_services(request: Request) -> ServiceContainer:
+    """
+    Dependency to get the worker's service container, built in the lifespan.
+    Built on first use when the app runs without its lifespan.
+    """
+    services = getattr(request.app.state, "services", None)
+    if services is None:
+        services = request.app.state.services = ServiceContainer()
+    return services
+
+def get_rag_manager(services: ServiceContainer = Depends(get_services)) -> RagManager:
+    """
+    Dependency to get the shared RAG manager.
+    """
+    return services.rag_manager
+
+def get_quiz_service(services: ServiceContainer = Depends(get_services)) -> QuizService:
+    """
+    Dependency to get the shared quiz service.
+    """
+    return services.quiz_service
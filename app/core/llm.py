@@ -0,0 +1,125 @@
+# /mentormind-backend/app/core/llm.py
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from app.config import settings
+
+ANSWER_VOCABULARY = (
+    "force mass acceleration velocity energy momentum friction gravity the a of is and so "
+    "therefore because when object moves changes equal net law first second third unit "
+    "newton joule watt current voltage resistance circuit measured in per step"
+).split()
+QUIZ_REQUEST = re.compile(r"quiz with (\d+) questions")
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """
+    A local, deterministic stand-in for the hosted chat model.
+
+    The answer is derived from a hash of the prompt, so the same prompt always
+    yields the same tokens. It waits `ttft_ms` before the first token and then
+    emits `tokens_per_second` tokens, which makes it possible to measure the
+    app's own overhead on the streaming path without network access or cost.
+    Quiz prompts get a valid quiz JSON with the requested number of questions.
+    """
+    ttft_ms: float = 300.0
+    tokens_per_second: float = 50.0
+    answer_tokens: int = 120
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        quiz_request = QUIZ_REQUEST.search(prompt)
+        if quiz_request:
+            # Streamed in short pieces, like a real model writing out JSON
+            quiz = json.dumps(self._quiz(int(quiz_request.group(1))))
+            return [quiz[start:start + 16] for start in range(0, len(quiz), 16)]
+        rng = random.Random(hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).digest())
+        return [rng.choice(ANSWER_VOCABULARY) + " " for _ in range(self.answer_tokens)]
+
+    @staticmethod
+    def _quiz(num_questions: int) -> dict:
+        return {"questions": [
+            {
+                "question_text": f"Sample question {number}?",
+                "options": ["A", "B", "C", "D"],
+                "correct_answer": "A",
+            }
+            for number in range(1, num_questions + 1)
+        ]}
+
+    def _delays(self, count: int) -> Iterator[float]:
+        """Yields the wait before each token, in seconds."""
+        yield self.ttft_ms / 1000
+        for _ in range(count - 1):
+            yield 1.0 / self.tokens_per_second
+
+    def _generate(self, messages: List[BaseMessage], stop: List[str] | None = None,
+                  run_manager: CallbackManagerForLLMRun | None = None, **kwargs: Any) -> ChatResult:
+        tokens = self._tokens(messages)
+        time.sleep(sum(self._delays(len(tokens))))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: List[str] | None = None,
+                         run_manager: AsyncCallbackManagerForLLMRun | None = None, **kwargs: Any) -> ChatResult:
+        tokens = self._tokens(messages)
+        await asyncio.sleep(sum(self._delays(len(tokens))))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: List[str] | None = None,
+                run_manager: CallbackManagerForLLMRun | None = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        tokens = self._tokens(messages)
+        for token, delay in zip(tokens, self._delays(len(tokens))):
+            time.sleep(delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: List[str] | None = None,
+                       run_manager: AsyncCallbackManagerForLLMRun | None = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        tokens = self._tokens(messages)
+        for token, delay in zip(tokens, self._delays(len(tokens))):
+            await asyncio.sleep(delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+def create_chat_model(streaming: bool = True) -> BaseChatModel:
+    """
+    Returns the chat model selected by LLM_BACKEND.
+    """
+    if settings.LLM_BACKEND == "fake":
+        return FakeStreamingChatModel(
+            ttft_ms=settings.FAKE_LLM_TTFT_MS,
+            tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND,
+            answer_tokens=settings.FAKE_LLM_ANSWER_TOKENS,
+        )
+    if settings.LLM_BACKEND != "gemini":
+        raise ValueError(f"Unknown LLM backend: {settings.LLM_BACKEND}")
+
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model="gemini-2.5-flash",
+        google_api_key=settings.GOOGLE_API_KEY,
+        temperature=0.2,
+        convert_system_message_to_human=True,
+        streaming=streaming,
+        max_retries=1,  # No SDK retries; rate limits are retried with backoff in app.core.retry
+    )
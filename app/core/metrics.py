@@ -0,0 +1,81 @@
+# /mentormind-backend/app/core/metrics.py
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsRegistry:
+    """
+    A small in-process registry of counters and latency samples.
+
+    Each latency series keeps its most recent `max_samples` values, so memory
+    stays bounded however long the process runs. Safe to use from the event
+    loop and from worker threads.
+    """
+
+    def __init__(self, max_samples: int = 10000):
+        self._max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque] = {}
+        self._counters: dict[str, int] = {}
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            series = self._samples.get(name)
+            if series is None:
+                series = self._samples[name] = deque(maxlen=self._max_samples)
+            series.append(value)
+
+    def increment(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    @contextmanager
+    def timer(self, name: str):
+        """Records the wall time of the block, in milliseconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - started) * 1000)
+
+    def snapshot(self) -> dict:
+        """Returns counters and, per series, count and p50/p95/p99/max."""
+        with self._lock:
+            samples = {name: sorted(series) for name, series in self._samples.items()}
+            counters = dict(self._counters)
+        summary = {}
+        for name, values in samples.items():
+            if not values:
+                continue
+            summary[name] = {"count": len(values), "max": values[-1]}
+            for p in (50, 95, 99):
+                summary[name][f"p{p}"] = values[max(1, math.ceil(p / 100 * len(values))) - 1]
+        return {"counters": counters, "latencies": summary}
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counters.clear()
+
+
+async def monitor_event_loop_lag(registry: "MetricsRegistry", interval_ms: float):
+    """
+    Records how late the event loop wakes from a sleep, as `event_loop_lag_ms`.
+    Any blocking call on the loop shows up here. Runs until cancelled.
+    """
+    interval = interval_ms / 1000
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        registry.observe("event_loop_lag_ms", max(0.0, (time.perf_counter() - started - interval) * 1000))
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
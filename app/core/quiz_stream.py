@@ -0,0 +1,99 @@
+# /mentormind-backend/app/core/quiz_stream.py
+import json
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def validate_question(raw: Any) -> Dict[str, Any] | None:
+    """
+    Returns a clean question dict, or None when the generated question is
+    unusable: no text, fewer than two distinct options, or an answer that is
+    not one of the options.
+    """
+    if not isinstance(raw, dict):
+        return None
+    question_text = raw.get("question_text")
+    options = raw.get("options")
+    correct_answer = raw.get("correct_answer")
+    if not isinstance(question_text, str) or not question_text.strip():
+        return None
+    if not isinstance(options, list) or not all(isinstance(option, str) for option in options):
+        return None
+    options = [option.strip() for option in options]
+    if len(set(options)) < 2 or not isinstance(correct_answer, str) or correct_answer.strip() not in options:
+        return None
+    return {"question_text": question_text.strip(), "options": options, "correct_answer": correct_answer.strip()}
+
+
+class QuizItemParser:
+    """
+    Incrementally extracts the question objects from a streamed quiz JSON.
+
+    `feed()` takes the next piece of LLM output and returns every object
+    that closed within it, in order. An object counts as a quiz item when
+    it sits directly inside an array, which matches both `{"questions":
+    [...]}` and a bare array, and ignores anything around the JSON such as
+    markdown fences. An item that is not valid JSON on its own is counted in
+    `malformed` and skipped; the items after it are still parsed.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._position = 0  # Next character of _buffer to scan
+        self._containers: List[str] = []  # Open '[' and '{' outside of strings
+        self._in_string = False
+        self._escaped = False
+        self._item_start: int | None = None  # Buffer offset of the open item's '{'
+        self._item_depth = 0  # Container depth at which the open item's '{' sits
+        self.malformed = 0
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        self._buffer += text
+        items = []
+        buffer = self._buffer
+        for position in range(self._position, len(buffer)):
+            char = buffer[position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                if char == "{" and self._item_start is None and self._containers and self._containers[-1] == "[":
+                    self._item_start = position
+                    self._item_depth = len(self._containers) + 1
+                self._containers.append(char)
+            elif char in "]}" and self._containers:
+                closes_item = self._item_start is not None and len(self._containers) == self._item_depth
+                self._containers.pop()
+                if closes_item:
+                    item = self._parse(buffer[self._item_start:position + 1])
+                    if item is not None:
+                        items.append(item)
+                    self._item_start = None
+        self._position = len(buffer)
+        self._compact()
+        return items
+
+    def _parse(self, text: str) -> Dict[str, Any] | None:
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError:
+            self.malformed += 1
+            logger.warning(f"Dropping a malformed quiz item: {text[:80]!r}")
+            return None
+        return item
+
+    def _compact(self):
+        """Forgets scanned text that no open item still needs, so memory stays bounded."""
+        keep_from = self._item_start if self._item_start is not None else self._position
+        self._buffer = self._buffer[keep_from:]
+        self._position -= keep_from
+        if self._item_start is not None:
+            self._item_start = 0
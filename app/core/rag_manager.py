@@ -1,16 +1,28 @@
 # /mentormind-backend/app/core/rag_manager.py
+import asyncio
+import functools
 import logging
-from typing import Dict, Any, List
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, List, Tuple
 import json
 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
-from langchain_core.retrievers import BaseRetriever
-from langchain_core.vectorstores.base import VectorStoreRetriever
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import SentenceTransformerEmbeddings
+from langchain_core.documents import Document
 from app.services.chroma_service import ChromaService
+from app.core.context_packer import pack_context
+from app.core.llm import create_chat_model
+from app.core.admission import AdmissionRejected, llm_admission
+from app.core.metrics import metrics
+from app.core.quiz_stream import QuizItemParser, validate_question
+from app.core.retry import astream_with_retry, call_with_retry, stream_with_retry
+from app.core.single_flight import SingleFlight, normalize_question
+from app.core.retriever import ChromaRetriever, QuantizedRetriever, grade_adjusted_score, rank_by_grade, reciprocal_rank_fusion
+from app.services.answer_cache import answer_cache
+from app.services.lexical_index import lexical_index
+from app.services.reranker import reranker
+from app.services.vector_index import quantized_vector_index
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -20,17 +32,55 @@ class RagManager:
     """
     Manages the Retrieval-Augmented Generation (RAG) process.
     """
+    _retriever: ChromaRetriever | None = None  # Shared by every instance in the process
+    _executor: ThreadPoolExecutor | None = None  # Bounded pool for blocking retrieval work
+    _lexical_executor: ThreadPoolExecutor | None = None  # Runs BM25 searches next to the vector query
+    _single_flight = SingleFlight()  # Coalesces identical in-flight retrievals and answer streams
+
+    @classmethod
+    def initialize(cls):
+        """
+        Builds the process-wide retriever.
+        This should be called at application startup, after ChromaService.initialize().
+        """
+        if cls._retriever is None:
+            if settings.VECTOR_BACKEND == "quantized":
+                chroma_service = ChromaService()
+                if not quantized_vector_index.is_built():
+                    quantized_vector_index.rebuild_from_chroma(chroma_service)
+                cls._retriever = QuantizedRetriever(quantized_vector_index, chroma_service)
+            else:
+                cls._retriever = ChromaRetriever(ChromaService())
+            logger.info(f"RAG retriever initialized with the {settings.VECTOR_BACKEND} vector backend.")
+        if settings.RERANK_ENABLED:
+            reranker.warm_up()
+            logger.info("Cross-encoder reranker loaded.")
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(
+                max_workers=settings.RAG_EXECUTOR_WORKERS,
+                thread_name_prefix="rag-retrieval",
+            )
+        return cls._executor
+
+    @classmethod
+    def shutdown(cls):
+        """Stops the retrieval executors and query embedder. Called at application shutdown."""
+        if cls._retriever is not None:
+            cls._retriever.close()
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
+        if cls._lexical_executor is not None:
+            cls._lexical_executor.shutdown(wait=False, cancel_futures=True)
+            cls._lexical_executor = None
 
     def __init__(self, enable_streaming: bool = True):
         self.chroma_service = ChromaService()
 
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            google_api_key=settings.GOOGLE_API_KEY,
-            temperature=0.2,
-            convert_system_message_to_human=True,
-            streaming=enable_streaming,
-        )
+        self.llm = create_chat_model(streaming=enable_streaming)
 
         self.answer_prompt = PromptTemplate.from_template("""
         You are an expert Physics tutor for 9th and 10th-grade students.
@@ -64,91 +114,390 @@ class RagManager:
         self.str_output_parser = StrOutputParser()
         self.json_output_parser = JsonOutputParser()
 
-    def _get_retriever(self, student_grade: int, k: int) -> Chroma:
-        """Creates and returns a retriever for the vector store."""
-        lc_embedding_function = SentenceTransformerEmbeddings(
-            model_name=settings.EMBEDDING_MODEL_NAME
-        )
-        vectorstore = Chroma(
-            client=self.chroma_service._client,
-            collection_name=settings.CHROMA_COLLECTION_NAME,
-            embedding_function=lc_embedding_function,
+    def _get_retriever(self) -> ChromaRetriever:
+        """Returns the process-wide retriever, building it on first use."""
+        if self._retriever is None:
+            self.initialize()
+        return self._retriever
+
+    def _embed_query(self, question: str) -> List[float]:
+        return self._get_retriever().embed_query(question)
+
+    async def _aembed_query(self, question: str) -> List[float]:
+        """
+        Embeds the question from the event loop. With micro-batching the request
+        waits on the shared batch instead of holding a retrieval executor thread.
+        """
+        retriever = self._get_retriever()
+        if retriever.query_embedder is not None:
+            return await retriever.query_embedder.aembed(question)
+        return await self._run_blocking(retriever.embed_query, question)
+
+    async def _run_blocking(self, func, *args):
+        """Runs blocking embedding or vector-store work on the bounded retrieval executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(func, *args))
+
+    @classmethod
+    def _get_lexical_executor(cls) -> ThreadPoolExecutor:
+        # Separate from the retrieval executor so a saturated pool cannot
+        # deadlock on lexical searches submitted from its own workers
+        if cls._lexical_executor is None:
+            cls._lexical_executor = ThreadPoolExecutor(
+                max_workers=settings.RAG_EXECUTOR_WORKERS,
+                thread_name_prefix="rag-lexical",
+            )
+        return cls._lexical_executor
+
+    @staticmethod
+    def _default_top_k() -> int:
+        return settings.HYBRID_TOP_K if settings.HYBRID_RETRIEVAL_ENABLED else settings.RAG_TOP_K
+
+    def _retrieve_documents(self, question: str, query_embedding: List[float], student_grade: int,
+                            k: int) -> List[Tuple[Document, float]]:
+        """
+        Retrieves the top-k chunks with one vector search over the shards of the
+        student's grade and the RETRIEVAL_GRADE_WINDOW grades either side; the
+        hits are then re-ranked in process, preferring the student's grade and
+        then neighbouring grades. When that window yields fewer than k hits, a
+        cross-shard search over every other grade fills the remaining slots.
+        With hybrid retrieval enabled, a BM25 search runs alongside the vector
+        query and both rankings are merged with Reciprocal Rank Fusion.
+        """
+        retriever = self._get_retriever()
+        fetch_k = k * settings.RETRIEVAL_OVERFETCH_FACTOR
+
+        lexical_future = None
+        if settings.HYBRID_RETRIEVAL_ENABLED:
+            lexical_started = time.perf_counter()
+            lexical_future = self._get_lexical_executor().submit(lexical_index.search, question, fetch_k)
+
+        vector_started = time.perf_counter()
+        candidates = retriever.search_by_vector(query_embedding, k=fetch_k, grade=student_grade,
+                                                grade_window=settings.RETRIEVAL_GRADE_WINDOW)
+        if len(candidates) < k:
+            candidates += retriever.search_by_vector(query_embedding, k=fetch_k, grade=student_grade,
+                                                     grade_window=settings.RETRIEVAL_GRADE_WINDOW,
+                                                     cross_shard=True)
+        vector_ms = (time.perf_counter() - vector_started) * 1000
+        if vector_ms > settings.HYBRID_VECTOR_BUDGET_MS:
+            logger.warning(f"Vector stage took {vector_ms:.1f} ms (budget {settings.HYBRID_VECTOR_BUDGET_MS} ms).")
+
+        if lexical_future is None:
+            return self._rank_vector_only(candidates, student_grade, k)
+
+        remaining_s = settings.HYBRID_LEXICAL_BUDGET_MS / 1000 - (time.perf_counter() - lexical_started)
+        try:
+            lexical_hits = lexical_future.result(timeout=max(remaining_s, 0))
+        except FutureTimeoutError:
+            logger.warning(f"Lexical stage exceeded its {settings.HYBRID_LEXICAL_BUDGET_MS} ms budget; using vector results only.")
+            return self._rank_vector_only(candidates, student_grade, k)
+        except Exception as e:
+            logger.error(f"Lexical stage failed, using vector results only: {e}")
+            return self._rank_vector_only(candidates, student_grade, k)
+
+        vector_docs = {doc.id: doc for doc, _ in candidates}
+        grades = {doc.id: doc.metadata.get("grade") for doc, _ in candidates}
+        grades.update({doc_id: grade for doc_id, _, grade in lexical_hits if doc_id not in grades})
+        fused = reciprocal_rank_fusion(
+            [doc.id for doc, _ in candidates],
+            [doc_id for doc_id, _, _ in lexical_hits],
+            rrf_k=settings.HYBRID_RRF_K,
         )
-        return vectorstore
+        if not fused:
+            return []
+
+        # RRF scores are tiny; normalize them so the grade boost keeps its meaning
+        best = max(fused.values())
+        top_ids = sorted(
+            fused,
+            key=lambda doc_id: grade_adjusted_score(
+                fused[doc_id] / best, grades.get(doc_id), student_grade,
+                settings.RETRIEVAL_GRADE_BOOST, settings.RETRIEVAL_GRADE_DISTANCE_PENALTY,
+            ),
+            reverse=True,
+        )[:k]
+
+        missing = [doc_id for doc_id in top_ids if doc_id not in vector_docs]
+        docs = {**vector_docs, **retriever.get_documents(missing)}
+        return [(docs[doc_id], fused[doc_id]) for doc_id in top_ids if doc_id in docs]
 
-    def get_answer(self, question: str, student_grade: int, k: int = 5) -> Dict[str, Any]:
+    def _retrieve_context(self, question: str, query_embedding: List[float], student_grade: int,
+                          k: int) -> List[Tuple[Document, float]]:
         """
-        Gets an answer from the RAG system.
+        Retrieves the chunks that go into the prompt. With reranking enabled,
+        RERANK_CANDIDATES chunks are retrieved and the cross-encoder keeps the best k.
         """
-        retriever = self._get_retriever(student_grade, k)
-        retrieved_docs = retriever.similarity_search_with_relevance_scores(
-                            query=question,
-                            k=k,
-                            filter={"grade": student_grade}
-                        )
+        if not settings.RERANK_ENABLED:
+            return self._retrieve_documents(question, query_embedding, student_grade, k)
+        candidates = self._retrieve_documents(question, query_embedding, student_grade,
+                                              max(k, settings.RERANK_CANDIDATES))
+        return reranker.rerank(question, candidates, top_n=k, budget_ms=settings.RERANK_BUDGET_MS)
+
+    def _rank_vector_only(self, candidates: List[Tuple[Document, float]], student_grade: int,
+                          k: int) -> List[Tuple[Document, float]]:
+        return rank_by_grade(
+            candidates,
+            student_grade=student_grade,
+            k=k,
+            grade_boost=settings.RETRIEVAL_GRADE_BOOST,
+            grade_distance_penalty=settings.RETRIEVAL_GRADE_DISTANCE_PENALTY,
+        )
+
+    @staticmethod
+    def _build_context(retrieved_docs: List[Tuple[Document, float]]) -> str:
+        """Packs retrieved chunks into the prompt context and logs the tokens saved."""
+        context = pack_context(
+            retrieved_docs,
+            token_budget=settings.CONTEXT_TOKEN_BUDGET,
+            min_overlap=settings.CONTEXT_MIN_OVERLAP_CHARS,
+            max_overlap=settings.CONTEXT_MAX_OVERLAP_CHARS,
+        )
+        logger.info(
+            f"Packed {context.chunks} chunks into {context.passages} passages: "
+            f"{context.tokens} context tokens, {context.tokens_saved} saved."
+        )
+        return context.text
 
-        if not retrieved_docs:
-            logger.warning(f"No documents found for grade {student_grade} and question '{question}'. Widening search.")
-            # Widen search by removing grade filter
-            retrieved_docs = retriever.similarity_search_with_relevance_scores(
-                            query=question,
-                            k=k
-                        )
+    @staticmethod
+    def _format_sources(retrieved_docs: List[Tuple[Document, float]]) -> List[Dict[str, Any]]:
+        return [{"content": doc.page_content, "metadata": doc.metadata} for doc, _ in retrieved_docs]
 
+    @staticmethod
+    def _replay_chunks(answer: str, chunk_size: int = 256):
+        """Splits a cached answer into chunks so it replays like a live stream."""
+        for start in range(0, len(answer), chunk_size):
+            yield answer[start:start + chunk_size]
+
+    def get_answer(self, question: str, student_grade: int, k: int | None = None) -> Dict[str, Any]:
+        """
+        Gets an answer from the RAG system.
+        """
+        k = k or self._default_top_k()
+        query_embedding = self._embed_query(question)
+        # Captured before retrieval, so an answer built while an upload lands is not cached
+        generation = answer_cache.current_generation()
+        if settings.SEMANTIC_CACHE_ENABLED:
+            cached = answer_cache.lookup(student_grade, query_embedding)
+            if cached:
+                return {"answer": cached.answer, "sources": cached.sources}
 
-        context_text = "\n\n".join([doc[0].page_content for doc in retrieved_docs])
+        retrieved_docs = self._retrieve_context(question, query_embedding, student_grade, k)
+        context_text = self._build_context(retrieved_docs)
 
         rag_chain = self.answer_prompt | self.llm | self.str_output_parser
-        result = rag_chain.invoke({"context": context_text, "question": question})
+        ticket = llm_admission.enter()
+        try:
+            ticket.acquire_sync()
+            result = call_with_retry(lambda: rag_chain.invoke({"context": context_text, "question": question}))
+        finally:
+            ticket.release()
 
-        sources = [{"content": doc[0].page_content, "metadata": doc[0].metadata} for doc in retrieved_docs]
+        sources = self._format_sources(retrieved_docs)
+        if result and settings.SEMANTIC_CACHE_ENABLED:
+            answer_cache.store(student_grade, query_embedding, result, sources,
+                               chunk_ids=[doc.id for doc, _ in retrieved_docs], generation=generation)
 
         return {
             "answer": result or "Sorry, I could not find an answer.",
             "sources": sources,
         }
 
-    def generate_quiz(self, topic: str, grade: int, num_questions: int, k: int = 10) -> Dict[str, Any]:
+    def generate_quiz(self, topic: str, grade: int, num_questions: int, k: int = 10,
+                      owner: int | None = None) -> Dict[str, Any]:
         """
         Generates a quiz using only the LLM's knowledge, without RAG.
+        `owner` (a user id) is the fair-share queue the LLM call waits in.
         """
         quiz_chain = self.quiz_prompt_without_context | self.llm | self.json_output_parser
-        
+
+        # AdmissionRejected propagates so the API can answer 429 instead of a generic error
+        ticket = llm_admission.enter(owner=owner, cost=settings.QUIZ_REQUEST_COST)
         try:
-            result = quiz_chain.invoke({
+            ticket.acquire_sync()
+            result = call_with_retry(lambda: quiz_chain.invoke({
                 "topic": topic,
                 "grade": grade,
                 "num_questions": num_questions
-            })
+            }))
             if isinstance(result, str):
                 result = json.loads(result)
-            
+
+        except AdmissionRejected:
+            raise
         except Exception as e:
             logger.error(f"Failed to generate or parse quiz from LLM: {e}")
             return {"error": "Failed to generate a valid quiz."}
+        finally:
+            ticket.release()
 
         return result
 
-    def get_answer_stream(self, question: str, student_grade: int, k: int = 5):
+    async def astream_quiz(self, topic: str, grade: int, num_questions: int, owner: int | None = None):
+        """
+        Streams a quiz one validated question at a time, as soon as each
+        question object is complete in the LLM output, so the first question
+        does not wait for the whole quiz. Items that are malformed or fail
+        validation are dropped. Raises AdmissionRejected before the first
+        question when the LLM call is shed.
+        """
+        quiz_chain = self.quiz_prompt_without_context | self.llm | self.str_output_parser
+        parser = QuizItemParser()
+        emitted = invalid = 0
+
+        ticket = llm_admission.enter(owner=owner, cost=settings.QUIZ_REQUEST_COST)
+        try:
+            await ticket.acquire()
+            async for chunk in astream_with_retry(lambda: quiz_chain.astream({
+                "topic": topic,
+                "grade": grade,
+                "num_questions": num_questions
+            })):
+                for item in parser.feed(chunk):
+                    question = validate_question(item)
+                    if question is None:
+                        invalid += 1
+                        continue
+                    yield question
+                    emitted += 1
+                    if emitted >= num_questions:
+                        return
+        finally:
+            ticket.release()
+            dropped = invalid + parser.malformed
+            if dropped:
+                metrics.increment("quiz_questions_dropped", dropped)
+                logger.warning(f"Dropped {dropped} unusable quiz questions for '{topic}' (grade {grade}).")
+
+    def get_answer_stream(self, question: str, student_grade: int, k: int | None = None):
         """
         Yields answer chunks from the RAG system stream.
+        Semantically equivalent questions from the same grade are replayed from the answer cache.
+        """
+        k = k or self._default_top_k()
+        query_embedding = self._embed_query(question)
+        # Captured before retrieval, so an answer built while an upload lands is not cached
+        generation = answer_cache.current_generation()
+        if settings.SEMANTIC_CACHE_ENABLED:
+            cached = answer_cache.lookup(student_grade, query_embedding)
+            if cached:
+                logger.info(f"Semantic cache hit for grade {student_grade}.")
+                yield from self._replay_chunks(cached.answer)
+                return
+
+        retrieved_docs = self._retrieve_context(question, query_embedding, student_grade, k)
+        context_text = self._build_context(retrieved_docs)
+        rag_chain = self.answer_prompt | self.llm | self.str_output_parser
+
+        answer = ""
+        ticket = llm_admission.enter()
+        try:
+            ticket.acquire_sync()
+            for chunk in stream_with_retry(lambda: rag_chain.stream({"context": context_text, "question": question})):
+                if not chunk:
+                    continue  # e.g. the empty chunk that closes a LangChain stream
+                answer += chunk
+                yield chunk
+        finally:
+            ticket.release()
+
+        # Only a fully streamed answer is cached; an interrupted stream never gets here
+        if answer and settings.SEMANTIC_CACHE_ENABLED:
+            answer_cache.store(student_grade, query_embedding, answer, self._format_sources(retrieved_docs),
+                               chunk_ids=[doc.id for doc, _ in retrieved_docs], generation=generation)
+
+    async def aget_answer_stream(self, question: str, student_grade: int, k: int | None = None,
+                                 owner: int | None = None):
         """
-        retriever = self._get_retriever(student_grade, k)
-        retrieved_docs = retriever.similarity_search_with_relevance_scores(
-                            query=question,
-                            k=k,
-                            filter={"grade": student_grade}
-                        )
-
-        if not retrieved_docs:
-            logger.warning(f"No documents found for grade {student_grade} and question '{question}'. Widening search.")
-            retrieved_docs = retriever.similarity_search_with_relevance_scores(
-                            query=question,
-                            k=k
-                        )
-
-        context_text = "\n\n".join([doc[0].page_content for doc in retrieved_docs])
+        Async variant of get_answer_stream for use on the event loop.
+        Yields only the answer chunks of aget_answer_events().
+        """
+        async for kind, payload in self.aget_answer_events(question, student_grade, k, owner):
+            if kind == "chunk":
+                yield payload
+
+    async def aget_answer_events(self, question: str, student_grade: int, k: int | None = None,
+                                 owner: int | None = None):
+        """
+        Yields `(kind, payload)` events for an answer: `("queue", {"position",
+        "estimated_wait_ms"})` when the LLM call has to wait in the admission
+        queue, `("sources", [...])` with the retrieved chunks, then
+        `("chunk", text)` for each answer chunk. Calls admitted at once and
+        cached answers yield no queue event.
+        Raises AdmissionRejected, before any event, when the request is shed.
+        `owner` (a user id) is the fair-share queue the LLM call waits in.
+
+        Embedding and retrieval run on the bounded retrieval executor and the
+        LLM is streamed through its native async interface, so a slow answer
+        never blocks other requests on the same worker.
+        With SINGLE_FLIGHT_ENABLED, concurrent requests with the same normalized
+        question, grade and retrieved chunks subscribe to one LLM stream; each
+        still receives every event, so each caller can store its own message.
+        """
+        k = k or self._default_top_k()
+        query_embedding = await self._aembed_query(question)
+        # Captured before retrieval, so an answer built while an upload lands is not cached
+        generation = answer_cache.current_generation()
+        if settings.SEMANTIC_CACHE_ENABLED:
+            cached = answer_cache.lookup(student_grade, query_embedding)
+            if cached:
+                logger.info(f"Semantic cache hit for grade {student_grade}.")
+                yield "sources", cached.sources
+                for chunk in self._replay_chunks(cached.answer):
+                    yield "chunk", chunk
+                return
+
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            retrieved_docs = await self._run_blocking(self._retrieve_context, question, query_embedding, student_grade, k)
+            async for event in self._astream_answer(
+                question, query_embedding, student_grade, retrieved_docs, owner, generation
+            ):
+                yield event
+            return
+
+        # A class asking the same question at once shares one retrieval and one LLM stream
+        normalized = normalize_question(question)
+        retrieved_docs = await self._single_flight.do(
+            ("retrieve", normalized, student_grade, k),
+            lambda: self._run_blocking(self._retrieve_context, question, query_embedding, student_grade, k),
+        )
+        stream_key = ("answer", normalized, student_grade, tuple(doc.id for doc, _ in retrieved_docs))
+        if self._single_flight.in_flight(stream_key):
+            metrics.increment("llm_streams_coalesced")
+        async for event in self._single_flight.stream(
+            stream_key, lambda: self._astream_answer(
+                question, query_embedding, student_grade, retrieved_docs, owner, generation
+            )
+        ):
+            yield event
+
+    async def _astream_answer(self, question: str, query_embedding: List[float], student_grade: int,
+                              retrieved_docs: List[Tuple[Document, float]], owner: int | None = None,
+                              generation: int | None = None):
+        """
+        Streams the LLM answer over the retrieved context as events, once admitted
+        by the LLM admission controller, and caches it once complete.
+        """
+        context_text = self._build_context(retrieved_docs)
         rag_chain = self.answer_prompt | self.llm | self.str_output_parser
-        
-        for chunk in rag_chain.stream({"context": context_text, "question": question}):
-            yield chunk
+
+        answer = ""
+        ticket = llm_admission.enter(owner=owner)
+        try:
+            if ticket.position:
+                yield "queue", ticket.status()
+            yield "sources", self._format_sources(retrieved_docs)
+            await ticket.acquire()
+            async for chunk in astream_with_retry(
+                lambda: rag_chain.astream({"context": context_text, "question": question})
+            ):
+                if not chunk:
+                    continue  # e.g. the empty chunk that closes a LangChain stream
+                answer += chunk
+                yield "chunk", chunk
+        finally:
+            ticket.release()
+
+        if answer and settings.SEMANTIC_CACHE_ENABLED:
+            answer_cache.store(student_grade, query_embedding, answer, self._format_sources(retrieved_docs),
+                               chunk_ids=[doc.id for doc, _ in retrieved_docs], generation=generation)
@@ -0,0 +1,139 @@
+# /mentormind-backend/app/core/rate_limit.py
+import logging
+import threading
+import time
+
+from app.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Atomic refill-and-take on a Redis hash, so every worker shares one bucket per user.
+# Uses the server clock; returns {allowed, tokens left} with tokens as a string to keep the fraction.
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a user has spent their request budget."""
+
+    def __init__(self, retry_after_s: float):
+        super().__init__("Too many requests. Please slow down.")
+        self.retry_after_s = retry_after_s
+
+
+def role_limit(role: str) -> tuple[float, float]:
+    """(burst capacity, refill per second) for a user role, from RATE_LIMIT_<ROLE>_*."""
+    role = role.upper()
+    burst = getattr(settings, f"RATE_LIMIT_{role}_BURST", settings.RATE_LIMIT_STUDENT_BURST)
+    per_minute = getattr(settings, f"RATE_LIMIT_{role}_PER_MINUTE", settings.RATE_LIMIT_STUDENT_PER_MINUTE)
+    return float(burst), per_minute / 60.0
+
+
+def _retry_after(tokens: float, cost: float, rate: float) -> float:
+    return (cost - tokens) / rate
+
+
+class InMemoryTokenBuckets:
+    """
+    Per-user token buckets held in this process.
+    A bucket starts full at its role's burst and refills continuously; each
+    request takes `cost` tokens or is rejected with the time until it could.
+    """
+
+    def __init__(self, max_users: int = 100_000):
+        self.max_users = max_users
+        self._buckets: dict[int, tuple[float, float, float]] = {}  # user id -> (tokens, updated_at, seconds to refill)
+        self._lock = threading.Lock()
+
+    def consume(self, user_id: int, role: str, cost: float = 1):
+        capacity, rate = role_limit(role)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at, _ = self._buckets.get(user_id, (capacity, now, 0.0))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens < cost:
+                self._buckets[user_id] = (tokens, now, (capacity - tokens) / rate)
+                raise RateLimitExceeded(_retry_after(tokens, cost, rate))
+            self._buckets[user_id] = (tokens - cost, now, (capacity - tokens + cost) / rate)
+            if len(self._buckets) > self.max_users:
+                self._evict_full(now)
+
+    def _evict_full(self, now: float):
+        """Drops buckets that have refilled completely; they are equivalent to a new one."""
+        self._buckets = {
+            user_id: state for user_id, state in self._buckets.items() if now - state[1] < state[2]
+        }
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisTokenBuckets:
+    """
+    Per-user token buckets stored in Redis and shared by every worker.
+    When Redis cannot be reached, requests are let through rather than failing.
+    """
+
+    def __init__(self, url: str, key_prefix: str = "mentormind:rate"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._take = self._redis.register_script(TAKE_SCRIPT)
+        self.key_prefix = key_prefix
+        self._error = redis.RedisError
+
+    def consume(self, user_id: int, role: str, cost: float = 1):
+        capacity, rate = role_limit(role)
+        try:
+            allowed, tokens = self._take(keys=[f"{self.key_prefix}:{user_id}"], args=[capacity, rate, cost])
+        except self._error as e:
+            logger.warning(f"Rate limit store unavailable, allowing request: {e}")
+            return
+        if not int(allowed):
+            raise RateLimitExceeded(_retry_after(float(tokens), cost, rate))
+
+    def reset(self):
+        for key in self._redis.scan_iter(f"{self.key_prefix}:*"):
+            self._redis.delete(key)
+
+
+def create_request_limiter():
+    """Returns the token-bucket store selected by RATE_LIMIT_BACKEND."""
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisTokenBuckets(settings.REDIS_URL)
+    if settings.RATE_LIMIT_BACKEND != "memory":
+        raise ValueError(f"Unknown rate limit backend: {settings.RATE_LIMIT_BACKEND}")
+    return InMemoryTokenBuckets()
+
+
+def consume_request_budget(user_id: int, role: str, cost: float = 1):
+    """Takes `cost` from the user's bucket. Raises RateLimitExceeded when it is empty."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    try:
+        request_limiter.consume(user_id, role, cost)
+    except RateLimitExceeded:
+        metrics.increment("rate_limit_rejected")
+        raise
+
+
+request_limiter = create_request_limiter()
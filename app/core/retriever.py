@@ -0,0 +1,217 @@
+# /mentormind-backend/app/core/retriever.py
+import logging
+from typing import Dict, List, Tuple
+
+from langchain_core.documents import Document
+from app.config import settings
+from app.services.chroma_service import ChromaService
+from app.services.embedding_service import BatchingEmbedder
+from app.services.vector_index import QuantizedVectorIndex
+
+logger = logging.getLogger(__name__)
+
+
+def grade_adjusted_score(relevance: float, grade: int | None, student_grade: int,
+                         grade_boost: float, grade_distance_penalty: float) -> float:
+    """
+    Boosts hits from the student's own grade and penalizes other grades by
+    their distance from it. Hits without a grade rank behind every grade.
+    """
+    if grade is None:
+        return relevance - grade_distance_penalty * 10
+    distance = abs(int(grade) - student_grade)
+    if distance == 0:
+        return relevance + grade_boost
+    return relevance - grade_distance_penalty * distance
+
+
+def rank_by_grade(
+    docs_and_scores: List[Tuple[Document, float]],
+    student_grade: int,
+    k: int,
+    grade_boost: float,
+    grade_distance_penalty: float,
+) -> List[Tuple[Document, float]]:
+    """
+    Re-ranks over-fetched hits so the student's own grade comes first and
+    remaining slots are filled from the nearest grades.
+
+    Same-grade hits get `grade_boost` added to their relevance; other hits
+    lose `grade_distance_penalty` per grade of distance. The returned tuples
+    keep the original relevance scores.
+    """
+    return sorted(
+        docs_and_scores,
+        key=lambda item: grade_adjusted_score(
+            item[1], item[0].metadata.get("grade"), student_grade, grade_boost, grade_distance_penalty
+        ),
+        reverse=True,
+    )[:k]
+
+
+def reciprocal_rank_fusion(*rankings: List[str], rrf_k: int = 60) -> Dict[str, float]:
+    """
+    Fuses ranked id lists with Reciprocal Rank Fusion: an id scores
+    `sum(1 / (rrf_k + rank))` over the lists it appears in (rank starts at 1).
+    """
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+    return fused
+
+
+class ChromaRetriever:
+    """
+    A long-lived retriever over the ChromaDB grade/subject shards.
+
+    It reuses the client, collections and embedding function already held by
+    ChromaService, so the embedding model is loaded once per process instead
+    of once per question. Chunks that have not been migrated out of the
+    legacy single collection are still searched, with a grade filter.
+    """
+
+    def __init__(self, chroma_service: ChromaService | None = None):
+        self.chroma_service = chroma_service or ChromaService()
+        self.collection = self.chroma_service.get_collection()
+        self.embedding_function = self.chroma_service.get_embedding_function()
+        self.query_embedder: BatchingEmbedder | None = None
+        if settings.EMBEDDING_BATCHING_ENABLED:
+            self.query_embedder = BatchingEmbedder(
+                encode=self.embedding_function,
+                window_ms=settings.EMBEDDING_BATCH_WINDOW_MS,
+                max_batch=settings.EMBEDDING_MAX_BATCH,
+            )
+
+    @property
+    def search_legacy(self) -> bool:
+        """Whether the legacy collection still holds chunks; turns off once they are migrated."""
+        return self.chroma_service.has_legacy_chunks()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embeds a single query with the collection's embedding function."""
+        if self.query_embedder is not None:
+            return self.query_embedder.embed(text)
+        return [float(x) for x in self.embedding_function([text])[0]]
+
+    def close(self):
+        if self.query_embedder is not None:
+            self.query_embedder.close()
+
+    def similarity_search_with_relevance_scores(
+        self, query: str, k: int, filter: dict | None = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Embeds the query and returns the top-k documents with relevance scores.
+        """
+        return self.similarity_search_by_vector_with_relevance_scores(
+            self.embed_query(query), k=k, filter=filter
+        )
+
+    def similarity_search_by_vector_with_relevance_scores(
+        self, embedding: List[float], k: int, filter: dict | None = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Returns the top-k documents for an already computed query embedding.
+        A `{"grade": ..., "subject": ...}` filter routes the query to those shards;
+        without one every shard is searched.
+        """
+        filter = filter or {}
+        return self.search_by_vector(embedding, k, grade=filter.get("grade"), subject=filter.get("subject"))
+
+    def search_by_vector(self, embedding: List[float], k: int, grade: int | None = None,
+                         subject: str | None = None, grade_window: int = 0,
+                         cross_shard: bool = False) -> List[Tuple[Document, float]]:
+        """
+        Returns the top-k documents from the shards of `grade` and of the
+        `grade_window` grades either side of it (and of one subject), in a
+        single pass: one query per matching shard, plus one against the legacy
+        collection while it still holds chunks. Relevance is
+        `1 - cosine distance`, matching LangChain's Chroma wrapper.
+
+        With `cross_shard=True` the query instead goes to the shards of every
+        grade *outside* that window, which is how callers widen a search when
+        the window has too few hits.
+        """
+        grades = None if grade is None else list(range(int(grade) - grade_window, int(grade) + grade_window + 1))
+        if cross_shard:
+            if grades is None:
+                return []  # Without a grade the window already covered every shard
+            shards = [
+                shard for shard in self.chroma_service.get_shards(grades=None, subject=subject)
+                if (shard.metadata or {}).get("grade") not in grades
+            ]
+            legacy_filter = {"grade": {"$nin": grades}}
+        else:
+            shards = self.chroma_service.get_shards(grades=grades, subject=subject)
+            legacy_filter = None if grades is None else {"grade": grades[0]} if len(grades) == 1 else {"grade": {"$in": grades}}
+        if legacy_filter and subject is not None:
+            legacy_filter = {"$and": [legacy_filter, {"subject": subject}]}
+
+        hits: List[Tuple[Document, float]] = []
+        for shard in shards:
+            hits.extend(self._query(shard, embedding, k, where=None))
+        if self.search_legacy:
+            hits.extend(self._query(self.collection, embedding, k, where=legacy_filter))
+        hits.sort(key=lambda item: item[1], reverse=True)
+        # A chunk copied into its shard but not yet deleted from the legacy collection appears twice
+        seen = set()
+        return [hit for hit in hits if not (hit[0].id in seen or seen.add(hit[0].id))][:k]
+
+    @staticmethod
+    def _query(collection, embedding: List[float], k: int, where: dict | None) -> List[Tuple[Document, float]]:
+        results = collection.query(
+            query_embeddings=[embedding],
+            n_results=k,
+            where=where,
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            (Document(id=doc_id, page_content=text, metadata=metadata or {}), 1.0 - distance)
+            for doc_id, text, metadata, distance in zip(
+                results["ids"][0],
+                results["documents"][0],
+                results["metadatas"][0],
+                results["distances"][0],
+            )
+        ]
+
+    def get_documents(self, ids: List[str]) -> Dict[str, Document]:
+        """Fetches chunks by id from every shard, without a vector query."""
+        docs: Dict[str, Document] = {}
+        collections = [*self.chroma_service.get_shards(), self.collection] if ids else []
+        for collection in collections:
+            missing = [doc_id for doc_id in ids if doc_id not in docs]
+            if not missing:
+                break
+            results = collection.get(ids=missing, include=["documents", "metadatas"])
+            docs.update(
+                (doc_id, Document(id=doc_id, page_content=text, metadata=metadata or {}))
+                for doc_id, text, metadata in zip(results["ids"], results["documents"], results["metadatas"])
+            )
+        return docs
+
+
+class QuantizedRetriever(ChromaRetriever):
+    """
+    A ChromaRetriever whose vector queries are answered by the quantized
+    in-memory index instead of Chroma's HNSW index. Query embedding is unchanged.
+    The index is already partitioned by grade; subjects are not told apart.
+    """
+
+    def __init__(self, vector_index: QuantizedVectorIndex, chroma_service: ChromaService | None = None):
+        super().__init__(chroma_service)
+        self.vector_index = vector_index
+
+    def search_by_vector(self, embedding: List[float], k: int, grade: int | None = None,
+                         subject: str | None = None, grade_window: int = 0,
+                         cross_shard: bool = False) -> List[Tuple[Document, float]]:
+        return self.vector_index.search(embedding, k=k, grade=grade, grade_window=grade_window,
+                                        cross_shard=cross_shard)
+
+    def get_documents(self, ids: List[str]) -> Dict[str, Document]:
+        docs = self.vector_index.get_documents(ids)
+        missing = [doc_id for doc_id in ids if doc_id not in docs]
+        if missing:
+            docs.update(super().get_documents(missing))
+        return docs
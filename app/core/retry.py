@@ -0,0 +1,96 @@
+# /mentormind-backend/app/core/retry.py
+import asyncio
+import logging
+import random
+import time
+from typing import AsyncIterator, Callable, Iterator, TypeVar
+
+from langchain_core.exceptions import ModelRateLimitError
+
+from app.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    True for HTTP 429 / quota-exhausted errors from the LLM provider, judged by
+    the error's type and status code, never by numbers in its message.
+    """
+    if isinstance(error, ModelRateLimitError):
+        return True
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    # google.api_core's ResourceExhausted carries the gRPC status; google-genai's APIError its status name
+    grpc_status = getattr(error, "grpc_status_code", None)
+    if grpc_status is not None and getattr(grpc_status, "name", None) == "RESOURCE_EXHAUSTED":
+        return True
+    return getattr(error, "status", None) == "RESOURCE_EXHAUSTED"
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter: uniform in [0, min(max, base * 2**attempt)]."""
+    ceiling = min(settings.LLM_RETRY_MAX_DELAY_S, settings.LLM_RETRY_BASE_DELAY_S * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+def _should_retry(error: Exception, attempt: int) -> bool:
+    if attempt >= settings.LLM_RETRY_ATTEMPTS or not is_rate_limit_error(error):
+        return False
+    metrics.increment("llm_rate_limit_retries")
+    logger.warning(f"LLM rate limited (attempt {attempt + 1}); backing off: {error}")
+    return True
+
+
+def call_with_retry(func: Callable[[], T]) -> T:
+    """Calls `func`, retrying rate-limit errors with backoff."""
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            if not _should_retry(e, attempt):
+                raise
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+
+
+def stream_with_retry(start: Callable[[], Iterator[T]]) -> Iterator[T]:
+    """
+    Yields from the stream returned by `start`. A rate-limit error before the
+    first chunk restarts the stream after a backoff; once chunks have been
+    yielded the error propagates, since a restart would repeat them.
+    """
+    attempt = 0
+    while True:
+        started = False
+        try:
+            for chunk in start():
+                started = True
+                yield chunk
+            return
+        except Exception as e:
+            if started or not _should_retry(e, attempt):
+                raise
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+
+
+async def astream_with_retry(start: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+    """Async variant of stream_with_retry; backs off without blocking the event loop."""
+    attempt = 0
+    while True:
+        started = False
+        try:
+            async for chunk in start():
+                started = True
+                yield chunk
+            return
+        except Exception as e:
+            if started or not _should_retry(e, attempt):
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
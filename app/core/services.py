@@ -0,0 +1,37 @@
+# /mentormind-backend/app/core/services.py
+import logging
+import time
+
+from app.core.rag_manager import RagManager
+from app.services.quiz_service import QuizService
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    The heavy, stateless-per-request services of one worker process.
+
+    Built once in the FastAPI lifespan and kept on `app.state.services`;
+    routes get the services through the `get_rag_manager` and
+    `get_quiz_service` dependencies instead of constructing an LLM client,
+    prompts and parsers on every request.
+    """
+
+    def __init__(self, rag_manager: RagManager | None = None):
+        self.rag_manager = rag_manager or RagManager()
+        self.quiz_service = QuizService(rag_manager=self.rag_manager)
+
+    def warm_up(self):
+        """
+        Loads what the first request would otherwise pay for: the shared
+        retriever and the query embedding model.
+        """
+        started = time.perf_counter()
+        try:
+            RagManager.initialize()
+            self.rag_manager._embed_query("warm-up")
+        except Exception as e:
+            logger.warning(f"Service warm-up failed; the first request will load what is missing: {e}")
+            return
+        logger.info(f"Services warmed up in {(time.perf_counter() - started) * 1000:.0f} ms.")
@@ -0,0 +1,104 @@
+# /mentormind-backend/app/core/single_flight.py
+import asyncio
+import logging
+import re
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(question: str) -> str:
+    """Lower-cases a question, collapses whitespace and drops trailing punctuation."""
+    return re.sub(r"\s+", " ", question).strip().lower().rstrip("?!. ")
+
+
+class _StreamFlight:
+    __slots__ = ("chunks", "done", "error", "subscribers", "task", "changed")
+
+    def __init__(self):
+        self.chunks: list = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self.task: asyncio.Task | None = None
+        self.changed = asyncio.Event()
+
+    def notify(self):
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent work on one event loop.
+
+    `do()` shares one awaitable result between callers with the same key.
+    `stream()` attaches callers with the same key to one upstream async
+    stream: the first caller starts it, every chunk is buffered, and callers
+    that join late first replay the buffered prefix, so each subscriber sees
+    the full sequence. The upstream is cancelled if every subscriber leaves,
+    and a key is forgotten as soon as its work finishes.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self._streams: dict[Hashable, _StreamFlight] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Shielded so one caller going away does not cancel the others' result
+        return await asyncio.shield(future)
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._streams
+
+    async def stream(self, key: Hashable, start: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        flight = self._streams.get(key)
+        if flight is None:
+            flight = self._streams[key] = _StreamFlight()
+            flight.task = asyncio.create_task(self._pump(key, flight, start()))
+        else:
+            logger.info(f"Joined an in-flight stream with {len(flight.chunks)} chunks buffered.")
+        flight.subscribers += 1
+        try:
+            position = 0
+            while True:
+                if position < len(flight.chunks):
+                    position += 1
+                    yield flight.chunks[position - 1]
+                elif flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                else:
+                    await flight.changed.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # Forgotten right away, so a caller arriving while it winds down starts a fresh flight
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    async def _pump(self, key: Hashable, flight: _StreamFlight, upstream: AsyncIterator[Any]):
+        try:
+            async for chunk in upstream:
+                flight.chunks.append(chunk)
+                flight.notify()
+        except asyncio.CancelledError:
+            self._forget(key, flight)
+            flight.error = ConnectionAbortedError("Upstream stream was cancelled.")
+            await upstream.aclose()
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            self._forget(key, flight)
+            flight.notify()
+
+    def _forget(self, key: Hashable, flight: _StreamFlight):
+        if self._streams.get(key) is flight:
+            del self._streams[key]
@@ -1,9 +1,18 @@
+import contextvars
 import json
-from peewee import Model, TextField
-from playhouse.db_url import connect
+import logging
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from peewee import Model, TextField, _ConnectionState
+from playhouse.db_url import connect, parse
+from playhouse.pool import MaxConnectionsExceeded, PooledDatabase, PooledPostgresqlDatabase, PooledSqliteDatabase
 from app.config import settings
+from app.core.metrics import metrics
 from peewee_migrate import Router
 
+logger = logging.getLogger(__name__)
+
 
 class JSONField(TextField):
     def db_value(self, value):
@@ -12,8 +21,154 @@ class JSONField(TextField):
     def python_value(self, value):
         if value is not None:
             return json.loads(value)
-        
-database = connect(settings.DATABASE_URL)
+
+
+# --- Connection state ---
+
+_connection_state: contextvars.ContextVar[dict] = contextvars.ContextVar("peewee_connection_state")
+
+
+def _new_state() -> dict:
+    return {"closed": True, "conn": None, "ctx": [], "transactions": [], "commit_callbacks": []}
+
+
+class ContextConnectionState(_ConnectionState):
+    """
+    Peewee's connection state (open connection, transaction stack) kept in a
+    ContextVar instead of a thread-local.
+
+    `connection_scope()` gives a request its own state. Everything the request
+    runs (async code, and sync code on threadpool threads, which copy the
+    context) shares it and so uses one connection. A context without a scope,
+    such as a background thread, gets its own state on first use, so state
+    is never shared by accident.
+    """
+
+    def __init__(self):
+        pass  # State is created per context on first use, not here in the importing context
+
+    def _current(self) -> dict:
+        try:
+            return _connection_state.get()
+        except LookupError:
+            state = _new_state()
+            _connection_state.set(state)
+            return state
+
+    def __getattr__(self, name):
+        try:
+            return self._current()[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        self._current()[name] = value
+
+
+class _PoolMetricsMixin:
+    """Records how long checking a connection out of the pool takes, and how often it times out."""
+
+    def connect(self, reuse_if_open=False):
+        if reuse_if_open and not self.is_closed():
+            return False
+        try:
+            with metrics.timer("db_pool_checkout_ms"):
+                return super().connect(reuse_if_open)
+        except MaxConnectionsExceeded:
+            metrics.increment("db_pool_timeouts")
+            raise
+
+
+class InstrumentedPooledPostgresqlDatabase(_PoolMetricsMixin, PooledPostgresqlDatabase):
+    pass
+
+
+class InstrumentedPooledSqliteDatabase(_PoolMetricsMixin, PooledSqliteDatabase):
+    pass
+
+
+POOLED_DATABASES = {
+    "postgres": InstrumentedPooledPostgresqlDatabase,
+    "postgresql": InstrumentedPooledPostgresqlDatabase,
+    "sqlite": InstrumentedPooledSqliteDatabase,
+}
+
+
+def create_database(url: str, pooled: bool = settings.DB_POOL_ENABLED):
+    """The database for a DATABASE_URL, pooled when the scheme supports it, with context-local state."""
+    scheme = urlparse(url).scheme
+    # A request's connection moves between the event loop and threadpool threads, one at a time
+    thread_kwargs = {"check_same_thread": False} if scheme.startswith("sqlite") else {}
+    pooled_class = POOLED_DATABASES.get(scheme) if pooled else None
+    if pooled_class is None:
+        db = connect(url, **thread_kwargs)
+    else:
+        connect_kwargs = {**thread_kwargs, **parse(url)}
+        db = pooled_class(
+            connect_kwargs.pop("database"),
+            max_connections=settings.DB_POOL_MAX_CONNECTIONS,
+            stale_timeout=settings.DB_POOL_STALE_TIMEOUT_S,
+            timeout=settings.DB_POOL_TIMEOUT_S,
+            **connect_kwargs,
+        )
+    db._state = ContextConnectionState()
+    return db
+
+
+@contextmanager
+def connection_scope(db=None):
+    """
+    Gives the enclosed code its own connection state and, on exit, returns the
+    connection it opened (if any) to the pool.
+    """
+    db = db or database
+    token = _connection_state.set(_new_state())
+    try:
+        yield
+    finally:
+        try:
+            db.close()
+        except Exception as e:
+            logger.error(f"Could not release a database connection: {e}")
+        finally:
+            _connection_state.reset(token)
+
+
+def release_connection(db=None):
+    """
+    Returns this context's connection to the pool ahead of slow work that needs
+    no database, such as streaming an LLM answer. The next query checks one
+    out again.
+    """
+    db = db or database
+    if not db.is_closed() and not db.in_transaction():
+        db.close()
+
+
+def close_database(db=None):
+    """Closes every pooled connection, or this context's connection when not pooled."""
+    db = db or database
+    if isinstance(db, PooledDatabase):
+        db.close_all()
+    elif not db.is_closed():
+        db.close()
+
+
+def pool_stats(db=None) -> dict:
+    """Connections checked out and idle in the pool."""
+    db = db or database
+    if not isinstance(db, PooledDatabase):
+        return {"pooled": False, "open_in_this_context": not db.is_closed()}
+    with db._pool_lock:
+        return {
+            "pooled": True,
+            "in_use": len(db._in_use),
+            "idle": len(db._connections),
+            "max_connections": db._max_connections,
+        }
+
+
+database = create_database(settings.DATABASE_URL)
 print(f"Connected to a {database.__class__.__name__} database.")
 router = Router(
     database,
@@ -22,8 +177,6 @@ router = Router(
 )
 # router.run() # Commented out to prevent circular import during app startup
 
-database.connect(reuse_if_open=True)
-
 class BaseModel(Model):
     class Meta:
-        database = database
\ No newline at end of file
+        database = database
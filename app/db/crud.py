@@ -1,5 +1,7 @@
 # /mentormind-backend/app/db/crud.py
-from .models import User, UserRole, ParentStudentMap, IngestionJob, IngestionStatus, StudentProfile, StudentQuizAttempt, Conversation, Message
+from app.core.metrics import metrics
+from .models import User, UserRole, ParentStudentMap, IngestionJob, IngestionStatus, StudentProfile, StudentQuizAttempt, Conversation, Message, message_snippet
+from .message_log import message_log
 from peewee import fn, DoesNotExist
 
 def get_user_by_email(email: str) -> User | None:
@@ -51,6 +53,24 @@ def get_conversations_by_student(student_id: int) -> list[Conversation]:
     """Retrieves all conversations for a specific student, ordered by updated_at descending."""
     return list(Conversation.select().where(Conversation.student == student_id).order_by(Conversation.updated_at.desc()))
 
+def get_conversations_page(student_id: int, limit: int, before: tuple | None = None) -> tuple[list[Conversation], bool]:
+    """
+    One page of a student's conversations, most recently updated first, in a
+    single query. `before` is the (updated_at, id) of the previous page's
+    last conversation. Returns the page and whether more follow. Does not
+    flush the message log, so `updated_at` and the last-message fields may
+    trail the newest messages by up to MESSAGE_LOG_FLUSH_INTERVAL_MS.
+    """
+    query = Conversation.select().where(Conversation.student == student_id)
+    if before is not None:
+        updated_at, conversation_id = before
+        query = query.where(
+            (Conversation.updated_at < updated_at) |
+            ((Conversation.updated_at == updated_at) & (Conversation.id < conversation_id))
+        )
+    rows = list(query.order_by(Conversation.updated_at.desc(), Conversation.id.desc()).limit(limit + 1))
+    return rows[:limit], len(rows) > limit
+
 def get_conversation_by_id(conversation_id: int) -> Conversation | None:
     """Retrieves a single conversation by its ID."""
     try:
@@ -59,19 +79,91 @@ def get_conversation_by_id(conversation_id: int) -> Conversation | None:
         return None
 
 def create_message(conversation_id: int, sender: str, content: str) -> Message:
-    """Adds a new message to a conversation and updates the conversation's updated_at timestamp."""
-    import datetime
-    message = Message.create(conversation=conversation_id, sender=sender, content=content)
-    conversation = Conversation.get_by_id(conversation_id)
-    if conversation:
-        conversation.updated_at = datetime.datetime.now()
-        conversation.save()
+    """Adds a new message to a conversation and updates the conversation's last-message fields."""
+    with metrics.timer("db_write_ms"):
+        with Message._meta.database.atomic():
+            message = Message.create(conversation=conversation_id, sender=sender, content=content)
+            (Conversation
+             .update(updated_at=message.created_at,
+                     last_message_snippet=message_snippet(content),
+                     last_message_sender=sender,
+                     message_count=Conversation.message_count + 1)
+             .where(Conversation.id == conversation_id)
+             .execute())
     return message
 
+def log_message(conversation_id: int, sender: str, content: str):
+    """
+    Queues a message for write-behind persistence (see app.db.message_log).
+    Falls back to create_message when the message log is disabled.
+    """
+    if not message_log.running():
+        create_message(conversation_id, sender, content)
+        return
+    with metrics.timer("db_write_ms"):
+        message_log.append(conversation_id, sender, content)
+
 def get_messages_by_conversation(conversation_id: int) -> list[Message]:
     """Retrieves all messages for a specific conversation, ordered by created_at ascending."""
+    if message_log.has_pending(conversation_id):
+        message_log.flush(conversation_id, timeout=5)  # Read your own writes
     return list(Message.select().where(Message.conversation == conversation_id).order_by(Message.created_at.asc()))
 
+def get_messages_page(conversation_id: int, limit: int, before: tuple | None = None,
+                      after: tuple | None = None) -> tuple[list[Message], bool]:
+    """
+    One page of a conversation's messages, oldest first. `before` / `after`
+    are the (created_at, id) of a message; the page holds the messages right
+    before or after it, and without either, the newest messages. Returns the
+    page and whether more follow in the direction read.
+    """
+    if message_log.has_pending(conversation_id):
+        message_log.flush(conversation_id, timeout=5)  # Read your own writes
+    query = Message.select().where(Message.conversation == conversation_id)
+    if after is not None:
+        created_at, message_id = after
+        query = query.where(
+            (Message.created_at > created_at) |
+            ((Message.created_at == created_at) & (Message.id > message_id))
+        ).order_by(Message.created_at.asc(), Message.id.asc())
+    else:
+        if before is not None:
+            created_at, message_id = before
+            query = query.where(
+                (Message.created_at < created_at) |
+                ((Message.created_at == created_at) & (Message.id < message_id))
+            )
+        query = query.order_by(Message.created_at.desc(), Message.id.desc())
+    rows = list(query.limit(limit + 1))
+    page = rows[:limit]
+    if after is None:
+        page.reverse()
+    return page, len(rows) > limit
+
+def iter_message_chunks(conversation_id: int, chunk_size: int):
+    """
+    Yields a conversation's messages, oldest first, as lists of at most
+    `chunk_size` row dicts. Each chunk is its own keyset query, so no
+    connection or cursor is held between chunks.
+    """
+    if message_log.has_pending(conversation_id):
+        message_log.flush(conversation_id, timeout=5)  # Read your own writes
+    query = (Message
+             .select(Message.id, Message.conversation, Message.sender, Message.content, Message.created_at)
+             .where(Message.conversation == conversation_id)
+             .order_by(Message.created_at.asc(), Message.id.asc())
+             .limit(chunk_size))
+    chunk = list(query.dicts().iterator())
+    while chunk:
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1]
+        chunk = list(query.where(
+            (Message.created_at > last["created_at"]) |
+            ((Message.created_at == last["created_at"]) & (Message.id > last["id"]))
+        ).dicts().iterator())
+
 # --- Ingestion Job CRUD ---
 
 def create_ingestion_job(**kwargs) -> IngestionJob:
@@ -141,20 +233,65 @@ def get_student_report_data(student_id: int) -> dict | None:
 
 # --- Quiz Attempt CRUD ---
 
-def create_quiz_attempt(student_id: int, topic: str, grade: int, questions: list, answers: dict, score: float) -> StudentQuizAttempt:
-    """Creates a new quiz attempt record for a student."""
+def create_quiz_attempt(student_id: int, quiz_id: int, topic: str, grade: int, answers: dict, score: float) -> StudentQuizAttempt:
+    """Creates a new quiz attempt record for a student. The questions live in the referenced Quiz."""
     import json
     
     attempt = StudentQuizAttempt.create(
         student=student_id,
+        quiz=quiz_id,
         topic=topic,
         grade=grade,
-        questions=json.dumps(questions),
         answers=json.dumps(answers),
         score=score
     )
     return attempt
 
+def create_quiz_attempts(student_id: int, attempts: list[dict]) -> tuple[dict[str, StudentQuizAttempt], set[str]]:
+    """
+    Stores a batch of graded attempts with one insert in one transaction.
+    Each attempt dict has idempotency_key, quiz_id, topic, grade, answers,
+    score and attempted_at. Keys the student has already used are not
+    inserted again. Returns the stored attempt for every key and the keys
+    that were new.
+    """
+    import json
+
+    keys = [attempt["idempotency_key"] for attempt in attempts]
+    stored_query = (StudentQuizAttempt
+                    .select()
+                    .where((StudentQuizAttempt.student == student_id) &
+                           (StudentQuizAttempt.idempotency_key.in_(keys))))
+    with StudentQuizAttempt._meta.database.atomic():
+        existing = {attempt.idempotency_key for attempt in stored_query.clone()}
+        rows = [
+            {
+                "student": student_id,
+                "quiz": attempt["quiz_id"],
+                "topic": attempt["topic"],
+                "grade": attempt["grade"],
+                "answers": json.dumps(attempt["answers"]),
+                "score": attempt["score"],
+                "attempted_at": attempt["attempted_at"],
+                "idempotency_key": attempt["idempotency_key"],
+            }
+            for attempt in attempts
+            if attempt["idempotency_key"] not in existing
+        ]
+        if rows:
+            # A concurrent replay of the same batch may have won the race; its rows are kept
+            StudentQuizAttempt.insert_many(rows).on_conflict_ignore().execute()
+        stored = {attempt.idempotency_key: attempt for attempt in stored_query.clone()}
+    return stored, set(keys) - existing
+
+def get_quiz_attempts_by_keys(student_id: int, keys) -> dict[str, StudentQuizAttempt]:
+    """The student's stored attempts for the given idempotency keys, by key."""
+    query = (StudentQuizAttempt
+             .select()
+             .where((StudentQuizAttempt.student == student_id) &
+                    (StudentQuizAttempt.idempotency_key.in_(list(keys)))))
+    return {attempt.idempotency_key: attempt for attempt in query}
+
 # --- Parent CRUD ---
 
 def get_linked_students(parent_id: int) -> list[User]:
@@ -0,0 +1,224 @@
+# /mentormind-backend/app/db/message_log.py
+import datetime
+import logging
+import queue
+import threading
+import time
+from collections import Counter, deque
+from typing import NamedTuple
+
+from peewee import Case
+
+from app.config import settings
+from app.core.metrics import metrics
+from .models import Conversation, Message, message_snippet
+
+logger = logging.getLogger(__name__)
+
+_FLUSH = object()  # Queue marker: write what has been collected now
+_STOP = object()  # Queue marker: write everything before it, then exit
+
+
+class PendingMessage(NamedTuple):
+    seq: int
+    conversation_id: int
+    sender: str
+    content: str
+    created_at: datetime.datetime
+
+
+class MessageLog:
+    """
+    Write-behind persistence for chat messages.
+
+    `append()` only puts the message on a bounded in-process queue. A single
+    writer thread turns what has queued up into one transaction: an
+    `insert_many` of the messages and one UPDATE that points every touched
+    conversation's `updated_at` and last-message fields at its newest message
+    and adds to its `message_count`. A batch is written once it holds
+    `batch_size` messages or `flush_interval_s` after its first message
+    arrived. `stop()` drains the queue before returning.
+
+    When the queue is full or the writer is not running, the caller writes
+    the message itself, so messages are never dropped.
+
+    Every message gets a sequence number. `flush()` waits only for messages
+    appended before it was called, so steady traffic cannot hold it up.
+    """
+
+    def __init__(self, max_queue: int, batch_size: int, flush_interval_s: float):
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._seq = 0  # Sequence number of the last appended message
+        self._pending: dict[int, deque] = {}  # conversation id -> sequence numbers not yet written
+        self._lock = threading.Lock()
+        self._written = threading.Condition(self._lock)
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="message-log", daemon=True)
+            self._thread.start()
+
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def append(self, conversation_id: int, sender: str, content: str) -> datetime.datetime:
+        """Queues a message and returns its timestamp."""
+        with self._lock:
+            self._seq += 1
+            message = PendingMessage(self._seq, conversation_id, sender, content, datetime.datetime.now())
+        if self.running():
+            with self._lock:
+                self._pending.setdefault(conversation_id, deque()).append(message.seq)
+            try:
+                self._queue.put_nowait(message)
+                return message.created_at
+            except queue.Full:
+                with self._written:
+                    self._decrement([message])
+                    self._written.notify_all()
+                metrics.increment("message_log_overflow")
+        self._write([message])
+        return message.created_at
+
+    def has_pending(self, conversation_id: int | None = None) -> bool:
+        with self._lock:
+            return conversation_id in self._pending if conversation_id is not None else bool(self._pending)
+
+    def flush(self, conversation_id: int | None = None, timeout: float | None = None) -> bool:
+        """
+        Writes what is queued now and waits until the messages appended so far
+        (of one conversation, or of all) are stored. Returns False on timeout.
+        """
+        if not self.running():
+            return not self.has_pending(conversation_id)
+        with self._lock:
+            watermark = self._seq
+        try:
+            self._queue.put(_FLUSH, timeout=timeout)
+        except queue.Full:
+            return False
+        with self._written:
+            return self._written.wait_for(lambda: self._oldest_pending(conversation_id) > watermark, timeout=timeout)
+
+    def stop(self, timeout: float = 30):
+        """Drains the queue into the database and stops the writer thread."""
+        if not self.running():
+            return
+        self._queue.put(_STOP, timeout=timeout)
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            unsaved = sum(len(seqs) for seqs in self._pending.values())
+            logger.error(f"Message log did not drain within {timeout} s; {unsaved} messages unsaved.")
+        else:
+            logger.info("Message log drained.")
+
+    def _run(self):
+        database = Message._meta.database
+        stopping = False
+        try:
+            while not stopping:
+                batch, stopping = self._collect()
+                try:
+                    if batch:
+                        self._write(batch)
+                finally:
+                    with self._written:
+                        self._decrement(batch)
+                        self._written.notify_all()
+        finally:
+            if not database.is_closed():
+                database.close()
+
+    def _collect(self) -> tuple[list[PendingMessage], bool]:
+        """Gathers one batch: until it is full, its time is up, or a flush/stop marker arrives."""
+        item = self._queue.get()
+        deadline = time.monotonic() + self.flush_interval_s
+        batch = []
+        while True:
+            if item is _STOP:
+                return batch, True
+            if item is _FLUSH:
+                return batch, False
+            batch.append(item)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.batch_size or remaining <= 0:
+                return batch, False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, False
+
+    def _write(self, batch: list[PendingMessage]):
+        """Writes a batch in one transaction, or row by row if that fails, so one bad row costs only itself."""
+        with metrics.timer("message_flush_ms"):
+            Message._meta.database.connect(reuse_if_open=True)
+            try:
+                self._insert(batch)
+            except Exception as e:
+                logger.warning(f"Batched message write failed, writing {len(batch)} messages one by one: {e}")
+                for message in batch:
+                    try:
+                        self._insert([message])
+                    except Exception:
+                        logger.exception(f"Dropping a message for conversation {message.conversation_id}.")
+        metrics.observe("message_flush_rows", len(batch))
+
+    @staticmethod
+    def _insert(batch: list[PendingMessage]):
+        latest: dict[int, PendingMessage] = {}
+        counts: Counter = Counter()
+        for message in batch:
+            counts[message.conversation_id] += 1
+            newest = latest.get(message.conversation_id)
+            if newest is None or message.created_at >= newest.created_at:
+                latest[message.conversation_id] = message
+        with Message._meta.database.atomic():
+            Message.insert_many([
+                {
+                    Message.conversation: message.conversation_id,
+                    Message.sender: message.sender,
+                    Message.content: message.content,
+                    Message.created_at: message.created_at,
+                }
+                for message in batch
+            ]).execute()
+            newest = list(latest.items())
+            (Conversation
+             .update(
+                 updated_at=Case(Conversation.id, [(cid, m.created_at) for cid, m in newest]),
+                 last_message_snippet=Case(Conversation.id, [(cid, message_snippet(m.content)) for cid, m in newest]),
+                 last_message_sender=Case(Conversation.id, [(cid, m.sender) for cid, m in newest]),
+                 message_count=Conversation.message_count + Case(Conversation.id, list(counts.items())),
+             )
+             .where(Conversation.id.in_(list(latest)))
+             .execute())
+
+    def _oldest_pending(self, conversation_id: int | None) -> float:
+        """Sequence number of the oldest unwritten message, or infinity. Caller holds the lock."""
+        if conversation_id is not None:
+            seqs = self._pending.get(conversation_id)
+            return seqs[0] if seqs else float("inf")
+        return min((seqs[0] for seqs in self._pending.values()), default=float("inf"))
+
+    def _decrement(self, batch: list[PendingMessage]):
+        """Caller holds the lock."""
+        for message in batch:
+            seqs = self._pending[message.conversation_id]
+            if seqs[0] == message.seq:
+                seqs.popleft()
+            else:
+                seqs.remove(message.seq)  # Written out of order, after overflowing the queue
+            if not seqs:
+                del self._pending[message.conversation_id]
+
+
+message_log = MessageLog(
+    max_queue=settings.MESSAGE_LOG_MAX_QUEUE,
+    batch_size=settings.MESSAGE_LOG_BATCH_SIZE,
+    flush_interval_s=settings.MESSAGE_LOG_FLUSH_INTERVAL_MS / 1000,
+)
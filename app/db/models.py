@@ -5,7 +5,7 @@ from peewee import (
     IntegerField, FloatField, AutoField
 )
 from enum import Enum
-from app.db.base import BaseModel
+from app.db.base import BaseModel, JSONField
 
 class UserRole(str, Enum):
     student = "student"
@@ -51,18 +51,28 @@ class Lesson(BaseModel):
 
 class Quiz(BaseModel):
     id = AutoField()
-    lesson = ForeignKeyField(Lesson, backref='quizzes')
-    questions = TextField() # Storing questions as JSON string
+    content_hash = CharField(unique=True) # See app.services.quiz_store.quiz_hash; a question set is stored once
+    topic = CharField(null=True)
+    grade = IntegerField(null=True)
+    lesson = ForeignKeyField(Lesson, backref='quizzes', null=True)
+    questions = JSONField() # Questions with their options and correct_answer
+    created_at = DateTimeField(default=datetime.datetime.now)
     
 class StudentQuizAttempt(BaseModel):
     id = AutoField()
     student = ForeignKeyField(User, backref='quiz_attempts')
+    quiz = ForeignKeyField(Quiz, backref='attempts', null=True) # Null only for attempts whose questions were lost
     topic = CharField()
     grade = IntegerField()
-    questions = TextField()  # JSON of questions, options, and correct_answer
     answers = TextField()    # JSON of the student's answers
     score = FloatField()
     attempted_at = DateTimeField(default=datetime.datetime.now)
+    idempotency_key = CharField(null=True) # Client-chosen for synced attempts, so a replay is stored once
+
+    class Meta:
+        indexes = (
+            (('student', 'idempotency_key'), True),
+        )
 
 class WeakTopic(BaseModel):
     student = ForeignKeyField(User, backref='weak_topics')
@@ -79,11 +89,26 @@ class IngestionJob(BaseModel):
     created_at = DateTimeField(default=datetime.datetime.now)
     updated_at = DateTimeField(default=datetime.datetime.now)
 
+SNIPPET_LENGTH = 100
+
+def message_snippet(content: str) -> str:
+    """The start of a message, as kept on its conversation for listings."""
+    return content[:SNIPPET_LENGTH]
+
 class Conversation(BaseModel):
     id = AutoField()
     student = ForeignKeyField(User, backref='conversations')
     created_at = DateTimeField(default=datetime.datetime.now)
     updated_at = DateTimeField(default=datetime.datetime.now)
+    # Maintained on every message write, so listings never read messages
+    last_message_snippet = CharField(null=True)
+    last_message_sender = CharField(null=True)
+    message_count = IntegerField(default=0)
+
+    class Meta:
+        indexes = (
+            (('student', 'updated_at', 'id'), False), # Keyset pagination of a student's conversations
+        )
 
 class Message(BaseModel):
     id = AutoField()
@@ -92,6 +117,28 @@ class Message(BaseModel):
     content = TextField()
     created_at = DateTimeField(default=datetime.datetime.now)
 
+    class Meta:
+        indexes = (
+            (('conversation', 'created_at', 'id'), False), # Keyset pagination of a conversation's messages
+        )
+
+class QuizBankQuestion(BaseModel):
+    id = AutoField()
+    topic = CharField() # Normalized topic, see app.services.quiz_bank.normalize_topic
+    grade = IntegerField()
+    question_text = TextField()
+    options = JSONField()
+    correct_answer = CharField()
+    fingerprint = CharField() # Hash of the normalized question text
+    times_served = IntegerField(default=0)
+    created_at = DateTimeField(default=datetime.datetime.now)
+
+    class Meta:
+        indexes = (
+            (('topic', 'grade', 'fingerprint'), True), # The same question is stored once per topic and grade
+            (('topic', 'grade', 'times_served'), False),
+        )
+
 class Badge(BaseModel):
     id = AutoField()
     student = ForeignKeyField(User, backref='badges')
@@ -1,19 +1,26 @@
 # /mentormind-backend/app/main.py
+import asyncio
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, status
+from fastapi import Depends, FastAPI, Request, status
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from peewee import PeeweeException
 from peewee_migrate import Router
 
 from app.api import auth, users, parents, students, rag, ingest, quiz
-from app.db.base import database
+from app.api.pagination import NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER
+from app.db.base import close_database, connection_scope, database, pool_stats
 from app.db.models import (
     User, StudentProfile, ParentStudentMap, Lesson, Quiz,
     StudentQuizAttempt, WeakTopic, IngestionJob, Badge, 
 )
 from app.services.chroma_service import ChromaService
+from app.core.rag_manager import RagManager
+from app.core.metrics import metrics, monitor_event_loop_lag
+from app.core.services import ServiceContainer
+from app.core.dependencies import get_current_admin_user
+from app.db.message_log import message_log
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 
@@ -37,12 +44,16 @@ async def lifespan(app: FastAPI):
     try:
 
         # Run migrations
-        router = Router(database, migrate_dir=settings.MIGRATIONS_DIR)
-        router.run()
+        with connection_scope():
+            router = Router(database, migrate_dir=settings.MIGRATIONS_DIR)
+            router.run()
         print("Database migrations applied.")
         # Initialize ChromaDB service
         ChromaService.initialize()
         print("ChromaDB service initialized.")
+        # Build the shared retriever once so requests never pay for it
+        RagManager.initialize()
+        print("RAG retriever initialized.")
 
     except PeeweeException as e:
         print(f"Database connection failed: {e}")
@@ -50,13 +61,27 @@ async def lifespan(app: FastAPI):
         # For now, we log the error and continue, but some operations will fail.
     except Exception as e:
         print(f"An error occurred during startup: {e}")
+
+    # Heavy services are built once per worker and shared by every request
+    app.state.services = ServiceContainer()
+    await asyncio.to_thread(app.state.services.warm_up)
+    print("Services built and warmed up.")
+    if settings.MESSAGE_LOG_ENABLED:
+        message_log.start()
+    lag_monitor = None
+    if settings.EVENT_LOOP_MONITOR_INTERVAL_MS > 0:
+        lag_monitor = asyncio.create_task(monitor_event_loop_lag(metrics, settings.EVENT_LOOP_MONITOR_INTERVAL_MS))
     yield
 
     # Shutdown logic
     logger.info("Application shutdown...")
-    if not database.is_closed():
-        database.close()
-        logger.info("Database connection closed.")
+    if lag_monitor is not None:
+        lag_monitor.cancel()
+    RagManager.shutdown()
+    # Write every queued chat message before the process exits
+    await asyncio.to_thread(message_log.stop)
+    close_database()
+    logger.info("Database connections closed.")
 
 # Initialize FastAPI app with the lifespan context manager
 app = FastAPI(
@@ -72,24 +97,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # allows all HTTP methods
     allow_headers=["*"],  # allows all headers
+    expose_headers=[NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER],  # lets the frontend read pagination cursors
 )
 
 # --- Middleware to manage database connection state ---
-@app.middleware("http")
-async def db_session_middleware(request: Request, call_next):
-    try:
-        database.connect(reuse_if_open=True)
-        response = await call_next(request)
-    except Exception as e:
-        logger.exception("Database middleware error: %s", e)
-        raise
-    finally:
-        if not database.is_closed():
-            try:
-                database.close()
-            except Exception as e:
-                logger.warning("Error closing database: %s", e)
-    return response
+class DatabaseConnectionMiddleware:
+    """
+    Gives every HTTP request its own connection state. The request checks a
+    pooled connection out on its first query and returns it once the response,
+    including a streamed body, has been sent.
+    """
+
+    def __init__(self, app, db=None):
+        self.app = app
+        self.db = db
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        with connection_scope(self.db):
+            await self.app(scope, receive, send)
+
+app.add_middleware(DatabaseConnectionMiddleware)
 
 
 # --- Exception Handlers ---
@@ -117,6 +146,14 @@ async def root():
     """
     return {"status": "ok", "message": "Welcome to MentorMind Backend"}
 
+@app.get("/api/metrics", tags=["Monitoring"])
+def get_metrics(current_user=Depends(get_current_admin_user)):
+    """
+    In-process latency and counter metrics, plus database pool usage.
+    """
+    return {**metrics.snapshot(), "db_pool": pool_stats()}
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
+
@@ -0,0 +1,287 @@
+# /mentormind-backend/app/services/answer_cache.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CachedAnswer:
+    """
+    A single cached tutor answer together with the chunks it was built from.
+    """
+    __slots__ = ("key", "grade", "embedding", "answer", "sources", "chunk_ids", "created_at", "size_bytes")
+
+    def __init__(self, key: int, grade: int, embedding: np.ndarray, answer: str,
+                 sources: list[dict], chunk_ids: Iterable[str]):
+        self.key = key
+        self.grade = grade
+        self.embedding = embedding
+        self.answer = answer
+        self.sources = sources
+        self.chunk_ids = frozenset(chunk_ids)
+        self.created_at = time.monotonic()
+        self.size_bytes = (
+            embedding.nbytes
+            + len(answer.encode("utf-8"))
+            + sum(len(str(source.get("content", "")).encode("utf-8")) for source in sources)
+        )
+
+
+class LocalGeneration:
+    """
+    The cache generation held in this process. Bumping it invalidates only
+    this worker's cache, which is enough for a single worker.
+    """
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def value(self) -> int | None:
+        return self._value
+
+    def bump(self):
+        with self._lock:
+            self._value += 1
+
+
+class RedisGeneration:
+    """
+    The cache generation stored in Redis, so an ingestion in any worker
+    invalidates the caches of all of them.
+    Reads are reused for `refresh_s` to keep Redis off the per-question path.
+    While Redis cannot be reached the generation is unknown and the cache is
+    bypassed rather than risk serving an answer that may be stale.
+    """
+
+    def __init__(self, url: str, refresh_s: float, key: str = "mentormind:answer_cache:generation"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.refresh_s = refresh_s
+        self.key = key
+        self._error = redis.RedisError
+        self._value: int | None = None
+        self._read_at = float("-inf")
+
+    def value(self) -> int | None:
+        now = time.monotonic()
+        if now - self._read_at >= self.refresh_s:
+            try:
+                self._value = int(self._redis.get(self.key) or 0)
+            except self._error as e:
+                logger.warning(f"Answer cache generation unavailable, bypassing the cache: {e}")
+                self._value = None
+            self._read_at = now
+        return self._value
+
+    def bump(self):
+        try:
+            self._value = int(self._redis.incr(self.key))
+            self._read_at = time.monotonic()
+        except self._error as e:
+            # Other workers keep their entries until the TTL; this one is cleared by the caller
+            logger.warning(f"Could not bump the answer cache generation: {e}")
+
+
+def create_cache_generation():
+    """Returns the generation counter selected by SEMANTIC_CACHE_INVALIDATION."""
+    if settings.SEMANTIC_CACHE_INVALIDATION == "redis":
+        return RedisGeneration(settings.REDIS_URL, settings.SEMANTIC_CACHE_GENERATION_REFRESH_S)
+    if settings.SEMANTIC_CACHE_INVALIDATION != "memory":
+        raise ValueError(f"Unknown answer cache invalidation: {settings.SEMANTIC_CACHE_INVALIDATION}")
+    return LocalGeneration()
+
+
+class SemanticAnswerCache:
+    """
+    An in-memory, grade-aware semantic cache for RAG answers.
+
+    Entries are looked up by cosine similarity between question embeddings and
+    only within the asking student's grade. Eviction is LRU, bounded by both an
+    entry count and a total byte size, and entries expire after a TTL.
+
+    Entries belong to a generation of the indexed material. A worker that
+    sees the shared generation change drops all of its entries, and an answer
+    retrieved under an older generation is not stored.
+    """
+
+    def __init__(self, similarity_threshold: float, ttl_seconds: float,
+                 max_entries: int, max_bytes: int, generation=None):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._grade_keys: dict[int, set[int]] = {}
+        self._grade_matrix: dict[int, tuple[list[int], np.ndarray]] = {}  # Lazily stacked embeddings
+        self._generation = generation or LocalGeneration()
+        self._seen_generation: int | None = None
+        self._next_key = 0
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def current_generation(self) -> int | None:
+        """The generation to pass to store() for an answer retrieved from now on."""
+        return self._generation.value()
+
+    def lookup(self, grade: int, embedding) -> CachedAnswer | None:
+        """
+        Returns the most similar live entry for the grade if it clears the
+        similarity threshold, otherwise None.
+        """
+        query = self._normalize(embedding)
+        generation = self._generation.value()
+        with self._lock:
+            if not self._sync_generation(generation):
+                self.misses += 1
+                return None
+            self._expire()
+            keys, matrix = self._matrix_for_grade(grade)
+            if not keys:
+                self.misses += 1
+                return None
+            similarities = matrix @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                self.misses += 1
+                return None
+            entry = self._entries[keys[best]]
+            self._entries.move_to_end(entry.key)
+            self.hits += 1
+            return entry
+
+    def store(self, grade: int, embedding, answer: str, sources: list[dict],
+              chunk_ids: Iterable[str], generation: int | None = None) -> CachedAnswer | None:
+        """
+        Caches an answer for a grade. Entries larger than the byte cap are skipped,
+        as are answers retrieved under a generation that is no longer current.
+        """
+        current = self._generation.value()
+        if generation is None:
+            generation = current
+        with self._lock:
+            if not self._sync_generation(current) or generation != current:
+                return None
+            entry = CachedAnswer(self._next_key, grade, self._normalize(embedding), answer, sources, chunk_ids)
+            if entry.size_bytes > self.max_bytes:
+                return None
+            self._next_key += 1
+            self._entries[entry.key] = entry
+            self._grade_keys.setdefault(grade, set()).add(entry.key)
+            self._grade_matrix.pop(grade, None)
+            self._total_bytes += entry.size_bytes
+            while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+            return entry
+
+    def invalidate_chunks(self, chunk_ids: Iterable[str]) -> int:
+        """Drops every entry that was answered from any of the given chunks."""
+        changed = set(chunk_ids)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if not entry.chunk_ids.isdisjoint(changed)]
+            for key in stale:
+                self._remove(key)
+        return len(stale)
+
+    def invalidate_grade(self, grade: int) -> int:
+        """Drops every entry cached for a grade."""
+        with self._lock:
+            stale = list(self._grade_keys.get(grade, ()))
+            for key in stale:
+                self._remove(key)
+        return len(stale)
+
+    def invalidate_all(self) -> int:
+        """
+        Drops every entry in every worker sharing the generation, e.g. after
+        an ingestion. Returns the number of entries dropped here.
+        """
+        self._generation.bump()
+        with self._lock:
+            dropped = len(self._entries)
+            self._clear()
+        return dropped
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    # --- Internal helpers; callers must hold the lock ---
+
+    def _clear(self):
+        self._entries.clear()
+        self._grade_keys.clear()
+        self._grade_matrix.clear()
+        self._total_bytes = 0
+
+    def _sync_generation(self, generation: int | None) -> bool:
+        """Drops every entry when the generation moved. False when it is unknown."""
+        if generation is None:
+            return False
+        if generation != self._seen_generation:
+            self._clear()
+            self._seen_generation = generation
+        return True
+
+    def _matrix_for_grade(self, grade: int) -> tuple[list[int], np.ndarray | None]:
+        cached = self._grade_matrix.get(grade)
+        if cached is None:
+            keys = list(self._grade_keys.get(grade, ()))
+            matrix = np.stack([self._entries[key].embedding for key in keys]) if keys else None
+            cached = (keys, matrix)
+            self._grade_matrix[grade] = cached
+        return cached
+
+    def _expire(self):
+        deadline = time.monotonic() - self.ttl_seconds
+        # Entries are ordered by recency, not age, so scan them all
+        expired = [key for key, entry in self._entries.items() if entry.created_at < deadline]
+        for key in expired:
+            self._remove(key)
+
+    def _remove(self, key: int):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._total_bytes -= entry.size_bytes
+        grade_keys = self._grade_keys.get(entry.grade)
+        if grade_keys is not None:
+            grade_keys.discard(key)
+            if not grade_keys:
+                del self._grade_keys[entry.grade]
+        self._grade_matrix.pop(entry.grade, None)
+
+
+# Process-wide cache shared by every RagManager instance
+answer_cache = SemanticAnswerCache(
+    similarity_threshold=settings.SEMANTIC_CACHE_SIMILARITY_THRESHOLD,
+    ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    max_bytes=settings.SEMANTIC_CACHE_MAX_BYTES,
+    generation=create_cache_generation(),
+)
@@ -2,18 +2,35 @@
 __import__('pysqlite3')
 import sys
 sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
+import logging
+import re
+import threading
+import time
 import chromadb
 from chromadb.utils import embedding_functions
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+
 class ChromaService:
     """
     A singleton service for interacting with ChromaDB.
+
+    Chunks are partitioned into one collection ("shard") per (grade, subject)
+    taken from the ingestion job metadata, so a query for a grade only
+    searches that grade's data instead of post-filtering one big collection.
+    The original single collection (CHROMA_COLLECTION_NAME) is kept as the
+    legacy collection and can be migrated with `python migrate_chroma.py`.
     """
     _instance = None
     _client = None
     _collection = None
     _embedding_function = None # Store embedding function as a class attribute
+    _shards = {}  # Shard collection name -> collection
+    _shards_lock = threading.Lock()
+    _shards_refreshed_at = None  # time.monotonic() of the last refresh_shards()
+    _legacy_has_chunks = None  # Whether the legacy collection holds chunks, as of that refresh
 
     def __new__(cls):
         if cls._instance is None:
@@ -29,20 +46,70 @@ class ChromaService:
         """
         if cls._client is None:
             cls._client = chromadb.PersistentClient(path=settings.CHROMA_PERSIST_DIRECTORY)
-            
-            # Use the pre-built SentenceTransformer embedding function
-            cls._embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-                model_name=settings.EMBEDDING_MODEL_NAME
-            )
-            
+
+            cls._embedding_function = cls.create_embedding_function()
+
             cls._collection = cls._client.get_or_create_collection(
                 name=settings.CHROMA_COLLECTION_NAME,
                 embedding_function=cls._embedding_function, # Use the stored embedding function
                 metadata={"hnsw:space": "cosine"} # Specifies the distance metric
             )
+            cls.refresh_shards()
+            if cls._collection.count() and not cls._shards:
+                logger.warning(
+                    f"Collection '{settings.CHROMA_COLLECTION_NAME}' holds unsharded chunks. "
+                    "Run `python migrate_chroma.py` to move them into grade/subject shards."
+                )
+
+    @staticmethod
+    def create_embedding_function():
+        """Returns the embedding function selected by EMBEDDING_BACKEND."""
+        if settings.EMBEDDING_BACKEND == "hash":
+            from app.services.hash_embedding import HashEmbeddingFunction
+            return HashEmbeddingFunction(dim=settings.HASH_EMBEDDING_DIM)
+        # Use the pre-built SentenceTransformer embedding function
+        return embedding_functions.SentenceTransformerEmbeddingFunction(
+            model_name=settings.EMBEDDING_MODEL_NAME
+        )
+
+    @staticmethod
+    def shard_name(grade: int, subject: str) -> str:
+        """Returns the collection name of a (grade, subject) shard."""
+        subject_slug = re.sub(r"[^a-z0-9]+", "-", str(subject).lower()).strip("-") or "general"
+        return f"{settings.CHROMA_COLLECTION_NAME}_g{int(grade)}_{subject_slug}"
+
+    @classmethod
+    def refresh_shards(cls):
+        """
+        Reloads the list of shard collections, picking up shards created (and
+        legacy chunks migrated) by other processes.
+        """
+        shards = {}
+        for collection in cls._client.list_collections():
+            if (collection.metadata or {}).get("shard"):
+                shards[collection.name] = cls._client.get_collection(
+                    name=collection.name, embedding_function=cls._embedding_function
+                )
+        legacy_has_chunks = cls._collection.count() > 0 if cls._collection is not None else False
+        with cls._shards_lock:
+            cls._shards = shards
+            cls._legacy_has_chunks = legacy_has_chunks
+            cls._shards_refreshed_at = time.monotonic()
+
+    @classmethod
+    def _refresh_if_stale(cls):
+        """Refreshes at most once per CHROMA_SHARD_REFRESH_S, so misses don't list collections on every query."""
+        refreshed_at = cls._shards_refreshed_at
+        if refreshed_at is None or time.monotonic() - refreshed_at >= settings.CHROMA_SHARD_REFRESH_S:
+            cls.refresh_shards()
+
+    def has_legacy_chunks(self) -> bool:
+        """Whether the legacy collection still holds chunks that have to be searched."""
+        self._refresh_if_stale()
+        return self._legacy_has_chunks
 
     def get_collection(self):
-        """Returns the ChromaDB collection instance."""
+        """Returns the legacy, unsharded ChromaDB collection instance."""
         if self._collection is None:
             self.initialize()
         return self._collection
@@ -53,31 +120,116 @@ class ChromaService:
             self.initialize()
         return self._embedding_function
 
-    def upsert_documents(self, documents: list[str], metadatas: list[dict], ids: list[str]):
+    def get_shard(self, grade: int, subject: str):
+        """Returns the shard collection for a (grade, subject), creating it if needed."""
+        name = self.shard_name(grade, subject)
+        shard = self._shards.get(name)
+        if shard is None:
+            shard = self._client.get_or_create_collection(
+                name=name,
+                embedding_function=self.get_embedding_function(),
+                metadata={"hnsw:space": "cosine", "shard": True, "grade": int(grade), "subject": str(subject)},
+            )
+            with self._shards_lock:
+                self._shards = {**self._shards, name: shard}
+        return shard
+
+    def get_shards(self, grade: int | None = None, subject: str | None = None, grades: list[int] | None = None) -> list:
         """
-        Upserts (inserts or updates) documents into the collection.
+        Returns the shard collections matching a grade (or any of `grades`)
+        and/or subject. With neither, every shard is returned.
         """
-        collection = self.get_collection()
-        collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
+        if grade is not None:
+            grades = [grade]
+
+        def matches(shard) -> bool:
+            metadata = shard.metadata or {}
+            if grades is not None and metadata.get("grade") not in grades:
+                return False
+            return subject is None or str(metadata.get("subject", "")).lower() == subject.lower()
 
-    def query_collection(self, query_text: str, n_results: int, where_filter: dict) -> dict:
+        shards = [shard for shard in self._shards.values() if matches(shard)]
+        if not shards and grades is not None:
+            # The shard may have been created by another process (e.g. a Celery worker)
+            self._refresh_if_stale()
+            shards = [shard for shard in self._shards.values() if matches(shard)]
+        return shards
+
+    def upsert_documents(self, documents: list[str], metadatas: list[dict], ids: list[str], embeddings=None):
         """
-        Queries the collection for similar documents.
-        
-        Args:
-            query_text: The text to search for.
-            n_results: The number of results to return.
-            where_filter: A dictionary to filter results based on metadata.
-                          Example: {"grade": 9, "subject": "Physics"}
+        Upserts (inserts or updates) documents into their (grade, subject) shards.
+        Chunks without a grade or subject go to the legacy collection.
         """
-        collection = self.get_collection()
-        results = collection.query(
-            query_texts=[query_text],
-            n_results=n_results,
-            where=where_filter
-        )
-        return results
+        groups: dict = {}
+        for index, metadata in enumerate(metadatas):
+            grade, subject = (metadata or {}).get("grade"), (metadata or {}).get("subject")
+            key = (grade, subject) if grade is not None and subject else None
+            groups.setdefault(key, []).append(index)
+
+        for key, indexes in groups.items():
+            if key is None:
+                collection = self.get_collection()
+                ChromaService._legacy_has_chunks = True
+            else:
+                collection = self.get_shard(*key)
+            collection.upsert(
+                documents=[documents[i] for i in indexes],
+                metadatas=[metadatas[i] for i in indexes],
+                ids=[ids[i] for i in indexes],
+                embeddings=[embeddings[i] for i in indexes] if embeddings is not None else None,
+            )
+
+    def get_all(self, include: list[str]) -> dict:
+        """
+        Returns every chunk across all shards and the legacy collection, in the
+        shape of `Collection.get()`. Chunks already copied into a shard are not
+        repeated from the legacy collection.
+        """
+        self.refresh_shards()
+        merged = {"ids": [], **{field: [] for field in include}}
+        seen = set()
+        for collection in [*self._shards.values(), self.get_collection()]:
+            contents = collection.get(include=include)
+            for row, doc_id in enumerate(contents["ids"]):
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                merged["ids"].append(doc_id)
+                for field in include:
+                    merged[field].append(contents[field][row])
+        return merged
+
+    def migrate_legacy_collection(self, batch_size: int = 500, delete_legacy: bool = False) -> int:
+        """
+        Copies every chunk of the legacy collection into its (grade, subject)
+        shard, reusing the stored embeddings. Safe to run more than once.
+        Returns the number of chunks moved into shards.
+        """
+        legacy = self.get_collection()
+        moved_ids: list[str] = []
+        offset = 0
+        while True:
+            batch = legacy.get(include=["documents", "metadatas", "embeddings"], limit=batch_size, offset=offset)
+            if not batch["ids"]:
+                break
+            offset += len(batch["ids"])
+            shardable = [
+                i for i, metadata in enumerate(batch["metadatas"])
+                if (metadata or {}).get("grade") is not None and (metadata or {}).get("subject")
+            ]
+            if shardable:
+                self.upsert_documents(
+                    documents=[batch["documents"][i] for i in shardable],
+                    metadatas=[batch["metadatas"][i] for i in shardable],
+                    ids=[batch["ids"][i] for i in shardable],
+                    embeddings=[batch["embeddings"][i] for i in shardable],
+                )
+                moved_ids.extend(batch["ids"][i] for i in shardable)
+            logger.info(f"Migrated {len(moved_ids)} legacy chunks so far.")
+
+        if delete_legacy:
+            # Deleted only after the copy finished, so paging above was not disturbed
+            for start in range(0, len(moved_ids), batch_size):
+                legacy.delete(ids=moved_ids[start:start + batch_size])
+            ChromaService._legacy_has_chunks = legacy.count() > 0
+        return len(moved_ids)
@@ -4,14 +4,107 @@
 # clarity and could be used if you wanted to manage embeddings manually
 # or use a different provider.
 
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Sequence
+
 from sentence_transformers import SentenceTransformer
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class BatchingEmbedder:
+    """
+    Collects concurrent single-query embedding requests and encodes them together.
+
+    A background thread waits up to `window_ms` after the first queued query
+    (or until `max_batch` queries are waiting), encodes the batch with one call
+    to `encode`, and hands each caller its own vector. On CPU this turns many
+    batch-of-one forward passes into a few larger ones.
+    """
+
+    def __init__(self, encode: Callable[[list[str]], Sequence], window_ms: float, max_batch: int):
+        self._encode = encode
+        self._window = window_ms / 1000
+        self._max_batch = max_batch
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self.batches = 0  # Encode calls made, for monitoring
+        self.queries = 0
+
+    def submit(self, text: str) -> Future:
+        """Queues a query and returns a future for its embedding."""
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="query-embedder", daemon=True)
+                    self._thread.start()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str) -> list[float]:
+        """Blocks until the query's embedding is ready."""
+        return self.submit(text).result()
+
+    async def aembed(self, text: str) -> list[float]:
+        """Awaits the query's embedding without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(text))
+
+    def close(self):
+        """Stops the background thread after the queries already queued."""
+        if self._thread is not None:
+            self._queue.put((_STOP, None))
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item[0] is _STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self._window
+            stopping = False
+            while len(batch) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item[0] is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                vectors = self._encode([text for text, _ in batch])
+                for (_, future), vector in zip(batch, vectors):
+                    future.set_result([float(x) for x in vector])
+            except Exception as e:
+                logger.error(f"Batched embedding of {len(batch)} queries failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+            self.batches += 1
+            self.queries += len(batch)
+            if stopping:
+                return
+
+
 class EmbeddingService:
     """
     A service to handle the creation of text embeddings.
     """
     _model = None
+    _query_embedder: BatchingEmbedder | None = None
 
     @classmethod
     def get_model(cls):
@@ -30,6 +123,26 @@ class EmbeddingService:
         embeddings = model.encode(texts, convert_to_tensor=False)
         return embeddings.tolist()
 
+    @classmethod
+    def get_query_embedder(cls) -> BatchingEmbedder:
+        """
+        Returns the micro-batching embedder for single queries (singleton pattern).
+        """
+        if cls._query_embedder is None:
+            model = cls.get_model()
+            cls._query_embedder = BatchingEmbedder(
+                encode=lambda texts: model.encode(texts, convert_to_tensor=False),
+                window_ms=settings.EMBEDDING_BATCH_WINDOW_MS,
+                max_batch=settings.EMBEDDING_MAX_BATCH,
+            )
+        return cls._query_embedder
+
+    def embed_query(self, text: str) -> list[float]:
+        """
+        Embeds a single query, batched with any other concurrent queries.
+        """
+        return self.get_query_embedder().embed(text)
+
 # Example usage (not needed for the main app flow with Chroma's built-in function)
 # if __name__ == "__main__":
 #     service = EmbeddingService()
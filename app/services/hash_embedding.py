@@ -0,0 +1,52 @@
+# /mentormind-backend/app/services/hash_embedding.py
+import hashlib
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils.embedding_functions import register_embedding_function
+
+from app.services.lexical_index import tokenize
+
+
+@register_embedding_function
+class HashEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    A deterministic, model-free embedding function for tests, CI and offline benchmarks.
+
+    Every term and every pair of adjacent terms is hashed into one of `dim`
+    signed buckets and the vector is L2-normalized, so texts that share
+    vocabulary are close in cosine space. It knows nothing about meaning
+    beyond word overlap and must not be used in production.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return [self._embed(text) for text in input]
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        terms = tokenize(text or "")
+        for feature in terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if not norm:
+            vector[0], norm = 1.0, 1.0  # Cosine distance is undefined for a zero vector
+        return vector / norm
+
+    @staticmethod
+    def name() -> str:
+        return "mentormind-hash"
+
+    def default_space(self):
+        return "cosine"
+
+    def get_config(self) -> dict:
+        return {"dim": self.dim}
+
+    @staticmethod
+    def build_from_config(config: dict) -> "HashEmbeddingFunction":
+        return HashEmbeddingFunction(dim=config["dim"])
@@ -0,0 +1,230 @@
+# /mentormind-backend/app/services/lexical_index.py
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+from app.config import settings
+from app.utils.versioned_dir import new_version_dir, publish_version, read_current_version, version_lock
+
+logger = logging.getLogger(__name__)
+
+# Keeps formulas and units such as "m/s^2", "e=mc^2" or "9.8" together as one token
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[\^/.=\-][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it of on or "
+    "that the their this to was what when where which why will with you".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cases text and splits it into index terms."""
+    text = re.sub(r"'s\b", "", text.lower())
+    return [token for token in TOKEN_PATTERN.findall(text) if token not in STOPWORDS]
+
+
+class LexicalIndex:
+    """
+    A compact BM25 inverted index stored on disk as NumPy arrays.
+
+    Postings for term `t` live in `postings_doc[offsets[t]:offsets[t + 1]]`
+    (chunk positions) and the matching slice of `postings_tf` (term
+    frequencies). The arrays are memory-mapped, so a search only touches the
+    pages of the query terms. Builds and incremental additions are published
+    as a new version directory (see app/utils/versioned_dir.py), which
+    readers in any process pick up on their next search.
+    """
+    ARRAYS = ("offsets", "postings_doc", "postings_tf", "doc_lengths", "doc_grades")
+
+    def __init__(self, index_dir: str, k1: float = 1.5, b: float = 0.75):
+        self.index_dir = index_dir
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._loaded_version: str | None = None
+        self._arrays: dict[str, np.ndarray] = {}
+        self._vocab: dict[str, int] = {}
+        self._doc_ids: list[str] = []
+        self._avg_doc_length = 0.0
+
+    def build(self, ids: list[str], documents: list[str], metadatas: list[dict]):
+        """
+        Builds a new index version over the given chunks and publishes it.
+        """
+        with version_lock(self.index_dir):
+            self._build(ids, documents, metadatas)
+
+    def add(self, ids: list[str], documents: list[str], metadatas: list[dict]):
+        """
+        Publishes a new version with the given chunks added to the current one.
+        A chunk whose id is already indexed replaces it. Only the new chunks are
+        tokenized; the existing postings are carried over as arrays.
+        """
+        with version_lock(self.index_dir):
+            with self._lock:
+                self._reload_if_changed()
+                arrays, vocab, doc_ids = self._arrays, dict(self._vocab), list(self._doc_ids)
+            if not doc_ids:
+                self._build(ids, documents, metadatas)
+                return
+
+            positions_by_id = {doc_id: position for position, doc_id in enumerate(doc_ids)}
+            positions = []
+            for doc_id in ids:
+                if doc_id not in positions_by_id:
+                    positions_by_id[doc_id] = len(doc_ids)
+                    doc_ids.append(doc_id)
+                positions.append(positions_by_id[doc_id])
+            terms, docs, tfs, lengths, grades = self._count_terms(documents, metadatas, vocab, positions)
+
+            offsets = arrays["offsets"]
+            old_terms = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+            old_docs, old_tfs = np.asarray(arrays["postings_doc"]), np.asarray(arrays["postings_tf"])
+            keep = ~np.isin(old_docs, positions)  # Replaced chunks drop their old postings
+            doc_lengths = np.zeros(len(doc_ids), dtype=np.int32)
+            doc_lengths[:len(arrays["doc_lengths"])] = arrays["doc_lengths"]
+            doc_lengths[positions] = lengths
+            doc_grades = np.full(len(doc_ids), -1, dtype=np.int16)
+            doc_grades[:len(arrays["doc_grades"])] = arrays["doc_grades"]
+            doc_grades[positions] = grades
+            self._publish(
+                doc_ids, vocab,
+                np.concatenate([old_terms[keep], terms]),
+                np.concatenate([old_docs[keep], docs]),
+                np.concatenate([old_tfs[keep], tfs]),
+                doc_lengths, doc_grades,
+            )
+
+    def _build(self, ids: list[str], documents: list[str], metadatas: list[dict]):
+        """Builds and publishes a version over exactly these chunks. Caller holds the version lock."""
+        vocab: dict[str, int] = {}
+        columns = self._count_terms(documents, metadatas, vocab, range(len(ids)))
+        self._publish(list(ids), vocab, *columns)
+
+    @staticmethod
+    def _count_terms(documents: list[str], metadatas: list[dict], vocab: dict[str, int], positions):
+        """
+        Tokenizes chunks into flat `(term, position, tf)` posting columns, adding
+        new terms to `vocab`, plus each chunk's length and grade.
+        """
+        terms: list[int] = []
+        docs: list[int] = []
+        tfs: list[int] = []
+        doc_lengths = np.zeros(len(documents), dtype=np.int32)
+        doc_grades = np.full(len(documents), -1, dtype=np.int16)
+        for row, (position, text, metadata) in enumerate(zip(positions, documents, metadatas)):
+            counts = Counter(tokenize(text or ""))
+            doc_lengths[row] = sum(counts.values())
+            if metadata and metadata.get("grade") is not None:
+                doc_grades[row] = int(metadata["grade"])
+            for term, tf in counts.items():
+                terms.append(vocab.setdefault(term, len(vocab)))
+                docs.append(position)
+                tfs.append(min(tf, np.iinfo(np.uint16).max))
+        return (
+            np.array(terms, dtype=np.int64), np.array(docs, dtype=np.int32), np.array(tfs, dtype=np.uint16),
+            doc_lengths, doc_grades,
+        )
+
+    def _publish(self, ids: list[str], vocab: dict[str, int], terms: np.ndarray, docs: np.ndarray,
+                 tfs: np.ndarray, doc_lengths: np.ndarray, doc_grades: np.ndarray):
+        """Groups the posting columns by term, writes them as a new version and publishes it."""
+        order = np.argsort(terms, kind="stable")
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(terms, minlength=len(vocab)))
+
+        version, version_dir = new_version_dir(self.index_dir)
+        arrays = {
+            "offsets": offsets,
+            "postings_doc": docs[order].astype(np.int32),
+            "postings_tf": tfs[order].astype(np.uint16),
+            "doc_lengths": doc_lengths,
+            "doc_grades": doc_grades,
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(version_dir, f"{name}.npy"), array)
+        with open(os.path.join(version_dir, "vocab.json"), "w", encoding="utf-8") as f:
+            json.dump(vocab, f)
+        with open(os.path.join(version_dir, "doc_ids.json"), "w", encoding="utf-8") as f:
+            json.dump(ids, f)
+        with open(os.path.join(version_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"avg_doc_length": float(doc_lengths.mean()) if len(ids) else 0.0}, f)
+        publish_version(self.index_dir, version)
+        logger.info(f"Published lexical index {version} over {len(ids)} chunks and {len(vocab)} terms.")
+
+    def is_built(self) -> bool:
+        return read_current_version(self.index_dir) is not None
+
+    def rebuild_from_chroma(self, chroma_service):
+        """Rebuilds the index from every chunk currently stored across the Chroma shards."""
+        contents = chroma_service.get_all(include=["documents", "metadatas"])
+        self.build(contents["ids"], contents["documents"], contents["metadatas"])
+
+    def search(self, query: str, n: int) -> list[tuple[str, float, int | None]]:
+        """
+        Returns up to `n` `(chunk_id, bm25_score, grade)` tuples, best first.
+        """
+        with self._lock:
+            self._reload_if_changed()
+            if not self._doc_ids:
+                return []
+            offsets = self._arrays["offsets"]
+            postings_doc = self._arrays["postings_doc"]
+            postings_tf = self._arrays["postings_tf"]
+            doc_lengths = self._arrays["doc_lengths"]
+            doc_grades = self._arrays["doc_grades"]
+            doc_ids = self._doc_ids
+            avg_doc_length = self._avg_doc_length or 1.0
+            vocab = self._vocab
+
+        num_docs = len(doc_ids)
+        scores = np.zeros(num_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_index = vocab.get(term)
+            if term_index is None:
+                continue
+            start, end = offsets[term_index], offsets[term_index + 1]
+            docs = postings_doc[start:end]
+            tf = postings_tf[start:end].astype(np.float32)
+            idf = math.log(1.0 + (num_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * doc_lengths[docs] / avg_doc_length)
+            # Each chunk appears at most once per term, so fancy-index addition is safe
+            scores[docs] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+        matched = np.flatnonzero(scores)
+        if matched.size == 0:
+            return []
+        if matched.size > n:
+            matched = matched[np.argpartition(scores[matched], -n)[-n:]]
+        matched = matched[np.argsort(scores[matched])[::-1]]
+        return [
+            (doc_ids[i], float(scores[i]), int(doc_grades[i]) if doc_grades[i] >= 0 else None)
+            for i in matched
+        ]
+
+    def _reload_if_changed(self):
+        """Maps the published version if it differs from the loaded one. Caller holds the lock."""
+        version = read_current_version(self.index_dir)
+        if version is None or version == self._loaded_version:
+            return
+        version_dir = os.path.join(self.index_dir, version)
+        self._arrays = {
+            name: np.load(os.path.join(version_dir, f"{name}.npy"), mmap_mode="r")
+            for name in self.ARRAYS
+        }
+        with open(os.path.join(version_dir, "vocab.json"), encoding="utf-8") as f:
+            self._vocab = json.load(f)
+        with open(os.path.join(version_dir, "doc_ids.json"), encoding="utf-8") as f:
+            self._doc_ids = json.load(f)
+        with open(os.path.join(version_dir, "meta.json"), encoding="utf-8") as f:
+            self._avg_doc_length = json.load(f)["avg_doc_length"]
+        self._loaded_version = version
+
+
+# Process-wide index shared by ingestion and retrieval
+lexical_index = LexicalIndex(settings.LEXICAL_INDEX_DIR)
@@ -0,0 +1,174 @@
+# /mentormind-backend/app/services/quiz_bank.py
+import hashlib
+import logging
+import math
+import re
+from typing import Any, Callable, Dict, List
+
+from peewee import Case, fn
+
+from app.config import settings
+from app.core.quiz_stream import validate_question
+from app.db.models import QuizBankQuestion
+from app.services.lexical_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# (topic, grade, num_questions) -> {"questions": [...]} or {"error": ...}, e.g. RagManager.generate_quiz
+QuizGenerator = Callable[[str, int, int], Dict[str, Any]]
+
+
+def normalize_topic(topic: str) -> str:
+    """The bank key for a topic: lower-cased with whitespace collapsed."""
+    return re.sub(r"\s+", " ", topic).strip().lower()
+
+
+def question_terms(question_text: str) -> frozenset[str]:
+    return frozenset(tokenize(question_text))
+
+
+def fingerprint(question_text: str) -> str:
+    normalized = " ".join(re.sub(r"[^a-z0-9\s]", "", question_text.lower()).split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def jaccard(left: frozenset, right: frozenset) -> float:
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+class QuizBank:
+    """
+    A store of validated, pre-generated quiz questions per (topic, grade).
+
+    A draw picks random questions that have been served fewer than
+    `max_serves` times and counts the serve; those still-servable questions
+    are the stock. `refill()` tops a topic up to `target` with freshly
+    generated questions, dropping exact and near-duplicates (token Jaccard
+    similarity of at least `duplicate_threshold`) of what is already banked.
+    """
+
+    def __init__(self, target: int, low_water: int, max_serves: int, generation_batch: int,
+                 duplicate_threshold: float):
+        self.target = target
+        self.low_water = low_water
+        self.max_serves = max_serves
+        self.generation_batch = generation_batch
+        self.duplicate_threshold = duplicate_threshold
+
+    def _servable(self, topic: str, grade: int):
+        return (QuizBankQuestion.topic == normalize_topic(topic)) & (QuizBankQuestion.grade == grade) & (
+            QuizBankQuestion.times_served < self.max_serves)
+
+    def remaining(self, topic: str, grade: int) -> int:
+        return QuizBankQuestion.select().where(self._servable(topic, grade)).count()
+
+    def draw(self, topic: str, grade: int, num_questions: int) -> List[Dict[str, Any]] | None:
+        """
+        Serves `num_questions` random questions, or None (serving nothing)
+        when the stock is smaller than that.
+
+        Each serve is counted with an UPDATE that re-checks `max_serves`, so a
+        concurrent draw that picked the same questions cannot push them past
+        it. If any question was used up that way, the draw is rolled back.
+        """
+        with QuizBankQuestion._meta.database.atomic() as transaction:
+            rows = list(
+                QuizBankQuestion.select()
+                .where(self._servable(topic, grade))
+                .order_by(fn.Random())
+                .limit(num_questions)
+            )
+            if len(rows) < num_questions:
+                return None
+            served = [
+                row for row in rows
+                if (QuizBankQuestion
+                    .update(times_served=QuizBankQuestion.times_served + 1)
+                    .where((QuizBankQuestion.id == row.id) & (QuizBankQuestion.times_served < self.max_serves))
+                    .execute())
+            ]
+            if len(served) < num_questions:
+                transaction.rollback()
+                return None
+        return [
+            {"question_text": row.question_text, "options": row.options, "correct_answer": row.correct_answer}
+            for row in served
+        ]
+
+    def add_questions(self, topic: str, grade: int, questions: List[Any], times_served: int = 0) -> int:
+        """Validates and stores questions, skipping duplicates. Returns how many were stored."""
+        key = normalize_topic(topic)
+        existing = list(
+            QuizBankQuestion.select(QuizBankQuestion.question_text, QuizBankQuestion.fingerprint)
+            .where((QuizBankQuestion.topic == key) & (QuizBankQuestion.grade == grade))
+        )
+        banked = [question_terms(row.question_text) for row in existing]
+        fingerprints = {row.fingerprint for row in existing}
+        rows = []
+        for raw in questions:
+            question = validate_question(raw)
+            if question is None:
+                continue
+            question_fingerprint = fingerprint(question["question_text"])
+            terms = question_terms(question["question_text"])
+            if question_fingerprint in fingerprints or any(
+                jaccard(terms, other) >= self.duplicate_threshold for other in banked
+            ):
+                continue
+            fingerprints.add(question_fingerprint)
+            banked.append(terms)
+            rows.append({
+                "topic": key,
+                "grade": grade,
+                "question_text": question["question_text"],
+                "options": question["options"],
+                "correct_answer": question["correct_answer"],
+                "fingerprint": question_fingerprint,
+                "times_served": times_served,
+            })
+        if rows:
+            with QuizBankQuestion._meta.database.atomic():
+                QuizBankQuestion.insert_many(rows).on_conflict_ignore().execute()
+        return len(rows)
+
+    def refill(self, topic: str, grade: int, generate: QuizGenerator) -> int:
+        """
+        Generates questions until the topic holds `target` servable ones.
+        Gives up after a few more LLM calls than needed, since a narrow topic
+        may keep producing duplicates. Returns how many were added.
+        """
+        added = 0
+        missing = self.target - self.remaining(topic, grade)
+        max_calls = math.ceil(max(missing, 0) / self.generation_batch) + 2
+        for _ in range(max_calls):
+            if missing <= 0:
+                break
+            quiz = generate(topic, grade, min(self.generation_batch, missing))
+            if quiz.get("error"):
+                logger.warning(f"Quiz bank refill for '{topic}' (grade {grade}) failed: {quiz['error']}")
+                break
+            stored = self.add_questions(topic, grade, quiz.get("questions", []))
+            added += stored
+            missing -= stored
+        logger.info(f"Quiz bank refill for '{topic}' (grade {grade}) added {added} questions.")
+        return added
+
+    def low_stock(self) -> List[tuple[str, int]]:
+        """(topic, grade) pairs that have been asked for and are below the low-water mark."""
+        servable = fn.SUM(Case(None, [(QuizBankQuestion.times_served < self.max_serves, 1)], 0))
+        query = (QuizBankQuestion
+                 .select(QuizBankQuestion.topic, QuizBankQuestion.grade)
+                 .group_by(QuizBankQuestion.topic, QuizBankQuestion.grade)
+                 .having(servable < self.low_water))
+        return [(row.topic, row.grade) for row in query]
+
+
+quiz_bank = QuizBank(
+    target=settings.QUIZ_BANK_TARGET,
+    low_water=settings.QUIZ_BANK_LOW_WATER,
+    max_serves=settings.QUIZ_BANK_MAX_SERVES,
+    generation_batch=settings.QUIZ_BANK_GENERATION_BATCH,
+    duplicate_threshold=settings.QUIZ_BANK_DUPLICATE_THRESHOLD,
+)
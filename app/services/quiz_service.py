@@ -1,18 +1,100 @@
 # /mentormind-backend/app/services/quiz_service.py
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
 from app.core.rag_manager import RagManager
+from app.services.quiz_bank import normalize_topic, quiz_bank
+
+logger = logging.getLogger(__name__)
 
 
 class QuizService:
-    def __init__(self):
-        self.rag_manager = RagManager()
+    def __init__(self, rag_manager: RagManager | None = None):
+        self.rag_manager = rag_manager or RagManager()
 
-    def generate_quiz_for_topic(self, topic: str, grade: int, num_questions: int = 5):
+    def generate_quiz_for_topic(self, topic: str, grade: int, num_questions: int = 5, owner: int | None = None):
         """
         Generates a quiz using the RAG manager.
+        Serves it from the quiz bank when the topic has enough questions in
+        stock; otherwise generates it now and banks the new questions.
         """
+        if settings.QUIZ_BANK_ENABLED:
+            questions = quiz_bank.draw(topic, grade, num_questions)
+            if questions is not None:
+                remaining = quiz_bank.remaining(topic, grade)
+                if remaining < quiz_bank.low_water:
+                    request_refill(topic, grade)
+                return {"questions": questions, "remaining": remaining}
+
         quiz_data = self.rag_manager.generate_quiz(
             topic=topic,
             grade=grade,
-            num_questions=num_questions
+            num_questions=num_questions,
+            owner=owner
         )
+        if settings.QUIZ_BANK_ENABLED and not quiz_data.get("error"):
+            # Already served once; the bank also remembers the topic for background refills
+            quiz_bank.add_questions(topic, grade, quiz_data.get("questions", []), times_served=1)
+            request_refill(topic, grade)
         return quiz_data
+
+    async def astream_quiz_for_topic(self, topic: str, grade: int, num_questions: int = 5,
+                                     owner: int | None = None):
+        """
+        Yields the quiz's questions one at a time. Banked questions are yielded
+        at once; otherwise each question is yielded as soon as the LLM has
+        produced it, and the new questions are banked at the end.
+        """
+        if settings.QUIZ_BANK_ENABLED:
+            questions = await run_in_threadpool(quiz_bank.draw, topic, grade, num_questions)
+            if questions is not None:
+                for question in questions:
+                    yield question
+                if await run_in_threadpool(quiz_bank.remaining, topic, grade) < quiz_bank.low_water:
+                    request_refill(topic, grade)
+                return
+
+        generated = []
+        try:
+            async for question in self.rag_manager.astream_quiz(topic, grade, num_questions, owner=owner):
+                generated.append(question)
+                yield question
+        finally:
+            if settings.QUIZ_BANK_ENABLED and generated:
+                await run_in_threadpool(quiz_bank.add_questions, topic, grade, generated, 1)
+                request_refill(topic, grade)
+
+
+_refill_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quiz-refill")
+_refills_requested: set[tuple[str, int]] = set()
+_refills_lock = threading.Lock()
+
+
+def request_refill(topic: str, grade: int):
+    """
+    Queues a background refill of one topic without waiting on the broker.
+    Best effort: the periodic low-stock sweep catches anything missed.
+    """
+    key = (normalize_topic(topic), grade)
+    with _refills_lock:
+        if key in _refills_requested:
+            return
+        _refills_requested.add(key)
+    _refill_executor.submit(_publish_refill, key)
+
+
+def _publish_refill(key: tuple[str, int]):
+    from app.tasks.tasks import refill_quiz_bank
+
+    topic, grade = key
+    try:
+        refill_quiz_bank.apply_async(args=(topic, grade), retry=False)
+    except Exception as e:
+        logger.warning(f"Could not queue a quiz bank refill for '{topic}' (grade {grade}): {e}")
+    finally:
+        with _refills_lock:
+            _refills_requested.discard(key)
@@ -0,0 +1,127 @@
+# /mentormind-backend/app/services/quiz_store.py
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple
+
+from app.config import settings
+from app.db.models import Quiz
+from app.services.quiz_bank import fingerprint
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def canonical_questions(questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    The questions in a fixed order (by question fingerprint), so a question
+    set drawn in any order is the same quiz. Clients shuffle for display.
+    """
+    return sorted(questions, key=lambda q: (fingerprint(q["question_text"]), _canonical_json(q)))
+
+
+def quiz_hash(questions: List[Dict[str, Any]]) -> str:
+    """SHA-256 of the question set as canonical JSON: the same questions hash the same in any order."""
+    return hashlib.sha256(_canonical_json(canonical_questions(questions)).encode("utf-8")).hexdigest()
+
+
+def public_questions(questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The questions as sent to students: without their correct answers."""
+    return [{"question_text": q["question_text"], "options": q["options"]} for q in questions]
+
+
+class AnswerKey(NamedTuple):
+    quiz_id: int
+    content_hash: str
+    topic: str
+    grade: int
+    answers: tuple[tuple[str, str], ...]  # (question_text, correct_answer) in question order
+
+
+class QuizStore:
+    """
+    Content-addressed storage of served quizzes and server-side grading.
+
+    A question set is stored once, in canonical order, under its
+    `quiz_hash`, however often and in whatever order it is served. Grading reads the answer key of a quiz id; keys of recently
+    served or graded quizzes are kept in an LRU of `max_cached_keys`, which
+    never goes stale because a stored quiz never changes.
+    """
+
+    def __init__(self, max_cached_keys: int):
+        self.max_cached_keys = max_cached_keys
+        self._lock = threading.Lock()
+        self._keys: "OrderedDict[int, AnswerKey]" = OrderedDict()
+        self._ids_by_hash: dict[str, int] = {}
+
+    def save(self, topic: str, grade: int, questions: List[Dict[str, Any]]) -> int:
+        """Stores the quiz unless it already is, and returns its id."""
+        questions = canonical_questions(questions)
+        content_hash = quiz_hash(questions)
+        with self._lock:
+            quiz_id = self._ids_by_hash.get(content_hash)
+        if quiz_id is not None:
+            return quiz_id
+        Quiz.insert(
+            content_hash=content_hash, topic=topic.strip(), grade=grade, questions=questions
+        ).on_conflict_ignore().execute()
+        quiz = Quiz.select(Quiz.id, Quiz.topic, Quiz.grade).where(Quiz.content_hash == content_hash).get()
+        self._remember(AnswerKey(
+            quiz.id, content_hash, quiz.topic, quiz.grade,
+            tuple((q["question_text"], q["correct_answer"]) for q in questions),
+        ))
+        return quiz.id
+
+    def answer_key(self, quiz_id: int) -> AnswerKey | None:
+        return self.answer_keys([quiz_id]).get(quiz_id)
+
+    def answer_keys(self, quiz_ids: Iterable[int]) -> Dict[int, AnswerKey]:
+        """The answer keys of the quizzes that exist, loading every uncached one in a single query."""
+        keys, missing = {}, set()
+        with self._lock:
+            for quiz_id in quiz_ids:
+                key = self._keys.get(quiz_id)
+                if key is None:
+                    missing.add(quiz_id)
+                else:
+                    self._keys.move_to_end(quiz_id)
+                    keys[quiz_id] = key
+        if missing:
+            for quiz in Quiz.select().where(Quiz.id.in_(list(missing))):
+                key = AnswerKey(
+                    quiz.id, quiz.content_hash, quiz.topic or "", quiz.grade or 0,
+                    tuple((q.get("question_text"), q.get("correct_answer")) for q in quiz.questions),
+                )
+                self._remember(key)
+                keys[quiz.id] = key
+        return keys
+
+    def grade(self, quiz_id: int, answers: Dict[str, str]) -> tuple[AnswerKey, int] | None:
+        """
+        Returns the quiz's answer key and how many `answers` (question_text ->
+        selected option) are correct, or None for an unknown quiz.
+        """
+        key = self.answer_key(quiz_id)
+        if key is None:
+            return None
+        correct_count = sum(1 for question_text, correct in key.answers if answers.get(question_text) == correct)
+        return key, correct_count
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+            self._ids_by_hash.clear()
+
+    def _remember(self, key: AnswerKey):
+        with self._lock:
+            self._keys[key.quiz_id] = key
+            self._keys.move_to_end(key.quiz_id)
+            self._ids_by_hash[key.content_hash] = key.quiz_id
+            while len(self._keys) > self.max_cached_keys:
+                _, evicted = self._keys.popitem(last=False)
+                self._ids_by_hash.pop(evicted.content_hash, None)
+
+
+quiz_store = QuizStore(max_cached_keys=settings.QUIZ_ANSWER_KEY_CACHE_SIZE)
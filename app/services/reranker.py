@@ -0,0 +1,78 @@
+# /mentormind-backend/app/services/reranker.py
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """
+    Re-scores retrieved chunks against the question with a small cross-encoder.
+
+    All candidates are scored in one batched CPU forward pass. The pass runs on
+    a dedicated worker with a hard time budget; when the budget is exceeded, or
+    a previous pass is still running, the ANN order is kept instead.
+    """
+    _model = None
+    _model_lock = threading.Lock()
+
+    def __init__(self, max_concurrency: int = 1):
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="reranker")
+        self._slots = threading.Semaphore(max_concurrency)
+
+    @classmethod
+    def get_model(cls):
+        """
+        Loads and returns the CrossEncoder model (singleton pattern).
+        """
+        if cls._model is None:
+            with cls._model_lock:
+                if cls._model is None:
+                    from sentence_transformers import CrossEncoder
+                    cls._model = CrossEncoder(settings.RERANKER_MODEL_NAME, device="cpu")
+        return cls._model
+
+    def warm_up(self):
+        """Loads the model and runs one tiny batch so the first request stays within budget."""
+        self.get_model().predict([("warm up", "warm up")])
+
+    def _score(self, question: str, passages: List[str]) -> np.ndarray:
+        pairs = [(question, passage) for passage in passages]
+        return np.asarray(self.get_model().predict(pairs, batch_size=len(pairs), convert_to_numpy=True))
+
+    def rerank(self, question: str, docs_and_scores: List[Tuple[Document, float]], top_n: int,
+               budget_ms: float) -> List[Tuple[Document, float]]:
+        """
+        Returns the `top_n` best candidates by cross-encoder score, or the first
+        `top_n` in their original order if scoring does not finish in time.
+        """
+        if len(docs_and_scores) <= 1:
+            return docs_and_scores[:top_n]
+        if not self._slots.acquire(blocking=False):
+            logger.warning("Reranker busy; keeping ANN order.")
+            return docs_and_scores[:top_n]
+
+        future = self._executor.submit(self._score, question, [doc.page_content for doc, _ in docs_and_scores])
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            scores = future.result(timeout=budget_ms / 1000)
+        except FutureTimeoutError:
+            logger.warning(f"Reranking exceeded its {budget_ms} ms budget; keeping ANN order.")
+            return docs_and_scores[:top_n]
+        except Exception as e:
+            logger.error(f"Reranking failed, keeping ANN order: {e}")
+            return docs_and_scores[:top_n]
+
+        order = np.argsort(-scores)[:top_n]
+        return [(docs_and_scores[i][0], float(scores[i])) for i in order]
+
+
+# Process-wide reranker; the model itself is loaded lazily or by warm_up()
+reranker = CrossEncoderReranker(max_concurrency=settings.RERANK_MAX_CONCURRENCY)
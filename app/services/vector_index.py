@@ -0,0 +1,230 @@
+# /mentormind-backend/app/services/vector_index.py
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.config import settings
+from app.utils.versioned_dir import new_version_dir, publish_version, read_current_version, version_lock
+
+logger = logging.getLogger(__name__)
+
+INT8_SCALE = 127.0
+NO_GRADE = "none"
+
+
+class QuantizedVectorIndex:
+    """
+    An exact, in-memory vector index with one quantized matrix per grade.
+
+    Each grade's unit-normalized embeddings are stored as a contiguous int8
+    (or float16) NumPy matrix, memory-mapped from disk, with chunk text and
+    metadata kept in a JSON sidecar. Top-k is a single vectorized dot product
+    per grade, which for a few thousand chunks per grade is faster than an
+    HNSW lookup with a metadata filter, and exact up to quantization error.
+    """
+
+    def __init__(self, index_dir: str, dtype: str = "int8"):
+        if dtype not in ("int8", "float16"):
+            raise ValueError(f"Unsupported quantized index dtype: {dtype}")
+        self.index_dir = index_dir
+        self.dtype = dtype
+        self._lock = threading.Lock()
+        self._loaded_version: str | None = None
+        self._matrices: Dict[str, np.ndarray] = {}
+        self._sidecars: Dict[str, dict] = {}
+        self._positions: Dict[str, Tuple[str, int]] = {}  # chunk id -> (grade key, row)
+        self._scale = 1.0
+        self._loaded_dtype = dtype
+
+    @staticmethod
+    def _grade_key(grade) -> str:
+        return NO_GRADE if grade is None else str(int(grade))
+
+    def build(self, ids: List[str], embeddings, documents: List[str], metadatas: List[dict]):
+        """
+        Builds one quantized matrix per grade and publishes the new version.
+        """
+        with version_lock(self.index_dir):
+            self._build(ids, embeddings, documents, metadatas)
+
+    def add(self, ids: List[str], embeddings, documents: List[str], metadatas: List[dict]):
+        """
+        Publishes a new version with the given chunks added to the current one.
+        Only the grades that gain or lose chunks are rewritten; the files of
+        the other grades are linked from the current version. A chunk whose
+        id is already indexed replaces it.
+        """
+        with version_lock(self.index_dir):
+            with self._lock:
+                self._reload_if_changed()
+                current, matrices, sidecars, positions = (
+                    self._loaded_version, self._matrices, self._sidecars, self._positions)
+                dtype = self._loaded_dtype
+            if current is None:
+                self._build(ids, embeddings, documents, metadatas)
+                return
+
+            vectors = self._normalized(embeddings, len(ids))
+            rows_by_grade = self._rows_by_grade(metadatas)
+            replaced = {doc_id for doc_id in ids if doc_id in positions}
+            touched = set(rows_by_grade) | {positions[doc_id][0] for doc_id in replaced}
+
+            version, version_dir = new_version_dir(self.index_dir)
+            grades = []
+            for grade_key in matrices:
+                if grade_key not in touched:
+                    self._link_grade(os.path.join(self.index_dir, current), version_dir, grade_key)
+                    grades.append(grade_key)
+            for grade_key in touched:
+                sidecar = sidecars.get(grade_key, {"ids": [], "documents": [], "metadatas": []})
+                kept = [row for row, doc_id in enumerate(sidecar["ids"]) if doc_id not in replaced]
+                rows = rows_by_grade.get(grade_key, [])
+                blocks = [self._quantize(vectors[rows], dtype)]
+                if grade_key in matrices:
+                    blocks.insert(0, np.asarray(matrices[grade_key])[kept])
+                merged = {
+                    "ids": [sidecar["ids"][row] for row in kept] + [ids[row] for row in rows],
+                    "documents": [sidecar["documents"][row] for row in kept] + [documents[row] for row in rows],
+                    "metadatas": [sidecar["metadatas"][row] for row in kept] + [metadatas[row] or {} for row in rows],
+                }
+                if merged["ids"]:
+                    self._write_grade(version_dir, grade_key, np.concatenate(blocks), merged)
+                    grades.append(grade_key)
+            self._publish(version, version_dir, dtype, sorted(grades))
+        logger.info(f"Added {len(ids)} chunks to vector index {version}, rewriting {len(touched)} grades.")
+
+    def _build(self, ids: List[str], embeddings, documents: List[str], metadatas: List[dict]):
+        """Builds and publishes a version over exactly these chunks. Caller holds the version lock."""
+        vectors = self._normalized(embeddings, len(ids))
+        rows_by_grade = self._rows_by_grade(metadatas)
+        version, version_dir = new_version_dir(self.index_dir)
+        for grade_key, rows in rows_by_grade.items():
+            self._write_grade(version_dir, grade_key, self._quantize(vectors[rows], self.dtype), {
+                "ids": [ids[row] for row in rows],
+                "documents": [documents[row] for row in rows],
+                "metadatas": [metadatas[row] or {} for row in rows],
+            })
+        self._publish(version, version_dir, self.dtype, sorted(rows_by_grade))
+        logger.info(f"Built {self.dtype} vector index {version}: {len(ids)} chunks in {len(rows_by_grade)} grades.")
+
+    @staticmethod
+    def _normalized(embeddings, count: int) -> np.ndarray:
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(count, -1) if count else np.zeros((0, 1), np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def _rows_by_grade(self, metadatas: List[dict]) -> Dict[str, List[int]]:
+        rows_by_grade: Dict[str, List[int]] = {}
+        for row, metadata in enumerate(metadatas):
+            rows_by_grade.setdefault(self._grade_key((metadata or {}).get("grade")), []).append(row)
+        return rows_by_grade
+
+    @staticmethod
+    def _quantize(block: np.ndarray, dtype: str) -> np.ndarray:
+        if dtype == "int8":
+            return np.clip(np.rint(block * INT8_SCALE), -127, 127).astype(np.int8)
+        return block.astype(np.float16)
+
+    @staticmethod
+    def _write_grade(version_dir: str, grade_key: str, matrix: np.ndarray, sidecar: dict):
+        np.save(os.path.join(version_dir, f"grade_{grade_key}.npy"), np.ascontiguousarray(matrix))
+        with open(os.path.join(version_dir, f"grade_{grade_key}.json"), "w", encoding="utf-8") as f:
+            json.dump(sidecar, f)
+
+    @staticmethod
+    def _link_grade(source_dir: str, version_dir: str, grade_key: str):
+        """Reuses an unchanged grade's files; versions are never modified once published."""
+        for name in (f"grade_{grade_key}.npy", f"grade_{grade_key}.json"):
+            try:
+                os.link(os.path.join(source_dir, name), os.path.join(version_dir, name))
+            except OSError:
+                shutil.copy2(os.path.join(source_dir, name), os.path.join(version_dir, name))
+
+    def _publish(self, version: str, version_dir: str, dtype: str, grades: List[str]):
+        with open(os.path.join(version_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({"dtype": dtype, "grades": grades}, f)
+        publish_version(self.index_dir, version)
+
+    def rebuild_from_chroma(self, chroma_service):
+        """Rebuilds the index from every chunk and embedding stored across the Chroma shards."""
+        contents = chroma_service.get_all(include=["embeddings", "documents", "metadatas"])
+        self.build(contents["ids"], contents["embeddings"], contents["documents"], contents["metadatas"])
+
+    def is_built(self) -> bool:
+        return read_current_version(self.index_dir) is not None
+
+    def search(self, embedding: List[float], k: int, grade: int | None = None,
+               grade_window: int = 0, cross_shard: bool = False) -> List[Tuple[Document, float]]:
+        """
+        Returns the top-k chunks by cosine similarity, within `grade` and the
+        `grade_window` grades either side of it, or across all grades. With
+        `cross_shard=True` only the grades outside that window are searched.
+        """
+        with self._lock:
+            self._reload_if_changed()
+            matrices, sidecars, scale = self._matrices, self._sidecars, self._scale
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        query = query / norm if norm else query
+
+        if grade is None:
+            grade_keys = [] if cross_shard else list(matrices)
+        else:
+            window = {self._grade_key(g) for g in range(int(grade) - grade_window, int(grade) + grade_window + 1)}
+            grade_keys = [key for key in matrices if key not in window] if cross_shard else sorted(window)
+        hits: List[Tuple[float, str, int]] = []
+        for grade_key in grade_keys:
+            matrix = matrices.get(grade_key)
+            if matrix is None or not len(matrix):
+                continue
+            scores = (matrix @ query) / scale
+            top = min(k, len(scores))
+            rows = np.argpartition(-scores, top - 1)[:top]
+            hits.extend((float(scores[row]), grade_key, int(row)) for row in rows)
+
+        hits.sort(reverse=True)
+        return [(self._document(sidecars[grade_key], row), score) for score, grade_key, row in hits[:k]]
+
+    def get_documents(self, ids: List[str]) -> Dict[str, Document]:
+        """Looks chunks up by id from the sidecars."""
+        with self._lock:
+            self._reload_if_changed()
+            positions, sidecars = self._positions, self._sidecars
+        return {
+            doc_id: self._document(sidecars[positions[doc_id][0]], positions[doc_id][1])
+            for doc_id in ids if doc_id in positions
+        }
+
+    @staticmethod
+    def _document(sidecar: dict, row: int) -> Document:
+        return Document(id=sidecar["ids"][row], page_content=sidecar["documents"][row], metadata=sidecar["metadatas"][row])
+
+    def _reload_if_changed(self):
+        """Maps the published version if it differs from the loaded one. Caller holds the lock."""
+        version = read_current_version(self.index_dir)
+        if version is None or version == self._loaded_version:
+            return
+        version_dir = os.path.join(self.index_dir, version)
+        with open(os.path.join(version_dir, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        matrices, sidecars, positions = {}, {}, {}
+        for grade_key in manifest["grades"]:
+            matrices[grade_key] = np.load(os.path.join(version_dir, f"grade_{grade_key}.npy"), mmap_mode="r")
+            with open(os.path.join(version_dir, f"grade_{grade_key}.json"), encoding="utf-8") as f:
+                sidecars[grade_key] = json.load(f)
+            positions.update((doc_id, (grade_key, row)) for row, doc_id in enumerate(sidecars[grade_key]["ids"]))
+        self._matrices, self._sidecars, self._positions = matrices, sidecars, positions
+        self._scale = INT8_SCALE if manifest["dtype"] == "int8" else 1.0
+        self._loaded_dtype = manifest["dtype"]
+        self._loaded_version = version
+
+
+# Process-wide index, used when VECTOR_BACKEND is "quantized"
+quantized_vector_index = QuantizedVectorIndex(settings.QUANTIZED_INDEX_DIR, dtype=settings.QUANTIZED_INDEX_DTYPE)
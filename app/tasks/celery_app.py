@@ -20,5 +20,9 @@ celery.conf.beat_schedule = {
         'task': 'app.tasks.tasks.generate_weekly_reports',
         'schedule': 3600.0, # crontab(minute=0, hour=0, day_of_week='sun'), For testing, run every hour
     },
+    'refill-low-stock-quiz-banks': {
+        'task': 'app.tasks.tasks.refill_low_stock_quiz_banks',
+        'schedule': settings.QUIZ_BANK_REFILL_INTERVAL_S,
+    },
 }
 celery.conf.timezone = 'UTC'
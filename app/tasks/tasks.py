@@ -1,4 +1,5 @@
 # /mentormind-backend/app/tasks/tasks.py
+import functools
 import logging
 import os
 from celery import shared_task
@@ -7,7 +8,12 @@ from app.db.models import IngestionStatus, User
 from app.config import settings
 from app.utils.pdf_parser import extract_text_from_pdf, split_text_into_chunks
 from app.services.chroma_service import ChromaService
+from app.services.answer_cache import answer_cache
+from app.services.lexical_index import lexical_index
+from app.services.vector_index import quantized_vector_index
 from app.services.report_service import generate_report_content
+from app.services.quiz_bank import quiz_bank
+from app.core.rag_manager import RagManager
 
 logger = logging.getLogger(__name__)
 
@@ -51,10 +57,31 @@ def process_pdf_ingestion_sync(job_id: int):
         
         ids = [f"{job.id}_{i}" for i in range(len(chunks))]
         
-        # 4. Upsert into ChromaDB
+        # 4. Upsert into ChromaDB, embedding once for Chroma and the quantized index
         logger.info(f"Upserting {len(chunks)} chunks into ChromaDB")
         chroma_service = ChromaService()
-        chroma_service.upsert_documents(documents=chunks, metadatas=metadatas, ids=ids)
+        embeddings = chroma_service.get_embedding_function()(chunks) if chunks else []
+        chroma_service.upsert_documents(documents=chunks, metadatas=metadatas, ids=ids, embeddings=embeddings)
+
+        # Add the new chunks to the on-disk indexes so retrieval sees them
+        if lexical_index.is_built():
+            logger.info(f"Adding {len(chunks)} chunks to the lexical index")
+            lexical_index.add(ids, chunks, metadatas)
+        else:
+            logger.info("Building lexical index")
+            lexical_index.rebuild_from_chroma(chroma_service)
+        # Kept up to date even when this process serves from Chroma, since other workers may read it
+        if quantized_vector_index.is_built():
+            logger.info(f"Adding {len(chunks)} chunks to the quantized vector index")
+            quantized_vector_index.add(ids, embeddings, chunks, metadatas)
+        elif settings.VECTOR_BACKEND == "quantized":
+            logger.info("Building quantized vector index")
+            quantized_vector_index.rebuild_from_chroma(chroma_service)
+
+        # Any cached answer may now be stale: retrieval also reaches neighbouring
+        # grades. With SEMANTIC_CACHE_INVALIDATION=redis this clears every worker.
+        invalidated = answer_cache.invalidate_all()
+        logger.info(f"Invalidated {invalidated} cached answers after ingesting job_id: {job_id}")
         
         # 5. Update job status to COMPLETED
         update_ingestion_job_status(job_id, IngestionStatus.COMPLETED)
@@ -102,3 +129,35 @@ def generate_weekly_reports():
             print("--- END EMAIL ---\n")
 
     logger.info("Weekly report generation task finished.")
+
+
+@functools.lru_cache(maxsize=1)
+def _get_rag_manager() -> RagManager:
+    """One RagManager per worker process, built on the first quiz refill."""
+    return RagManager()
+
+
+def _generate_quiz(topic: str, grade: int, num_questions: int) -> dict:
+    return _get_rag_manager().generate_quiz(topic=topic, grade=grade, num_questions=num_questions)
+
+
+@shared_task
+def refill_quiz_bank(topic: str, grade: int):
+    """
+    Tops up the quiz bank for one topic and grade.
+    """
+    return quiz_bank.refill(topic, grade, _generate_quiz)
+
+
+@shared_task
+def refill_low_stock_quiz_banks():
+    """
+    Periodic Celery task that refills every banked topic running low on questions.
+    """
+    low_stock = quiz_bank.low_stock()
+    logger.info(f"Refilling {len(low_stock)} low-stock quiz bank topics.")
+    for topic, grade in low_stock:
+        try:
+            quiz_bank.refill(topic, grade, _generate_quiz)
+        except Exception as e:
+            logger.error(f"Quiz bank refill for '{topic}' (grade {grade}) failed: {e}")
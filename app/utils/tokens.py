@@ -0,0 +1,11 @@
+# /mentormind-backend/app/utils/tokens.py
+import math
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of LLM tokens in a text.
+    Uses the common ~4 characters per token heuristic, which is close enough
+    for budgeting prompts without calling the provider's tokenizer.
+    """
+    return math.ceil(len(text) / 4) if text else 0
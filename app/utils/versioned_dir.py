@@ -0,0 +1,77 @@
+# /mentormind-backend/app/utils/versioned_dir.py
+"""
+Helpers for on-disk indexes that are rebuilt as a whole and swapped in atomically.
+
+Each build is written to its own `v<timestamp>` directory and published by
+atomically replacing the `CURRENT` file, so readers in any process either see
+the old version or the new one, never a half-written index.
+"""
+import fcntl
+import os
+import shutil
+import time
+from contextlib import contextmanager
+
+
+def new_version_dir(index_dir: str) -> tuple[str, str]:
+    """Creates an empty version directory and returns `(version, path)`."""
+    version = f"v{time.time_ns()}"
+    path = os.path.join(index_dir, version)
+    os.makedirs(path, exist_ok=True)
+    return version, path
+
+
+def _version_ns(entry: str) -> int | None:
+    try:
+        return int(entry[1:]) if entry.startswith("v") else None
+    except ValueError:
+        return None
+
+
+def publish_version(index_dir: str, version: str):
+    """
+    Makes `version` current. The version it replaces is kept, since another
+    process may still be loading it, and so is any newer directory a
+    concurrent build is still writing; only versions older than the replaced
+    one are removed.
+    """
+    previous = read_current_version(index_dir)
+    current_path = os.path.join(index_dir, "CURRENT")
+    tmp_path = current_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, current_path)
+
+    cutoff = _version_ns(previous) if previous else None
+    if cutoff is None:
+        return
+    # Open memory maps of removed versions stay valid after unlinking
+    for entry in os.listdir(index_dir):
+        entry_ns = _version_ns(entry)
+        if entry_ns is not None and entry_ns < cutoff and entry != version:
+            shutil.rmtree(os.path.join(index_dir, entry), ignore_errors=True)
+
+
+@contextmanager
+def version_lock(index_dir: str):
+    """
+    Serializes builds of one index across the processes on this host, so an
+    incremental update never starts from a version another build is about
+    to replace.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    with open(os.path.join(index_dir, "LOCK"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_current_version(index_dir: str) -> str | None:
+    """Returns the published version name, or None if nothing was built yet."""
+    try:
+        with open(os.path.join(index_dir, "CURRENT"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
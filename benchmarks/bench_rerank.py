@@ -0,0 +1,76 @@
+# /mentormind-backend/benchmarks/bench_rerank.py
+"""
+Benchmarks the cross-encoder reranking stage against plain ANN retrieval.
+
+For each question it builds two prompt contexts from the ingested corpus:
+the top `--baseline-k` retrieved chunks, and the best `--top-n` of
+`--candidates` chunks after reranking. It reports prompt tokens saved
+against the latency the extra retrieval and the rerank pass add.
+
+Usage:
+    python -m benchmarks.bench_rerank --grade 9 --questions questions.txt
+"""
+import argparse
+import time
+
+from app.config import settings
+from app.core.rag_manager import RagManager
+from app.services.reranker import reranker
+from app.utils.tokens import estimate_tokens
+from benchmarks.common import load_questions, percentile, print_table
+
+
+def context_tokens(docs_and_scores) -> int:
+    return estimate_tokens("\n\n".join(doc.page_content for doc, _ in docs_and_scores))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", help="File with one question per line")
+    parser.add_argument("--grade", type=int, default=9)
+    parser.add_argument("--baseline-k", type=int, default=settings.RAG_TOP_K)
+    parser.add_argument("--candidates", type=int, default=settings.RERANK_CANDIDATES)
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=settings.RERANK_BUDGET_MS)
+    args = parser.parse_args()
+
+    RagManager.initialize()
+    reranker.warm_up()
+    manager = RagManager()
+
+    baseline_tokens, reranked_tokens, added_ms, fallbacks = [], [], [], 0
+    for question in load_questions(args.questions):
+        embedding = manager._embed_query(question)
+
+        started = time.perf_counter()
+        baseline = manager._retrieve_documents(question, embedding, args.grade, args.baseline_k)
+        baseline_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        candidates = manager._retrieve_documents(question, embedding, args.grade, args.candidates)
+        reranked = reranker.rerank(question, candidates, top_n=args.top_n, budget_ms=args.budget_ms)
+        reranked_ms = (time.perf_counter() - started) * 1000
+
+        if [doc.id for doc, _ in reranked] == [doc.id for doc, _ in candidates[:args.top_n]] and reranked_ms >= args.budget_ms:
+            fallbacks += 1
+        baseline_tokens.append(context_tokens(baseline))
+        reranked_tokens.append(context_tokens(reranked))
+        added_ms.append(reranked_ms - baseline_ms)
+
+    count = len(baseline_tokens)
+    saved = [b - r for b, r in zip(baseline_tokens, reranked_tokens)]
+    print(f"{count} questions, grade {args.grade}, {args.candidates} candidates -> top {args.top_n}, "
+          f"budget {args.budget_ms:.0f} ms, ANN fallbacks: {fallbacks}\n")
+    print_table(
+        ["metric", "mean", "p50", "p95"],
+        [
+            ["baseline prompt tokens", sum(baseline_tokens) / count, percentile(baseline_tokens, 50), percentile(baseline_tokens, 95)],
+            ["reranked prompt tokens", sum(reranked_tokens) / count, percentile(reranked_tokens, 50), percentile(reranked_tokens, 95)],
+            ["tokens saved", sum(saved) / count, percentile(saved, 50), percentile(saved, 95)],
+            ["added latency (ms)", sum(added_ms) / count, percentile(added_ms, 50), percentile(added_ms, 95)],
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
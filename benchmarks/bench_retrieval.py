@@ -0,0 +1,213 @@
+# /mentormind-backend/benchmarks/bench_retrieval.py
+"""
+Offline retrieval benchmark over a synthetic multi-grade corpus.
+
+A corpus of chunks across grades, subjects and topics is generated from a
+fixed seed and written through `ChromaService.upsert_documents` into a
+temporary Chroma directory. The deterministic hash embedding is used by
+default (EMBEDDING_BACKEND=hash), so nothing is downloaded and the run is
+reproducible in CI. Every query is built from the vocabulary of one chunk
+and asked as a student of that chunk's grade; recall@k is the share of
+queries whose source chunk is among the k chunks `RagManager` retrieves.
+
+For each vector backend, with hybrid retrieval on and off, it reports
+recall@k, p50/p95/p99 latency of query embedding + retrieval, the peak
+Python memory allocated while answering queries (tracemalloc; Chroma's
+native HNSW memory is not visible to it) and the size of the in-memory
+vector data where the backend has one.
+
+Usage:
+    python -m benchmarks.bench_retrieval --chunks-per-topic 40 --queries 300 --k 3 5
+    python -m benchmarks.bench_retrieval --embedding-backend sentence-transformers
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from app.config import settings
+from app.core.rag_manager import RagManager
+from app.core.retriever import ChromaRetriever, QuantizedRetriever
+from app.services.chroma_service import ChromaService
+from app.services.lexical_index import lexical_index
+from app.services.vector_index import QuantizedVectorIndex
+from benchmarks.common import percentile, print_table
+
+TOPICS = {
+    "Physics": {
+        "motion": "velocity acceleration displacement speed distance time graph uniform motion kinematics slope initial final",
+        "force": "force newton mass inertia friction push pull balanced unbalanced momentum impulse collision law",
+        "electricity": "current voltage resistance ohm circuit series parallel charge coulomb ampere conductor resistor power",
+        "energy": "energy work joule kinetic potential conservation power watt efficiency transfer height spring",
+    },
+    "Chemistry": {
+        "atoms": "atom proton neutron electron nucleus shell orbital isotope atomic number mass valence",
+        "reactions": "reaction reactant product catalyst equation balance oxidation reduction exothermic endothermic rate",
+        "acids": "acid base ph indicator neutralization salt hydroxide hydrogen litmus titration alkali",
+    },
+    "Biology": {
+        "cells": "cell membrane nucleus mitochondria cytoplasm organelle ribosome chloroplast vacuole tissue division",
+        "genetics": "gene chromosome dna allele dominant recessive inheritance mutation trait heredity protein",
+    },
+}
+GRADES = [8, 9, 10, 11, 12]
+FILLER = "students example value diagram table chapter section result observe measure explain describe".split()
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "te", "vo", "zi", "pa", "do", "fu"]
+
+
+def pseudo_word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(4))
+
+
+def build_corpus(chunks_per_topic: int, seed: int) -> tuple[list[str], list[str], list[dict], dict]:
+    """
+    Returns ids, documents, metadatas and, per chunk id, the terms a query
+    about that chunk may use.
+    """
+    rng = random.Random(seed)
+    ids, documents, metadatas, terms_by_id = [], [], [], {}
+    for grade in GRADES:
+        for subject, topics in TOPICS.items():
+            for topic, vocabulary in topics.items():
+                vocabulary = vocabulary.split()
+                for chunk_index in range(chunks_per_topic):
+                    topic_terms = rng.sample(vocabulary, 8)
+                    unique_terms = [pseudo_word(rng) for _ in range(2)]
+                    words = topic_terms + unique_terms + rng.sample(FILLER, 6)
+                    rng.shuffle(words)
+                    doc_id = f"g{grade}_{subject.lower()}_{topic}_{chunk_index}"
+                    ids.append(doc_id)
+                    documents.append(" ".join(words) + ".")
+                    metadatas.append({
+                        "grade": grade,
+                        "subject": subject,
+                        "chapter": topic,
+                        "filename": f"{subject.lower()}_{topic}_g{grade}.pdf",
+                        "chunk_index": chunk_index,
+                    })
+                    terms_by_id[doc_id] = (topic_terms, unique_terms)
+    return ids, documents, metadatas, terms_by_id
+
+
+def build_queries(ids: list[str], metadatas: list[dict], terms_by_id: dict, count: int,
+                  seed: int) -> list[tuple[str, int, str]]:
+    """
+    Returns `(question, student_grade, source_chunk_id)` tuples. Half of the
+    questions mention one of the chunk's unique terms; the rest only use topic
+    vocabulary shared with many chunks, which is the harder case.
+    """
+    rng = random.Random(seed + 1)
+    queries = []
+    for row in rng.sample(range(len(ids)), min(count, len(ids))):
+        topic_terms, unique_terms = terms_by_id[ids[row]]
+        words = rng.sample(topic_terms, 4)
+        if rng.random() < 0.5:
+            words = words[:2] + [rng.choice(unique_terms)]
+        queries.append((f"What is the link between {', '.join(words)}?", metadatas[row]["grade"], ids[row]))
+    return queries
+
+
+def seed_corpus(chroma_service: ChromaService, ids, documents, metadatas, batch_size: int = 500):
+    """Writes the corpus through the same upsert path as PDF ingestion."""
+    for start in range(0, len(ids), batch_size):
+        chroma_service.upsert_documents(
+            documents=documents[start:start + batch_size],
+            metadatas=metadatas[start:start + batch_size],
+            ids=ids[start:start + batch_size],
+        )
+
+
+def measure(manager: RagManager, queries, k: int) -> tuple[float, list[float], float]:
+    """Returns recall@k, per-query latencies in ms and peak traced allocation in MB."""
+    for question, grade, _ in queries[:5]:
+        manager._retrieve_context(question, manager._embed_query(question), grade, k)  # Map index files
+
+    hits, latencies = 0, []
+    for question, grade, source_id in queries:
+        started = time.perf_counter()
+        docs = manager._retrieve_context(question, manager._embed_query(question), grade, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += any(doc.id == source_id for doc, _ in docs)
+
+    # Traced separately: tracemalloc slows allocation down and would skew the latencies
+    tracemalloc.start()
+    for question, grade, _ in queries[:50]:
+        manager._retrieve_context(question, manager._embed_query(question), grade, k)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return hits / max(len(queries), 1), latencies, peak / 2**20
+
+
+def run_suite(chroma_service: ChromaService, workdir: str, chunks_per_topic: int, num_queries: int,
+              ks: list[int], seed: int) -> list[list]:
+    """Seeds the corpus, then measures every backend and setting. Returns table rows."""
+    ids, documents, metadatas, terms_by_id = build_corpus(chunks_per_topic, seed)
+    seed_corpus(chroma_service, ids, documents, metadatas)
+    lexical_index.rebuild_from_chroma(chroma_service)
+    queries = build_queries(ids, metadatas, terms_by_id, num_queries, seed)
+
+    retrievers = {"chroma": ChromaRetriever(chroma_service)}
+    for dtype in ("int8", "float16"):
+        index = QuantizedVectorIndex(os.path.join(workdir, f"vector_{dtype}"), dtype=dtype)
+        index.rebuild_from_chroma(chroma_service)
+        retrievers[f"quantized {dtype}"] = QuantizedRetriever(index, chroma_service)
+
+    manager = RagManager()
+    hybrid_setting = settings.HYBRID_RETRIEVAL_ENABLED
+    rows = []
+    try:
+        for name, retriever in retrievers.items():
+            RagManager._retriever = retriever
+            vector_mb = "n/a"
+            if isinstance(retriever, QuantizedRetriever):
+                retriever.vector_index.search(retriever.embed_query("warm up"), 1)  # Load the matrices
+                vector_mb = f"{sum(m.nbytes for m in retriever.vector_index._matrices.values()) / 2**20:.2f} MB"
+            for hybrid in (False, True):
+                settings.HYBRID_RETRIEVAL_ENABLED = hybrid
+                for k in ks:
+                    recall, latencies, peak_mb = measure(manager, queries, k)
+                    rows.append([
+                        name, "on" if hybrid else "off", k, recall,
+                        percentile(latencies, 50), percentile(latencies, 95), percentile(latencies, 99),
+                        peak_mb, vector_mb,
+                    ])
+    finally:
+        settings.HYBRID_RETRIEVAL_ENABLED = hybrid_setting
+        RagManager.shutdown()
+        RagManager._retriever = None
+        for retriever in retrievers.values():
+            retriever.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks-per-topic", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, nargs="+", default=[settings.HYBRID_TOP_K, settings.RAG_TOP_K])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--embedding-backend", default="hash", choices=["hash", "sentence-transformers"])
+    args = parser.parse_args()
+
+    # Keep every store of the run out of data/
+    workdir = tempfile.mkdtemp(prefix="bench_retrieval_")
+    settings.CHROMA_PERSIST_DIRECTORY = os.path.join(workdir, "chroma")
+    settings.EMBEDDING_BACKEND = args.embedding_backend
+    settings.EMBEDDING_BATCHING_ENABLED = False  # Queries run one at a time; the batch window would only add wait
+    settings.SEMANTIC_CACHE_ENABLED = False
+    settings.RERANK_ENABLED = False
+    lexical_index.index_dir = os.path.join(workdir, "lexical")
+
+    rows = run_suite(ChromaService(), workdir, args.chunks_per_topic, args.queries, args.k, args.seed)
+    num_chunks = len(GRADES) * sum(len(topics) for topics in TOPICS.values()) * args.chunks_per_topic
+    print(f"{num_chunks} chunks, {args.queries} queries, {args.embedding_backend} embeddings, workdir {workdir}\n")
+    print_table(
+        ["backend", "hybrid", "k", "recall@k", "p50 ms", "p95 ms", "p99 ms", "peak alloc MB", "vector memory"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
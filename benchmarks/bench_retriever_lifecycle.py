@@ -0,0 +1,174 @@
+# /mentormind-backend/benchmarks/bench_retriever_lifecycle.py
+"""
+Measures what building the retriever once per process saves on every question.
+
+A synthetic corpus (see bench_retrieval) is seeded into a temporary Chroma
+directory. Each question is timed from the start of the request to its first
+answer chunk, in two modes:
+
+- per request (before): the baseline request path. A new LangChain
+  `SentenceTransformerEmbeddings` and a new LangChain `Chroma` wrapper are
+  built for every question, as `_get_retriever` used to do, over a copy of
+  the corpus in one unsharded collection filtered by grade
+- lifespan (after): `RagManager.get_answer_stream` with one retriever,
+  built before the first question and reused
+
+The fake LLM answers with no time-to-first-token or per-token delay, and
+hybrid retrieval, reranking and the semantic cache are off, so the timing
+covers embedding-model construction, query embedding, the vector query and
+prompt assembly. Only `--embedding-backend sentence-transformers` measures
+the baseline as it ran in production: LangChain loads a new MiniLM model for
+every `SentenceTransformerEmbeddings`. With the default hash embedding the
+per-request wrapper is nearly free to construct.
+
+Usage:
+    python -m benchmarks.bench_retriever_lifecycle --questions 300
+    python -m benchmarks.bench_retriever_lifecycle --embedding-backend sentence-transformers
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from langchain_community.embeddings import SentenceTransformerEmbeddings
+from langchain_community.vectorstores import Chroma
+from langchain_core.embeddings import Embeddings
+
+from app.config import settings
+from app.core.rag_manager import RagManager
+from app.core.retriever import ChromaRetriever
+from app.services.chroma_service import ChromaService
+from benchmarks.bench_retrieval import GRADES, TOPICS, build_corpus, build_queries, seed_corpus
+from benchmarks.common import percentile, print_table
+
+
+BASELINE_COLLECTION = "bench_baseline_unsharded"
+
+
+class HashEmbeddings(Embeddings):
+    """LangChain embeddings over the hash embedding function, for offline runs of the baseline."""
+
+    def __init__(self):
+        self.embedding_function = ChromaService.create_embedding_function()
+
+    def embed_documents(self, texts):
+        return [vector.tolist() for vector in self.embedding_function(texts)]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def build_retriever(chroma_service: ChromaService) -> ChromaRetriever:
+    retriever = ChromaRetriever(chroma_service)
+    retriever.embedding_function = ChromaService.create_embedding_function()
+    return retriever
+
+
+def seed_baseline_collection(chroma_service: ChromaService, ids, documents, metadatas, batch_size: int = 500):
+    """Copies the corpus into one collection, the layout the baseline queried."""
+    collection = chroma_service._client.get_or_create_collection(
+        name=BASELINE_COLLECTION,
+        embedding_function=chroma_service.get_embedding_function(),
+        metadata={"hnsw:space": "cosine"},
+    )
+    for start in range(0, len(ids), batch_size):
+        collection.upsert(
+            documents=documents[start:start + batch_size],
+            metadatas=metadatas[start:start + batch_size],
+            ids=ids[start:start + batch_size],
+        )
+
+
+def baseline_first_chunk(manager: RagManager, chroma_service: ChromaService, question: str, grade: int) -> str:
+    """The baseline `get_answer_stream` up to its first chunk, with its per-request retriever."""
+    if settings.EMBEDDING_BACKEND == "hash":
+        lc_embedding_function = HashEmbeddings()
+    else:
+        lc_embedding_function = SentenceTransformerEmbeddings(model_name=settings.EMBEDDING_MODEL_NAME)
+    vectorstore = Chroma(
+        client=chroma_service._client,
+        collection_name=BASELINE_COLLECTION,
+        embedding_function=lc_embedding_function,
+    )
+    k = manager._default_top_k()
+    retrieved_docs = vectorstore.similarity_search_with_relevance_scores(query=question, k=k, filter={"grade": grade})
+    if not retrieved_docs:
+        retrieved_docs = vectorstore.similarity_search_with_relevance_scores(query=question, k=k)
+    context_text = "\n\n".join(doc.page_content for doc, _ in retrieved_docs)
+    rag_chain = manager.answer_prompt | manager.llm | manager.str_output_parser
+    stream = rag_chain.stream({"context": context_text, "question": question})
+    chunk = next(stream)
+    stream.close()
+    return chunk
+
+
+def time_to_first_chunk(manager: RagManager, question: str, grade: int) -> float:
+    started = time.perf_counter()
+    stream = manager.get_answer_stream(question, grade)
+    next(stream)
+    elapsed = (time.perf_counter() - started) * 1000
+    stream.close()
+    return elapsed
+
+
+def measure_baseline(manager: RagManager, chroma_service: ChromaService, queries) -> list[float]:
+    for question, grade, _ in queries[:5]:
+        baseline_first_chunk(manager, chroma_service, question, grade)  # Warm Chroma's segment caches
+    latencies = []
+    for question, grade, _ in queries:
+        started = time.perf_counter()
+        baseline_first_chunk(manager, chroma_service, question, grade)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def measure_lifespan(manager: RagManager, chroma_service: ChromaService, queries) -> list[float]:
+    RagManager._retriever = build_retriever(chroma_service)
+    for question, grade, _ in queries[:5]:
+        time_to_first_chunk(manager, question, grade)  # Warm Chroma's segment caches
+    return [time_to_first_chunk(manager, question, grade) for question, grade, _ in queries]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks-per-topic", type=int, default=40)
+    parser.add_argument("--questions", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--embedding-backend", default="hash", choices=["hash", "sentence-transformers"])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_retriever_lifecycle_")
+    settings.CHROMA_PERSIST_DIRECTORY = os.path.join(workdir, "chroma")
+    settings.EMBEDDING_BACKEND = args.embedding_backend
+    settings.EMBEDDING_BATCHING_ENABLED = False
+    settings.LLM_BACKEND = "fake"
+    settings.FAKE_LLM_TTFT_MS = 0
+    settings.FAKE_LLM_TOKENS_PER_SECOND = 1_000_000  # Closing a LangChain stream drains it
+    settings.SEMANTIC_CACHE_ENABLED = False
+    settings.HYBRID_RETRIEVAL_ENABLED = False
+    settings.RERANK_ENABLED = False
+
+    chroma_service = ChromaService()
+    ids, documents, metadatas, terms_by_id = build_corpus(args.chunks_per_topic, args.seed)
+    seed_corpus(chroma_service, ids, documents, metadatas)
+    seed_baseline_collection(chroma_service, ids, documents, metadatas)
+    queries = build_queries(ids, metadatas, terms_by_id, args.questions, args.seed)
+
+    manager = RagManager()
+    rows = []
+    try:
+        for name, measure in (("built per request (before)", measure_baseline),
+                              ("built once in lifespan (after)", measure_lifespan)):
+            latencies = measure(manager, chroma_service, queries)
+            rows.append([name, percentile(latencies, 50), percentile(latencies, 95), percentile(latencies, 99)])
+    finally:
+        RagManager.shutdown()
+        RagManager._retriever = None
+
+    num_chunks = len(GRADES) * sum(len(topics) for topics in TOPICS.values()) * args.chunks_per_topic
+    print(f"{num_chunks} chunks, {len(queries)} questions, {args.embedding_backend} embeddings, fake LLM\n")
+    print_table(["retriever", "p50 ms", "p95 ms", "p99 ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# /mentormind-backend/benchmarks/bench_service_container.py
+"""
+Measures what the service container saves on every request.
+
+Compares building the request's services the old way, a `QuizService()`
+(which builds its own `RagManager`) plus a `RagManager()`, against
+resolving them from a `ServiceContainer` built once. It reports p50/p95/p99
+latency and the Python memory allocated per request (tracemalloc). Building
+a `RagManager` creates an LLM client, so GOOGLE_API_KEY must be set or
+LLM_BACKEND=fake must be used.
+
+Usage:
+    LLM_BACKEND=fake EMBEDDING_BACKEND=hash python -m benchmarks.bench_service_container --requests 500
+"""
+import argparse
+import time
+import tracemalloc
+
+from app.core.rag_manager import RagManager
+from app.core.services import ServiceContainer
+from app.services.quiz_service import QuizService
+from benchmarks.common import percentile, print_table
+
+
+def per_request():
+    return QuizService(), RagManager()
+
+
+def measure(resolve, requests: int) -> list:
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        resolve()
+        latencies.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    kept = [resolve() for _ in range(min(requests, 50))]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocated_kib = (after - before) / len(kept) / 1024
+    return [percentile(latencies, 50), percentile(latencies, 95), percentile(latencies, 99), allocated_kib]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    container = ServiceContainer()
+    rows = [
+        ["per-request construction"] + measure(per_request, args.requests),
+        ["service container"] + measure(lambda: (container.quiz_service, container.rag_manager), args.requests),
+    ]
+    print_table(["services", "p50 ms", "p95 ms", "p99 ms", "KiB retained/request"], rows)
+
+
+if __name__ == "__main__":
+    main()
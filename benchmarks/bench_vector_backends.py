@@ -0,0 +1,96 @@
+# /mentormind-backend/benchmarks/bench_vector_backends.py
+"""
+Compares the Chroma HNSW path with the quantized in-memory vector index.
+
+Ground truth is an exact float32 cosine search over every embedding stored
+across the Chroma shards, restricted to the query's grade. Queries are the
+stored chunk embeddings with Gaussian noise added, so no embedding model is
+needed. For each backend it reports recall@k against the ground truth,
+p50/p95 query latency and the size of the vector data held in memory.
+
+Usage:
+    python -m benchmarks.bench_vector_backends --queries 200 --k 5
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.chroma_service import ChromaService
+from app.services.vector_index import QuantizedVectorIndex
+from benchmarks.common import percentile, print_table
+
+
+def exact_top_k(vectors: np.ndarray, grades: np.ndarray, query: np.ndarray, grade: int, k: int) -> set:
+    rows = np.flatnonzero(grades == grade)
+    scores = vectors[rows] @ query
+    return set(rows[np.argsort(-scores)[:k]].tolist())
+
+
+def run_backend(search, queries, truths, ids, k) -> tuple[float, list[float]]:
+    recalls, latencies = [], []
+    for (query, grade), truth in zip(queries, truths):
+        started = time.perf_counter()
+        result_ids = search(query, grade)
+        latencies.append((time.perf_counter() - started) * 1000)
+        expected = {ids[row] for row in truth}
+        recalls.append(len(expected & set(result_ids)) / max(len(expected), 1))
+    return sum(recalls) / len(recalls), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    chroma_service = ChromaService()
+    contents = chroma_service.get_all(include=["embeddings", "documents", "metadatas"])
+    ids = contents["ids"]
+    if not ids:
+        raise SystemExit("The vector store is empty; ingest some PDFs first.")
+    vectors = np.asarray(contents["embeddings"], dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    grades = np.asarray([(m or {}).get("grade", -1) for m in contents["metadatas"]])
+
+    rng = np.random.default_rng(args.seed)
+    queries, truths = [], []
+    for row in rng.integers(0, len(ids), size=args.queries):
+        query = vectors[row] + rng.normal(0, args.noise, size=vectors.shape[1]).astype(np.float32)
+        query /= np.linalg.norm(query)
+        queries.append((query, int(grades[row])))
+        truths.append(exact_top_k(vectors, grades, query, int(grades[row]), args.k))
+
+    rows = []
+
+    def chroma_search(query, grade):
+        hits = []
+        for shard in chroma_service.get_shards(grade=grade):
+            result = shard.query(query_embeddings=[query.tolist()], n_results=args.k, include=["distances"])
+            hits.extend(zip(result["distances"][0], result["ids"][0]))
+        return [doc_id for _, doc_id in sorted(hits)[:args.k]]
+
+    recall, latencies = run_backend(chroma_search, queries, truths, ids, args.k)
+    rows.append(["chroma (hnsw, grade shards)", recall, percentile(latencies, 50), percentile(latencies, 95), "n/a"])
+
+    for dtype in ("int8", "float16"):
+        index = QuantizedVectorIndex(tempfile.mkdtemp(prefix=f"bench_{dtype}_"), dtype=dtype)
+        index.build(ids, vectors, contents["documents"], contents["metadatas"])
+        index.search(queries[0][0], args.k, queries[0][1])  # Map the files before timing
+
+        def quantized_search(query, grade, index=index):
+            return [doc.id for doc, _ in index.search(query, args.k, grade)]
+
+        recall, latencies = run_backend(quantized_search, queries, truths, ids, args.k)
+        memory_mb = sum(matrix.nbytes for matrix in index._matrices.values()) / 2**20
+        rows.append([f"quantized {dtype}", recall, percentile(latencies, 50), percentile(latencies, 95), f"{memory_mb:.2f} MB"])
+
+    print(f"{len(ids)} chunks, {args.queries} queries, k={args.k}\n")
+    print_table(["backend", f"recall@{args.k}", "p50 ms", "p95 ms", "vector memory"], rows)
+
+
+if __name__ == "__main__":
+    main()
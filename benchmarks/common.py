@@ -0,0 +1,45 @@
+# /mentormind-backend/benchmarks/common.py
+"""
+Small helpers shared by the benchmark scripts.
+"""
+import math
+
+DEFAULT_QUESTIONS = [
+    "What is Newton's second law of motion?",
+    "How do you calculate the acceleration of a falling object?",
+    "What is the unit of force?",
+    "Explain the difference between speed and velocity.",
+    "What is Ohm's law?",
+    "How is work related to energy?",
+    "What happens to the resistance of a wire when its length doubles?",
+    "Define momentum and give its SI unit.",
+    "Why does a ball thrown upwards come back down?",
+    "What is the law of conservation of energy?",
+]
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile, `p` in [0, 100]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def print_table(headers: list[str], rows: list[list]):
+    """Prints rows as an aligned plain-text table."""
+    cells = [[str(h) for h in headers]] + [[f"{c:.2f}" if isinstance(c, float) else str(c) for c in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    for index, row in enumerate(cells):
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+        if index == 0:
+            print("  ".join("-" * width for width in widths))
+
+
+def load_questions(path: str | None) -> list[str]:
+    """Reads one question per line, or falls back to a built-in Physics set."""
+    if not path:
+        return DEFAULT_QUESTIONS
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
@@ -0,0 +1,211 @@
+# /mentormind-backend/benchmarks/load_ask.py
+"""
+Load generator for the streaming `/api/rag/ask` pipeline.
+
+Starts the FastAPI app under uvicorn in this process, against a throwaway
+SQLite database and Chroma directory seeded with the synthetic corpus from
+`bench_retrieval`. The fake LLM and the hash embedding are used, so the run
+is offline and measures the app's own overhead. N concurrent students then
+sign up and ask questions back to back.
+
+Client side it reports time to first byte (the conversation line), time to
+the first answer chunk, chunk inter-arrival and throughput. Server side it
+reads the app's metrics registry: message write latency and event-loop lag.
+
+Usage:
+    python -m benchmarks.load_ask --students 50 --questions 5 --ttft-ms 300 --tokens-per-second 50
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+
+import httpx
+
+from benchmarks.common import DEFAULT_QUESTIONS, percentile, print_table
+
+
+def configure_environment(workdir: str, args):
+    """Points every store at `workdir` and selects the offline backends. Must run before app imports."""
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'load.db')}",
+        "CHROMA_PERSIST_DIRECTORY": os.path.join(workdir, "chroma"),
+        "LEXICAL_INDEX_DIR": os.path.join(workdir, "lexical"),
+        "QUANTIZED_INDEX_DIR": os.path.join(workdir, "vector_index"),
+        "LLM_BACKEND": "fake",
+        "EMBEDDING_BACKEND": "hash",
+        "FAKE_LLM_TTFT_MS": str(args.ttft_ms),
+        "FAKE_LLM_TOKENS_PER_SECOND": str(args.tokens_per_second),
+        "FAKE_LLM_ANSWER_TOKENS": str(args.answer_tokens),
+        "SEMANTIC_CACHE_ENABLED": str(args.cache).lower(),
+        "RATE_LIMIT_ENABLED": str(args.rate_limit).lower(),
+        "RATE_LIMIT_BACKEND": "memory",
+    })
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int):
+    """Runs the app under uvicorn on a background thread; returns the server once it accepts requests."""
+    import uvicorn
+    from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise SystemExit("The server failed to start.")
+        time.sleep(0.05)
+    return server, thread
+
+
+def seed_corpus(chunks_per_topic: int):
+    from app.services.chroma_service import ChromaService
+    from app.services.lexical_index import lexical_index
+    from benchmarks.bench_retrieval import build_corpus, seed_corpus as upsert_corpus
+
+    chroma_service = ChromaService()
+    ids, documents, metadatas, _ = build_corpus(chunks_per_topic, seed=7)
+    upsert_corpus(chroma_service, ids, documents, metadatas)
+    lexical_index.rebuild_from_chroma(chroma_service)
+
+
+async def sign_up(client: httpx.AsyncClient, number: int) -> str:
+    response = await client.post("/api/auth/signup", json={
+        "name": f"Load Student {number}",
+        "email": f"load-student-{number}@example.com",
+        "password": "load-test-password",
+        "role": "student",
+    })
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def student_session(client: httpx.AsyncClient, token: str, questions: list[str], results: dict,
+                          sse: bool = False):
+    conversation_id = None
+    for question in questions:
+        started = time.perf_counter()
+        first_byte = first_chunk = last_chunk = None
+        headers = {"Authorization": f"Bearer {token}"}
+        if sse:
+            headers["Accept"] = "text/event-stream"
+        async with client.stream("POST", "/api/rag/ask", headers=headers,
+                                 json={"question": question, "conversation_id": conversation_id}) as response:
+            if response.status_code != 200:
+                results["shed" if response.status_code == 429 else "errors"] += 1
+                await response.aread()
+                continue
+            async for line in response.aiter_lines():
+                now = time.perf_counter()
+                if not line or (sse and not line.startswith("data: ")):
+                    continue  # SSE event names, heartbeats and message separators
+                if first_byte is None:
+                    first_byte = now
+                event = json.loads(line[len("data: "):] if sse else line)
+                if sse and "text" in event:
+                    event = {"message_chunk": event["text"]}
+                if "conversation_id" in event:
+                    conversation_id = event["conversation_id"]
+                elif "message_chunk" in event:
+                    if first_chunk is None:
+                        first_chunk = now
+                    else:
+                        results["inter_arrival_ms"].append((now - last_chunk) * 1000)
+                    last_chunk = now
+                    results["chunks"] += 1
+                elif "error" in event:
+                    results["errors"] += 1
+        if first_byte is not None:
+            results["ttfb_ms"].append((first_byte - started) * 1000)
+        if first_chunk is not None:
+            results["first_chunk_ms"].append((first_chunk - started) * 1000)
+            results["answers"] += 1
+
+
+async def run_load(base_url: str, students: int, questions_per_student: int, on_ready,
+                   sse: bool = False) -> tuple[dict, float]:
+    results = {"ttfb_ms": [], "first_chunk_ms": [], "inter_arrival_ms": [], "chunks": 0, "answers": 0, "shed": 0, "errors": 0}
+    limits = httpx.Limits(max_connections=students + 5, max_keepalive_connections=students + 5)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        tokens = [await sign_up(client, number) for number in range(students)]
+        on_ready()
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            student_session(
+                client, token,
+                [DEFAULT_QUESTIONS[(number + i) % len(DEFAULT_QUESTIONS)] for i in range(questions_per_student)],
+                results,
+                sse,
+            )
+            for number, token in enumerate(tokens)
+        ))
+    return results, time.perf_counter() - started
+
+
+def latency_row(name: str, values: list[float]) -> list:
+    return [name, len(values), percentile(values, 50), percentile(values, 95), percentile(values, 99),
+            max(values) if values else 0.0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=3, help="Questions asked by each student, back to back")
+    parser.add_argument("--ttft-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--answer-tokens", type=int, default=120)
+    parser.add_argument("--chunks-per-topic", type=int, default=10)
+    parser.add_argument("--cache", action="store_true", help="Leave the semantic answer cache enabled")
+    parser.add_argument("--rate-limit", action="store_true", help="Leave per-student request budgets enabled")
+    parser.add_argument("--sse", action="store_true", help="Ask for Server-Sent Events instead of NDJSON")
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # One line per request otherwise
+    workdir = tempfile.mkdtemp(prefix="load_ask_")
+    configure_environment(workdir, args)
+    seed_corpus(args.chunks_per_topic)
+    port = free_port()
+    server, thread = start_server(port)
+
+    from app.core.metrics import metrics
+    try:
+        # Server metrics are reset once every student has signed up, so only the asks are measured
+        results, elapsed = asyncio.run(
+            run_load(f"http://127.0.0.1:{port}", args.students, args.questions, on_ready=metrics.reset, sse=args.sse)
+        )
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+    server_metrics = metrics.snapshot()["latencies"]
+
+    print(f"{args.students} students x {args.questions} questions, fake LLM TTFT {args.ttft_ms} ms at "
+          f"{args.tokens_per_second} tokens/s, workdir {workdir}\n")
+    rows = [
+        latency_row("TTFB (conversation line)", results["ttfb_ms"]),
+        latency_row("time to first answer chunk", results["first_chunk_ms"]),
+        latency_row("chunk inter-arrival", results["inter_arrival_ms"]),
+    ]
+    for name, label in (("db_write_ms", "message write (server)"), ("message_flush_ms", "message batch flush (server)"),
+                        ("db_pool_checkout_ms", "db pool checkout (server)"),
+                        ("event_loop_lag_ms", "event-loop lag (server)")):
+        series = server_metrics.get(name)
+        if series:
+            rows.append([label, series["count"], series["p50"], series["p95"], series["p99"], series["max"]])
+    print_table(["metric (ms)", "samples", "p50", "p95", "p99", "max"], rows)
+    print(f"\nthroughput: {results['answers'] / elapsed:.2f} answers/s, {results['chunks'] / elapsed:.1f} chunks/s "
+          f"over {elapsed:.1f} s; shed (429): {results['shed']}; errors: {results['errors']}")
+
+
+if __name__ == "__main__":
+    main()
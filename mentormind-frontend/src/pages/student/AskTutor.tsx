@@ -26,6 +26,8 @@ const AskTutor: React.FC = () => {
   const [question, setQuestion] = useState("");
   const [loadingAnswer, setLoadingAnswer] = useState(false);
   const [loadingHistory, setLoadingHistory] = useState(true);
+  const [olderCursor, setOlderCursor] = useState<string | null>(null);
+  const [conversationsCursor, setConversationsCursor] = useState<string | null>(null);
 
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
@@ -36,6 +38,7 @@ const AskTutor: React.FC = () => {
     try {
       const response = await axiosClient.get<Conversation[]>("/rag/conversations");
       setConversations(response.data);
+      setConversationsCursor(response.headers["x-next-cursor"] ?? null);
       if (response.data.length > 0 && !currentConversationId) {
         // Select the most recent conversation if none is selected
         setCurrentConversationId(response.data[0].id);
@@ -52,6 +55,23 @@ const AskTutor: React.FC = () => {
     }
   };
 
+  const loadMoreConversations = async () => {
+    if (!conversationsCursor) return;
+    try {
+      const response = await axiosClient.get<Conversation[]>("/rag/conversations", {
+        params: { cursor: conversationsCursor },
+      });
+      setConversations((prev) => {
+        const seen = new Set(prev.map((conv) => conv.id));
+        return [...prev, ...response.data.filter((conv) => !seen.has(conv.id))];
+      });
+      setConversationsCursor(response.headers["x-next-cursor"] ?? null);
+    } catch (error) {
+      console.error("Failed to load more conversations:", error);
+      toast.error("Failed to load older chats.");
+    }
+  };
+
   const fetchMessages = async (conversationId: number) => {
     setLoadingHistory(true);
     try {
@@ -59,15 +79,32 @@ const AskTutor: React.FC = () => {
         `/rag/conversations/${conversationId}/messages`
       );
       setMessages(response.data);
+      setOlderCursor(response.headers["x-prev-cursor"] ?? null);
     } catch (error) {
       console.error(`Failed to fetch messages for conversation ${conversationId}:`, error);
       toast.error("Failed to load messages for this chat.");
       setMessages([]);
+      setOlderCursor(null);
     } finally {
       setLoadingHistory(false);
     }
   };
 
+  const loadOlderMessages = async () => {
+    if (!currentConversationId || !olderCursor) return;
+    try {
+      const response = await axiosClient.get<Message[]>(
+        `/rag/conversations/${currentConversationId}/messages`,
+        { params: { before: olderCursor } }
+      );
+      setMessages((prev) => [...response.data, ...prev]);
+      setOlderCursor(response.headers["x-prev-cursor"] ?? null);
+    } catch (error) {
+      console.error("Failed to load earlier messages:", error);
+      toast.error("Failed to load earlier messages.");
+    }
+  };
+
   useEffect(() => {
     fetchConversations();
   }, []);
@@ -77,6 +114,7 @@ const AskTutor: React.FC = () => {
       fetchMessages(currentConversationId);
     } else {
       setMessages([]); // Clear messages if no conversation is selected
+      setOlderCursor(null);
     }
   }, [currentConversationId]);
 
@@ -87,6 +125,7 @@ const AskTutor: React.FC = () => {
   const startNewChat = () => {
     setCurrentConversationId(null);
     setMessages([]);
+    setOlderCursor(null);
     setQuestion("");
     toast.success("Started a new chat!");
   };
@@ -223,7 +262,8 @@ const AskTutor: React.FC = () => {
           ) : conversations.length === 0 ? (
             <p className="p-4 text-gray-500">No conversations yet. Start a new one!</p>
           ) : (
-            conversations.map((conv) => (
+            <>
+            {conversations.map((conv) => (
               <div
                 key={conv.id}
                 onClick={() => selectConversation(conv.id)}
@@ -238,7 +278,16 @@ const AskTutor: React.FC = () => {
                   {format(new Date(conv.updated_at), "MMM d, yyyy HH:mm")}
                 </p>
               </div>
-            ))
+            ))}
+            {conversationsCursor && (
+              <button
+                onClick={loadMoreConversations}
+                className="w-full p-3 text-sm text-gray-600 hover:text-black underline"
+              >
+                Load older chats
+              </button>
+            )}
+            </>
           )}
         </div>
       </div>
@@ -268,7 +317,15 @@ const AskTutor: React.FC = () => {
           ) : messages.length === 0 && currentConversationId !== null ? (
             <p className="text-center text-gray-500">No messages in this conversation yet. Ask a question!</p>
           ) : (
-            messages.map((msg) => (
+            <>
+            {olderCursor && (
+              <div className="text-center">
+                <button onClick={loadOlderMessages} className="text-sm text-gray-600 hover:text-black underline">
+                  Load earlier messages
+                </button>
+              </div>
+            )}
+            {messages.map((msg) => (
               <div
                 key={msg.id}
                 className={`flex ${
@@ -289,7 +346,8 @@ const AskTutor: React.FC = () => {
                   </p>
                 </div>
               </div>
-            ))
+            ))}
+            </>
           )}
           <div ref={messagesEndRef} />
         </div>
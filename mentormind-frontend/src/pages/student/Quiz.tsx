@@ -12,9 +12,18 @@ const LoadingSpinner: React.FC = () => (
 interface QuizQuestion {
   question_text: string;
   options: string[];
-  correct_answer: string;
 }
 
+// Fisher-Yates; the server returns questions in a fixed order
+const shuffle = <T,>(items: T[]): T[] => {
+  const shuffled = [...items];
+  for (let i = shuffled.length - 1; i > 0; i--) {
+    const j = Math.floor(Math.random() * (i + 1));
+    [shuffled[i], shuffled[j]] = [shuffled[j], shuffled[i]];
+  }
+  return shuffled;
+};
+
 interface QuizResult {
   score: number;
   feedback: string;
@@ -22,6 +31,7 @@ interface QuizResult {
 
 const Quiz: React.FC = () => {
   const [quiz, setQuiz] = useState<QuizQuestion[] | null>(null);
+  const [quizId, setQuizId] = useState<number | null>(null);
   const [selectedAnswers, setSelectedAnswers] = useState<Record<string, string>>({});
   const [quizResult, setQuizResult] = useState<QuizResult | null>(null);
   const [loading, setLoading] = useState(false);
@@ -40,6 +50,7 @@ const Quiz: React.FC = () => {
     
     setLoading(true);
     setQuiz(null);
+    setQuizId(null);
     setQuizResult(null);
     setSelectedAnswers({});
     
@@ -49,8 +60,9 @@ const Quiz: React.FC = () => {
         grade: Number(grade),
         num_questions: Number(numQuestions),
       });
-      if (response.data && response.data.questions) {
-        setQuiz(response.data.questions);
+      if (response.data && response.data.questions && response.data.quiz_id) {
+        setQuiz(shuffle(response.data.questions));
+        setQuizId(response.data.quiz_id);
         toast.success('Quiz generated successfully!');
       } else {
         throw new Error("Invalid quiz format from server.");
@@ -67,14 +79,13 @@ const Quiz: React.FC = () => {
   };
 
   const submitQuiz = async () => {
-    if (!quiz) return;
+    if (!quiz || !quizId) return;
     
     setLoading(true);
     try {
+      // The server grades the answers against the stored quiz
       const submissionPayload = {
-        topic,
-        grade: Number(grade),
-        questions: quiz,
+        quiz_id: quizId,
         answers: selectedAnswers,
       };
       
@@ -91,6 +102,7 @@ const Quiz: React.FC = () => {
   
   const resetQuiz = () => {
     setQuiz(null);
+    setQuizId(null);
     setQuizResult(null);
     setSelectedAnswers({});
     setTopic('');
@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+# /mentormind-backend/migrate_chroma.py
+"""
+Moves chunks from the legacy single Chroma collection into per (grade, subject) shards.
+
+Usage:
+    python migrate_chroma.py                  # copy, keeping the legacy collection
+    python migrate_chroma.py --delete-legacy  # copy, then delete the copied chunks
+"""
+import argparse
+import logging
+
+from app.services.chroma_service import ChromaService
+from app.services.lexical_index import lexical_index
+from app.services.vector_index import quantized_vector_index
+from app.config import settings
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--delete-legacy", action="store_true",
+                        help="Delete chunks from the legacy collection once they are copied")
+    args = parser.parse_args()
+
+    chroma_service = ChromaService()
+    moved = chroma_service.migrate_legacy_collection(batch_size=args.batch_size, delete_legacy=args.delete_legacy)
+
+    # Rebuild the derived indexes so they read from the shards
+    lexical_index.rebuild_from_chroma(chroma_service)
+    if settings.VECTOR_BACKEND == "quantized":
+        quantized_vector_index.rebuild_from_chroma(chroma_service)
+    print(f"Moved {moved} chunks into {len(chroma_service.get_shards())} shards.")
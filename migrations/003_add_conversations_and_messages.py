@@ -3,8 +3,13 @@ from peewee import *
 from app.db.base import database
 from app.db.models import User, Conversation # Import actual models
 
-def migrate(migrator, database, **kwargs):
-    @migrator.create_table
+def migrate(migrator, database, fake=False, **kwargs):
+    # 001_initial already creates both tables on new databases. When peewee_migrate
+    # replays migrations (fake) to rebuild its model state, `database` is a stand-in.
+    if fake or (database.table_exists('conversation') and database.table_exists('message')):
+        return
+
+    @migrator.create_model
     class Conversation(Model):
         id = AutoField()
         student = ForeignKeyField(
@@ -18,7 +23,7 @@ def migrate(migrator, database, **kwargs):
         class Meta:
             database = database
 
-    @migrator.create_table
+    @migrator.create_model
     class Message(Model):
         id = AutoField()
         conversation = ForeignKeyField(
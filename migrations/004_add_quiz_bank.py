@@ -0,0 +1,32 @@
+"""Peewee migration: 004_add_quiz_bank.py"""
+
+import datetime as dt
+import peewee as pw
+from peewee_migrate import Migrator
+
+
+def migrate(migrator: Migrator, database: pw.Database, fake=False, **kwargs):
+    """Adds the pre-generated quiz question bank."""
+
+    @migrator.create_model
+    class QuizBankQuestion(pw.Model):
+        id = pw.AutoField()
+        topic = pw.CharField(max_length=255)
+        grade = pw.IntegerField()
+        question_text = pw.TextField()
+        options = pw.TextField()
+        correct_answer = pw.CharField(max_length=255)
+        fingerprint = pw.CharField(max_length=255)
+        times_served = pw.IntegerField(default=0)
+        created_at = pw.DateTimeField(default=dt.datetime.now)
+
+        class Meta:
+            table_name = "quizbankquestion"
+            indexes = (
+                (('topic', 'grade', 'fingerprint'), True),
+                (('topic', 'grade', 'times_served'), False),
+            )
+
+
+def rollback(migrator: Migrator, database: pw.Database, fake=False, **kwargs):
+    migrator.remove_model('quizbankquestion')
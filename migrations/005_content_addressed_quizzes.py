@@ -0,0 +1,66 @@
+"""Peewee migration: 005_content_addressed_quizzes.py"""
+
+import datetime as dt
+import json
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+from app.services.quiz_store import quiz_hash
+
+
+def migrate(migrator: Migrator, database: pw.Database, fake=False, **kwargs):
+    """
+    Stores each quiz once under its content hash and points attempts at it.
+    Every distinct question set found in existing attempts becomes one quiz.
+    """
+    migrator.add_fields(
+        'quiz',
+        content_hash=pw.CharField(max_length=255, null=True, unique=True),
+        topic=pw.CharField(max_length=255, null=True),
+        grade=pw.IntegerField(null=True),
+        created_at=pw.DateTimeField(default=dt.datetime.now),
+    )
+    migrator.drop_not_null('quiz', 'lesson')
+    migrator.add_fields(
+        'studentquizattempt',
+        quiz=pw.ForeignKeyField(migrator.orm['quiz'], field='id', backref='attempts', null=True),
+    )
+    migrator.run(_deduplicate_quizzes, database)
+    migrator.remove_fields('studentquizattempt', 'questions')
+
+
+def _deduplicate_quizzes(database: pw.Database):
+    quiz = pw.Table('quiz', ('id', 'content_hash', 'topic', 'grade', 'questions', 'created_at')).bind(database)
+    attempt = pw.Table('studentquizattempt', ('id', 'quiz_id', 'topic', 'grade', 'questions')).bind(database)
+
+    # Quizzes stored before content hashing
+    for quiz_id, questions in quiz.select(quiz.id, quiz.questions).where(quiz.content_hash.is_null()).tuples():
+        quiz.update(content_hash=quiz_hash(json.loads(questions))).where(quiz.id == quiz_id).execute()
+
+    quiz_ids = dict(quiz.select(quiz.content_hash, quiz.id).tuples())
+    question_sets = (attempt
+                     .select(attempt.questions, pw.fn.MIN(attempt.topic), pw.fn.MIN(attempt.grade))
+                     .group_by(attempt.questions)
+                     .tuples())
+    for questions, topic, grade in list(question_sets):
+        try:
+            content_hash = quiz_hash(json.loads(questions))
+        except (TypeError, ValueError):
+            continue  # Unreadable question sets are dropped; their attempts keep topic, answers and score
+        if content_hash not in quiz_ids:
+            quiz.insert(content_hash=content_hash, topic=topic, grade=grade, questions=questions,
+                        created_at=dt.datetime.now()).execute()
+            quiz_ids[content_hash] = quiz.select(quiz.id).where(quiz.content_hash == content_hash).scalar()
+        attempt.update(quiz_id=quiz_ids[content_hash]).where(attempt.questions == questions).execute()
+
+
+def rollback(migrator: Migrator, database: pw.Database, fake=False, **kwargs):
+    migrator.add_fields('studentquizattempt', questions=pw.TextField(default='[]'))
+    migrator.sql(
+        'UPDATE studentquizattempt SET questions = '
+        '(SELECT questions FROM quiz WHERE quiz.id = studentquizattempt.quiz_id) WHERE quiz_id IS NOT NULL'
+    )
+    migrator.drop_index('studentquizattempt', 'quiz')
+    migrator.remove_fields('studentquizattempt', 'quiz')
+    migrator.remove_fields('quiz', 'content_hash', 'topic', 'grade', 'created_at')
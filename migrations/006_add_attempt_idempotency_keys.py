@@ -0,0 +1,15 @@
+"""Peewee migration: 006_add_attempt_idempotency_keys.py"""
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+
+def migrate(migrator: Migrator, database: pw.Database, fake=False, **kwargs):
+    """Lets synced quiz attempts carry a client key that is stored once per student."""
+    migrator.add_fields('studentquizattempt', idempotency_key=pw.CharField(max_length=255, null=True))
+    migrator.add_index('studentquizattempt', 'student', 'idempotency_key', unique=True)
+
+
+def rollback(migrator: Migrator, database: pw.Database, fake=False, **kwargs):
+    migrator.drop_index('studentquizattempt', 'student', 'idempotency_key')
+    migrator.remove_fields('studentquizattempt', 'idempotency_key')
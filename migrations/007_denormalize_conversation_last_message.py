@@ -0,0 +1,35 @@
+"""Peewee migration: 007_denormalize_conversation_last_message.py"""
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+from app.db.models import SNIPPET_LENGTH
+
+
+def migrate(migrator: Migrator, database: pw.Database, fake=False, **kwargs):
+    """
+    Keeps each conversation's last message and message count on the
+    conversation itself, backfilled from the existing messages.
+    """
+    migrator.add_fields(
+        'conversation',
+        last_message_snippet=pw.CharField(max_length=255, null=True),
+        last_message_sender=pw.CharField(max_length=255, null=True),
+        message_count=pw.IntegerField(default=0),
+    )
+    migrator.add_index('conversation', 'student', 'updated_at', 'id')
+    newest_message = (
+        'SELECT {column} FROM message WHERE message.conversation_id = conversation.id '
+        'ORDER BY message.created_at DESC, message.id DESC LIMIT 1'
+    )
+    migrator.sql(
+        'UPDATE conversation SET '
+        'message_count = (SELECT COUNT(*) FROM message WHERE message.conversation_id = conversation.id), '
+        f'last_message_snippet = ({newest_message.format(column=f"SUBSTR(content, 1, {SNIPPET_LENGTH})")}), '
+        f'last_message_sender = ({newest_message.format(column="sender")})'
+    )
+
+
+def rollback(migrator: Migrator, database: pw.Database, fake=False, **kwargs):
+    migrator.drop_index('conversation', 'student', 'updated_at', 'id')
+    migrator.remove_fields('conversation', 'last_message_snippet', 'last_message_sender', 'message_count')
@@ -0,0 +1,13 @@
+"""Peewee migration: 008_add_message_keyset_index.py"""
+
+import peewee as pw
+from peewee_migrate import Migrator
+
+
+def migrate(migrator: Migrator, database: pw.Database, fake=False, **kwargs):
+    """Indexes messages for keyset pagination within a conversation."""
+    migrator.add_index('message', 'conversation', 'created_at', 'id')
+
+
+def rollback(migrator: Migrator, database: pw.Database, fake=False, **kwargs):
+    migrator.drop_index('message', 'conversation', 'created_at', 'id')
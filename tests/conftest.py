@@ -0,0 +1,33 @@
+import pytest
+from peewee import SqliteDatabase
+
+from app.db.base import close_database, connection_scope
+from app.db.models import User
+
+
+@pytest.fixture
+def models():
+    """The models `database` creates tables for; a test module overrides this fixture to choose them."""
+    return [User]
+
+
+@pytest.fixture
+def open_database():
+    """Opens the database file for `database`; override it to test another kind of database."""
+    return SqliteDatabase
+
+
+@pytest.fixture
+def database(tmp_path, models, open_database):
+    """A fresh SQLite file with the tables of `models`, bound to them for the test."""
+    database = open_database(str(tmp_path / "test.db"))
+    with database.bind_ctx(models):
+        with connection_scope(database):
+            database.create_tables(models)
+        yield database
+    close_database(database)
+
+
+@pytest.fixture
+def student(database):
+    return User.create(name="Student", email="student@example.com", password_hash="x", role="student")
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+from langchain_core.exceptions import ModelRateLimitError
+
+from app.core import retry
+from app.core.admission import AdmissionController, AdmissionRejected, retry_after_header
+
+
+def test_controller_queues_in_order_and_sheds_when_full():
+    controller = AdmissionController(max_concurrency=2, max_queue=2, max_wait_s=30, expected_call_s=1)
+
+    running = [controller.enter(), controller.enter()]
+    queued = [controller.enter(), controller.enter()]
+
+    assert [ticket.position for ticket in running] == [0, 0]
+    assert [ticket.status() for ticket in queued] == [
+        {"position": 1, "estimated_wait_ms": 500},
+        {"position": 2, "estimated_wait_ms": 1000},
+    ]
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.enter()
+    assert retry_after_header(rejected.value) == {"Retry-After": "2"}
+
+    running[0].release()
+    assert queued[0].granted_at is not None and queued[1].granted_at is None
+    queued[1].release()  # Leaves the queue without ever running
+    assert controller.stats()["queued"] == 0
+    for ticket in (running[1], queued[0]):
+        ticket.release()
+        ticket.release()  # Idempotent
+    assert controller.stats()["active"] == 0
+
+
+def test_waiting_past_the_deadline_is_rejected():
+    controller = AdmissionController(max_concurrency=1, max_queue=4, max_wait_s=0.05, expected_call_s=0.01)
+
+    async def scenario():
+        holder = controller.enter()
+        waiter = controller.enter()
+        with pytest.raises(AdmissionRejected):
+            await waiter.acquire()
+        holder.release()
+
+    asyncio.run(scenario())
+    stats = controller.stats()
+    assert (stats["active"], stats["queued"]) == (0, 0)
+
+
+def test_a_ticket_granted_while_timing_out_keeps_its_slot():
+    controller = AdmissionController(max_concurrency=1, max_queue=4, max_wait_s=0.05, expected_call_s=0.01)
+    holder = controller.enter()
+    waiter = controller.enter()
+    # The holder finishes just as the waiter's wait runs out
+    waiter._granted.wait = lambda timeout: holder.release() or False
+
+    waiter.acquire_sync()
+
+    assert waiter.granted_at is not None and not waiter.released
+    assert controller.stats()["active"] == 1
+    assert controller.enter().position == 1  # The slot is still taken
+    waiter.release()
+
+
+def test_stream_retries_rate_limits_only_before_the_first_chunk(monkeypatch):
+    monkeypatch.setattr(retry.settings, "LLM_RETRY_BASE_DELAY_S", 0.001)
+    attempts = []
+
+    async def flaky():
+        attempts.append(True)
+        if len(attempts) < 3:
+            raise ModelRateLimitError("429 RESOURCE_EXHAUSTED")
+        yield "a"
+        yield "b"
+
+    async def broken_midway():
+        yield "a"
+        raise ModelRateLimitError("429 RESOURCE_EXHAUSTED")
+
+    async def collect(start):
+        return [chunk async for chunk in retry.astream_with_retry(start)]
+
+    assert asyncio.run(collect(flaky)) == ["a", "b"]
+    assert len(attempts) == 3
+    with pytest.raises(ModelRateLimitError):
+        asyncio.run(collect(broken_midway))
+    with pytest.raises(ValueError):
+        retry.call_with_retry(lambda: (_ for _ in ()).throw(ValueError("not a rate limit")))
+
+
+def test_rate_limits_are_recognised_by_type_and_status_not_by_stray_numbers():
+    class ProviderError(Exception):
+        def __init__(self, message, code=None, status=None):
+            super().__init__(message)
+            self.code = code
+            self.status = status
+
+    assert retry.is_rate_limit_error(ModelRateLimitError("slow down"))
+    assert retry.is_rate_limit_error(ProviderError("Too many requests", code=429))
+    assert retry.is_rate_limit_error(ProviderError("Quota exceeded", status="RESOURCE_EXHAUSTED"))
+    assert not retry.is_rate_limit_error(ValueError("Document mentions RESOURCE_EXHAUSTED"))
+    assert not retry.is_rate_limit_error(ProviderError("Prompt has 14293 tokens; max is 8192", code=400))
+    assert not retry.is_rate_limit_error(ConnectionError("Could not reach localhost:4290"))
+
+
+def test_queued_calls_are_shared_round_robin_between_owners():
+    controller = AdmissionController(max_concurrency=1, max_queue=10, max_wait_s=30, expected_call_s=1)
+    running = controller.enter(owner="warm-up")
+    heavy = [controller.enter(owner="heavy") for _ in range(3)]
+    light = controller.enter(owner="light")
+    quiz = controller.enter(owner="quiz", cost=2)
+
+    assert light.position == 2  # Behind one heavy call, not all three
+
+    order = []
+    current = running
+    for _ in range(5):
+        current.release()
+        current = next(t for t in heavy + [light, quiz] if t.granted_at is not None and not t.released)
+        order.append((current.owner, current))
+    current.release()
+
+    assert [owner for owner, _ in order] == ["heavy", "light", "heavy", "quiz", "heavy"]
+    assert controller.stats()["active"] == 0 and controller.stats()["waiting_owners"] == 0
@@ -0,0 +1,68 @@
+import time
+
+from app.services.answer_cache import LocalGeneration, SemanticAnswerCache
+
+
+def make_cache(**overrides):
+    options = dict(similarity_threshold=0.9, ttl_seconds=60, max_entries=10, max_bytes=1024 * 1024)
+    options.update(overrides)
+    return SemanticAnswerCache(**options)
+
+
+def test_hit_requires_same_grade_and_similarity():
+    cache = make_cache()
+    cache.store(9, [1.0, 0.0, 0.0], "Force equals mass times acceleration.", [], chunk_ids=["1_0"])
+
+    assert cache.lookup(9, [0.99, 0.05, 0.0]).answer == "Force equals mass times acceleration."
+    assert cache.lookup(10, [1.0, 0.0, 0.0]) is None
+    assert cache.lookup(9, [0.0, 1.0, 0.0]) is None
+
+
+def test_lru_eviction_respects_entry_cap():
+    cache = make_cache(max_entries=2)
+    cache.store(9, [1.0, 0.0], "a", [], chunk_ids=[])
+    cache.store(9, [0.0, 1.0], "b", [], chunk_ids=[])
+    cache.lookup(9, [1.0, 0.0])  # "a" becomes most recently used
+    cache.store(9, [-1.0, 0.0], "c", [], chunk_ids=[])
+
+    assert cache.lookup(9, [0.0, 1.0]) is None
+    assert cache.lookup(9, [1.0, 0.0]).answer == "a"
+
+
+def test_ttl_expiry():
+    cache = make_cache(ttl_seconds=0.01)
+    cache.store(9, [1.0, 0.0], "a", [], chunk_ids=[])
+    time.sleep(0.02)
+    assert cache.lookup(9, [1.0, 0.0]) is None
+
+
+def test_invalidation_by_chunk_id():
+    cache = make_cache()
+    cache.store(9, [1.0, 0.0], "a", [], chunk_ids=["3_0", "3_1"])
+    cache.store(9, [0.0, 1.0], "b", [], chunk_ids=["4_0"])
+
+    assert cache.invalidate_chunks(["3_1"]) == 1
+    assert cache.lookup(9, [1.0, 0.0]) is None
+    assert cache.lookup(9, [0.0, 1.0]).answer == "b"
+
+
+def test_invalidate_all_reaches_every_cache_sharing_the_generation():
+    generation = LocalGeneration()  # Stands in for the Redis counter shared by workers
+    worker_a = make_cache(generation=generation)
+    worker_b = make_cache(generation=generation)
+    worker_a.store(9, [1.0, 0.0], "a", [], chunk_ids=["3_0"])
+    worker_b.store(9, [1.0, 0.0], "b", [], chunk_ids=["3_0"])
+
+    worker_a.invalidate_all()
+
+    assert worker_a.lookup(9, [1.0, 0.0]) is None
+    assert worker_b.lookup(9, [1.0, 0.0]) is None
+
+
+def test_answer_retrieved_before_an_invalidation_is_not_stored():
+    cache = make_cache()
+    generation = cache.current_generation()
+    cache.invalidate_all()  # An upload lands while the answer is generated
+
+    assert cache.store(9, [1.0, 0.0], "a", [], chunk_ids=[], generation=generation) is None
+    assert cache.lookup(9, [1.0, 0.0]) is None
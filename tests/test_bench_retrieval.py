@@ -0,0 +1,28 @@
+from app.config import settings
+from app.core.rag_manager import RagManager
+from app.services.chroma_service import ChromaService
+from app.services.lexical_index import lexical_index
+from benchmarks import bench_retrieval
+
+
+def test_retrieval_benchmark_runs_offline(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CHROMA_PERSIST_DIRECTORY", str(tmp_path / "chroma"))
+    monkeypatch.setattr(settings, "EMBEDDING_BACKEND", "hash")
+    monkeypatch.setattr(settings, "EMBEDDING_BATCHING_ENABLED", False)
+    monkeypatch.setattr(settings, "RERANK_ENABLED", False)
+    for attribute, value in [("_instance", None), ("_client", None), ("_collection", None),
+                             ("_embedding_function", None), ("_shards", {})]:
+        monkeypatch.setattr(ChromaService, attribute, value)
+    monkeypatch.setattr(RagManager, "_retriever", None)
+    monkeypatch.setattr(lexical_index, "index_dir", str(tmp_path / "lexical"))
+    monkeypatch.setattr(lexical_index, "_loaded_version", None)
+
+    rows = bench_retrieval.run_suite(ChromaService(), str(tmp_path), chunks_per_topic=3,
+                                     num_queries=20, ks=[5], seed=1)
+
+    assert [(row[0], row[1]) for row in rows] == [
+        (backend, hybrid)
+        for backend in ("chroma", "quantized int8", "quantized float16")
+        for hybrid in ("off", "on")
+    ]
+    assert all(0.5 <= row[3] <= 1.0 for row in rows)  # recall@5
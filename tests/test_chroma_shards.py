@@ -0,0 +1,114 @@
+import chromadb
+import pytest
+
+from app.config import settings
+from app.core.rag_manager import RagManager
+from app.core.retriever import ChromaRetriever
+from app.services.chroma_service import ChromaService
+
+
+@pytest.fixture
+def chroma_service(tmp_path, monkeypatch):
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    monkeypatch.setattr(settings, "EMBEDDING_BATCHING_ENABLED", False)
+    monkeypatch.setattr(ChromaService, "_instance", None)
+    monkeypatch.setattr(ChromaService, "_client", client)
+    monkeypatch.setattr(ChromaService, "_embedding_function", None)
+    monkeypatch.setattr(ChromaService, "_shards", {})
+    monkeypatch.setattr(ChromaService, "_shards_refreshed_at", None)
+    monkeypatch.setattr(ChromaService, "_legacy_has_chunks", None)
+    monkeypatch.setattr(ChromaService, "_collection", client.get_or_create_collection(
+        name=settings.CHROMA_COLLECTION_NAME, embedding_function=None, metadata={"hnsw:space": "cosine"},
+    ))
+    return ChromaService()
+
+
+def upsert(service, rows):
+    service.upsert_documents(
+        documents=[text for _, text, _, _ in rows],
+        metadatas=[metadata for _, _, metadata, _ in rows],
+        ids=[doc_id for doc_id, _, _, _ in rows],
+        embeddings=[vector for _, _, _, vector in rows],
+    )
+
+
+def test_upsert_routes_chunks_to_grade_subject_shards(chroma_service):
+    upsert(chroma_service, [
+        ("a", "force", {"grade": 9, "subject": "Physics"}, [1.0, 0.0]),
+        ("b", "cells", {"grade": 9, "subject": "Biology"}, [0.0, 1.0]),
+        ("c", "ohm", {"grade": 10, "subject": "Physics"}, [1.0, 0.1]),
+    ])
+
+    assert chroma_service.get_shard(9, "Physics").count() == 1
+    assert len(chroma_service.get_shards(grade=9)) == 2
+    assert [s.name for s in chroma_service.get_shards(grade=9, subject="physics")] == [
+        ChromaService.shard_name(9, "Physics")
+    ]
+    assert chroma_service.get_collection().count() == 0
+    assert sorted(chroma_service.get_all(include=["metadatas"])["ids"]) == ["a", "b", "c"]
+
+
+def test_search_covers_the_grade_window_in_one_pass(chroma_service, monkeypatch):
+    upsert(chroma_service, [
+        ("g9", "force", {"grade": 9, "subject": "Physics"}, [0.6, 0.8]),
+        ("g10", "ohm", {"grade": 10, "subject": "Physics"}, [1.0, 0.0]),
+        ("g12", "fields", {"grade": 12, "subject": "Physics"}, [1.0, 0.0]),
+    ])
+    retriever = ChromaRetriever(chroma_service)
+
+    own = retriever.search_by_vector([1.0, 0.0], k=5, grade=9)
+    window = retriever.search_by_vector([1.0, 0.0], k=5, grade=9, grade_window=1)
+
+    assert [doc.id for doc, _ in own] == ["g9"]
+    assert [doc.id for doc, _ in window] == ["g10", "g9"]
+    assert retriever.get_documents(["g10", "missing"])["g10"].page_content == "ohm"
+
+
+def test_migrate_legacy_collection(chroma_service):
+    chroma_service.get_collection().upsert(
+        ids=["old"], documents=["momentum"], embeddings=[[1.0, 0.0]],
+        metadatas=[{"grade": 9, "subject": "Physics"}],
+    )
+
+    assert chroma_service.migrate_legacy_collection(delete_legacy=True) == 1
+    assert chroma_service.get_collection().count() == 0
+    assert chroma_service.get_shard(9, "Physics").get(ids=["old"])["documents"] == ["momentum"]
+
+
+def test_missing_shards_and_the_legacy_collection_are_not_relisted_per_query(chroma_service, monkeypatch):
+    chroma_service.get_collection().upsert(
+        ids=["old"], documents=["momentum"], embeddings=[[1.0, 0.0]],
+        metadatas=[{"grade": 9, "subject": "Physics"}],
+    )
+    retriever = ChromaRetriever(chroma_service)
+    assert retriever.search_legacy
+
+    listings = []
+    list_collections = ChromaService._client.list_collections
+    monkeypatch.setattr(ChromaService._client, "list_collections", lambda: listings.append(1) or list_collections())
+    for _ in range(3):
+        retriever.search_by_vector([1.0, 0.0], k=5, grade=7)
+    assert listings == []
+
+    chroma_service.migrate_legacy_collection(delete_legacy=True)
+    assert not retriever.search_legacy
+    assert [doc.id for doc, _ in retriever.search_by_vector([1.0, 0.0], k=5, grade=9)] == ["old"]
+
+
+def test_a_grade_without_shards_widens_to_the_other_grades(chroma_service, monkeypatch):
+    upsert(chroma_service, [
+        ("g9", "force", {"grade": 9, "subject": "Physics"}, [0.6, 0.8]),
+        ("g12", "fields", {"grade": 12, "subject": "Physics"}, [1.0, 0.0]),
+    ])
+    retriever = ChromaRetriever(chroma_service)
+    monkeypatch.setattr(settings, "HYBRID_RETRIEVAL_ENABLED", False)
+    monkeypatch.setattr(settings, "RETRIEVAL_GRADE_WINDOW", 1)
+    monkeypatch.setattr(RagManager, "_retriever", retriever)
+
+    assert retriever.search_by_vector([1.0, 0.0], k=5, grade=6, grade_window=1) == []
+    widened = retriever.search_by_vector([1.0, 0.0], k=5, grade=8, grade_window=1, cross_shard=True)
+    assert [doc.id for doc, _ in widened] == ["g12"]  # Grade 9 is inside the window
+
+    manager = RagManager.__new__(RagManager)
+    docs = manager._retrieve_documents("What is a field?", [1.0, 0.0], student_grade=6, k=2)
+    assert [doc.id for doc, _ in docs] == ["g12", "g9"]
@@ -0,0 +1,51 @@
+from langchain_core.documents import Document
+
+from app.core.context_packer import find_overlap, pack_context
+from app.utils.pdf_parser import split_text_into_chunks
+
+TEXT = " ".join(f"Sentence {i} explains how a net force changes an object's motion." for i in range(60))
+
+
+def chunk_docs(filename="motion.pdf"):
+    chunks = split_text_into_chunks(TEXT)
+    return [
+        (Document(id=f"1_{i}", page_content=chunk, metadata={"filename": filename, "chunk_index": i}), 0.9)
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def test_find_overlap_ignores_short_coincidences():
+    assert find_overlap("the quick brown fox", "brown fox jumps", 4, 100) == len("brown fox")
+    assert find_overlap("ends with a.", "a. starts", 4, 100) == 0
+
+
+def test_adjacent_chunks_are_merged_without_overlap():
+    docs = chunk_docs()[:3]
+
+    packed = pack_context(list(reversed(docs)), token_budget=10_000)
+
+    assert packed.passages == 1
+    assert packed.text.count("Sentence 20 ") <= 1
+    assert packed.tokens_saved > 0
+    assert packed.text in TEXT
+
+
+def test_adjacent_chunks_without_overlap_keep_a_word_boundary():
+    docs = [
+        (Document(id=f"1_{i}", page_content=text, metadata={"filename": "notes.pdf", "chunk_index": i}), 0.9)
+        for i, text in enumerate(["First chunk ends here.", "Second chunk starts here."])
+    ]
+
+    packed = pack_context(docs, token_budget=10_000)
+
+    assert packed.text == "First chunk ends here. Second chunk starts here."
+
+
+def test_budget_keeps_most_relevant_passages():
+    motion = chunk_docs()
+    other = (Document(id="2_0", page_content="Ohm's law: V = IR.", metadata={"filename": "ohm.pdf", "chunk_index": 0}), 0.8)
+
+    packed = pack_context([other, motion[0], motion[3]], token_budget=20)
+
+    assert packed.text == "Ohm's law: V = IR."
+    assert packed.passages == 1
@@ -0,0 +1,75 @@
+import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import rag as rag_api
+from app.db import crud
+from app.db.message_log import MessageLog
+from app.db.models import SNIPPET_LENGTH, Conversation, Message, User
+from app.core.dependencies import get_current_student_user
+
+MODELS = [User, Conversation, Message]
+
+
+@pytest.fixture
+def models():
+    return MODELS
+
+
+def test_writes_keep_the_last_message_fields_current(database, student):
+    first = Conversation.create(student=student)
+    second = Conversation.create(student=student)
+
+    crud.create_message(first.id, "student", "q" * (SNIPPET_LENGTH + 50))
+    log = MessageLog(max_queue=100, batch_size=50, flush_interval_s=10)
+    log.start()
+    log.append(first.id, "tutor", "Force is a push or a pull.")
+    log.append(second.id, "student", "What is mass?")
+    log.append(first.id, "student", "Thanks!")
+    log.stop()
+
+    first, second = Conversation.get_by_id(first.id), Conversation.get_by_id(second.id)
+    assert (first.message_count, first.last_message_sender, first.last_message_snippet) == (3, "student", "Thanks!")
+    assert (second.message_count, second.last_message_sender, second.last_message_snippet) == (1, "student", "What is mass?")
+
+
+def test_listing_pages_by_keyset_in_one_query_each(database, student):
+    tied = datetime.datetime(2024, 5, 1, 12, 0)
+    for number in range(7):
+        Conversation.create(student=student, updated_at=tied if number < 4 else tied + datetime.timedelta(minutes=number),
+                            last_message_snippet=f"message {number}", last_message_sender="tutor", message_count=1)
+    Conversation.create(student=User.create(name="Other", email="other@example.com", password_hash="x", role="student"))
+
+    app = FastAPI()
+    app.include_router(rag_api.router, prefix="/api/rag")
+    app.dependency_overrides[get_current_student_user] = lambda: student
+    client = TestClient(app)
+
+    queries = []
+    original_execute_sql = database.execute_sql
+    database.execute_sql = lambda sql, *args, **kwargs: queries.append(sql) or original_execute_sql(sql, *args, **kwargs)
+
+    pages, cursor = [], None
+    while True:
+        response = client.get("/api/rag/conversations", params={"limit": 3, **({"cursor": cursor} if cursor else {})})
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert len(queries) == len(pages)
+    listed = [conversation for page in pages for conversation in page]
+    assert [c["last_message_snippet"] for c in listed[:3]] == ["message 6...", "message 5...", "message 4..."]
+    assert [c["id"] for c in listed[3:]] == [4, 3, 2, 1]  # Ties on updated_at fall back to id
+    assert listed[0]["message_count"] == 1 and listed[0]["last_message_sender"] == "tutor"
+
+
+def test_a_malformed_cursor_is_rejected(database, student):
+    app = FastAPI()
+    app.include_router(rag_api.router, prefix="/api/rag")
+    app.dependency_overrides[get_current_student_user] = lambda: student
+
+    assert TestClient(app).get("/api/rag/conversations", params={"cursor": "not-a-cursor"}).status_code == 400
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+
+from app.db.base import connection_scope, create_database, pool_stats, release_connection
+from app.db.models import User
+from app.main import DatabaseConnectionMiddleware
+
+
+@pytest.fixture
+def open_database():
+    return lambda path: create_database(f"sqlite:///{path}", pooled=True)
+
+
+def test_concurrent_requests_never_share_or_leak_connections(database):
+    in_use, lock, overlaps = set(), threading.Lock(), []
+
+    def checkout():
+        User.select().count()
+        connection = id(database.connection())
+        with lock:
+            if connection in in_use:
+                overlaps.append(connection)
+            in_use.add(connection)
+        return connection
+
+    app = FastAPI()
+    app.add_middleware(DatabaseConnectionMiddleware, db=database)
+
+    @app.get("/sync")
+    def sync_endpoint(first=Depends(checkout)):
+        time.sleep(0.01)
+        # The dependency and the endpoint run on different threadpool threads
+        second = id(database.connection())
+        with lock:
+            in_use.discard(first)
+        return {"same": first == second}
+
+    @app.get("/async")
+    async def async_endpoint():
+        first = await asyncio.to_thread(checkout)
+        await asyncio.sleep(0.01)
+        second = id(database.connection())
+        release_connection(database)  # Given back mid-request, as before streaming an answer
+        with lock:
+            in_use.discard(first)
+        User.select().count()  # Checks a connection out again, released by the middleware
+        return {"same": first == second}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.get(path) for _ in range(40) for path in ("/sync", "/async")))
+
+    responses = asyncio.run(run())
+
+    assert all(response.json() == {"same": True} for response in responses)
+    assert overlaps == []
+    stats = pool_stats(database)
+    assert stats["in_use"] == 0 and 0 < stats["idle"] <= stats["max_connections"]
+
+
+def test_threads_without_a_scope_get_their_own_connection(database):
+    connections = []
+
+    def worker():
+        User.select().count()
+        connections.append(id(database.connection()))
+        database.close()
+
+    with connection_scope(database):
+        User.select().count()
+        connections.append(id(database.connection()))
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        assert not database.is_closed()  # The thread closed its own connection, not this one
+
+    assert connections[0] != connections[1]
+    assert pool_stats(database)["in_use"] == 0
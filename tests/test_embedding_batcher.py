@@ -0,0 +1,50 @@
+import asyncio
+import threading
+
+from app.services.embedding_service import BatchingEmbedder
+
+
+class RecordingEncoder:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def test_concurrent_threads_share_batches_and_get_their_own_vectors():
+    encoder = RecordingEncoder()
+    embedder = BatchingEmbedder(encoder, window_ms=50, max_batch=64)
+    texts = ["a" * (i + 1) for i in range(16)]
+    results = {}
+    start = threading.Barrier(len(texts))
+
+    def worker(text):
+        start.wait()
+        results[text] = embedder.embed(text)
+
+    threads = [threading.Thread(target=worker, args=(text,)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    embedder.close()
+
+    assert all(results[text] == [float(len(text)), 1.0] for text in texts)
+    assert len(encoder.batches) < len(texts)
+
+
+def test_async_callers_respect_max_batch():
+    encoder = RecordingEncoder()
+    embedder = BatchingEmbedder(encoder, window_ms=50, max_batch=4)
+
+    async def scenario():
+        return await asyncio.gather(*(embedder.aembed("q" * n) for n in range(1, 11)))
+
+    vectors = asyncio.run(scenario())
+    embedder.close()
+
+    assert [vector[0] for vector in vectors] == [float(n) for n in range(1, 11)]
+    assert max(len(batch) for batch in encoder.batches) <= 4
+    assert sum(len(batch) for batch in encoder.batches) == 10
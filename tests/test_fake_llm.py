@@ -0,0 +1,34 @@
+import asyncio
+import json
+import time
+
+from app.core.llm import FakeStreamingChatModel
+
+
+def test_fake_llm_streams_deterministically_after_ttft():
+    model = FakeStreamingChatModel(ttft_ms=100, tokens_per_second=1000, answer_tokens=20)
+
+    async def stream():
+        started = time.perf_counter()
+        arrivals, chunks = [], []
+        async for chunk in model.astream("What is force?"):
+            if chunk.content:  # LangChain may close the stream with an empty chunk
+                arrivals.append(time.perf_counter() - started)
+                chunks.append(chunk.content)
+        return arrivals, chunks
+
+    arrivals, chunks = asyncio.run(stream())
+
+    assert len(chunks) == 20
+    assert arrivals[0] >= 0.1
+    assert "".join(chunks) == model.invoke("What is force?").content
+    assert "".join(chunks) != model.invoke("What is energy?").content
+
+
+def test_fake_llm_answers_quiz_prompts_with_valid_json():
+    model = FakeStreamingChatModel(ttft_ms=0, tokens_per_second=1000)
+
+    quiz = json.loads(model.invoke("Generate a multiple-choice quiz with 3 questions.").content)
+
+    assert len(quiz["questions"]) == 3
+    assert all(q["correct_answer"] in q["options"] for q in quiz["questions"])
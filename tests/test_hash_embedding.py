@@ -0,0 +1,19 @@
+import numpy as np
+
+from app.services.hash_embedding import HashEmbeddingFunction
+
+
+def test_hash_embedding_is_deterministic_and_reflects_word_overlap():
+    embed = HashEmbeddingFunction(dim=128)
+
+    force, force_again, mass, cells = embed([
+        "Force equals mass times acceleration.",
+        "Force equals mass times acceleration.",
+        "mass and acceleration of a body",
+        "Mitochondria are organelles of the cell.",
+    ])
+
+    assert np.allclose(force, force_again)
+    assert abs(np.linalg.norm(force) - 1.0) < 1e-6
+    assert float(np.dot(force, mass)) > float(np.dot(force, cells))
+    assert HashEmbeddingFunction.build_from_config(embed.get_config()).dim == 128
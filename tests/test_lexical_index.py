@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+
+from app.core.retriever import reciprocal_rank_fusion
+from app.services.lexical_index import LexicalIndex, tokenize
+from app.utils.versioned_dir import read_current_version
+
+CHUNKS = {
+    "1_0": ("Newton's second law states that F=ma, force equals mass times acceleration.", 9),
+    "1_1": ("Acceleration is measured in m/s^2 and describes the change of velocity.", 9),
+    "2_0": ("Ohm's law relates voltage, current and resistance: V=IR.", 10),
+}
+
+
+def build_index(tmp_path):
+    index = LexicalIndex(str(tmp_path))
+    ids = list(CHUNKS)
+    index.build(ids, [CHUNKS[i][0] for i in ids], [{"grade": CHUNKS[i][1]} for i in ids])
+    return index
+
+
+def test_tokenize_keeps_formulas_and_units():
+    assert "f=ma" in tokenize("Newton's law: F=ma")
+    assert "m/s^2" in tokenize("measured in m/s^2")
+    assert "newton" in tokenize("Newton's law")
+
+
+def test_search_ranks_exact_terms_and_memory_maps_postings(tmp_path):
+    index = build_index(tmp_path)
+
+    hits = index.search("What does F=ma mean?", n=5)
+
+    assert hits[0][0] == "1_0"
+    assert hits[0][2] == 9
+    assert isinstance(index._arrays["postings_doc"], np.memmap)
+    assert index.search("V=IR", n=5)[0][0] == "2_0"
+    assert index.search("quantum chromodynamics", n=5) == []
+
+
+def test_rebuild_is_picked_up_by_existing_reader(tmp_path):
+    index = build_index(tmp_path)
+    index.search("force", n=1)
+
+    LexicalIndex(str(tmp_path)).build(["3_0"], ["Momentum is mass times velocity."], [{"grade": 9}])
+
+    assert [doc_id for doc_id, _, _ in index.search("momentum", n=5)] == ["3_0"]
+
+
+def test_adding_chunks_matches_a_full_rebuild(tmp_path):
+    index = build_index(tmp_path / "incremental")
+    added = {
+        "2_0": ("Ohm's law: voltage equals current times resistance.", 10),  # Replaces the indexed chunk
+        "3_0": ("Momentum is mass times velocity.", 9),
+    }
+    index.add(list(added), [text for text, _ in added.values()], [{"grade": grade} for _, grade in added.values()])
+
+    rebuilt = LexicalIndex(str(tmp_path / "rebuilt"))
+    chunks = {**CHUNKS, **added}
+    rebuilt.build(list(chunks), [text for text, _ in chunks.values()], [{"grade": grade} for _, grade in chunks.values()])
+
+    for query in ("momentum mass", "V=IR", "voltage current", "acceleration"):
+        assert index.search(query, n=5) == rebuilt.search(query, n=5)
+
+
+def test_publishing_keeps_the_replaced_version(tmp_path):
+    versions = []
+    for doc_id in ("1_0", "1_1", "2_0"):
+        LexicalIndex(str(tmp_path)).build([doc_id], [CHUNKS[doc_id][0]], [{"grade": CHUNKS[doc_id][1]}])
+        versions.append(read_current_version(str(tmp_path)))
+
+    assert sorted(entry for entry in os.listdir(tmp_path) if entry.startswith("v")) == versions[1:]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion(["a", "b", "c"], ["c", "a"], rrf_k=60)
+
+    assert max(fused, key=fused.get) == "a"
+    assert fused["c"] > fused["b"]
@@ -0,0 +1,85 @@
+import datetime
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import rag as rag_api
+from app.core.dependencies import get_current_student_user
+from app.db import crud
+from app.db.models import Conversation, Message, User
+
+MODELS = [User, Conversation, Message]
+
+
+@pytest.fixture
+def models():
+    return MODELS
+
+
+@pytest.fixture
+def conversation(student):
+    conversation = Conversation.create(student=student)
+    start = datetime.datetime(2024, 5, 1, 12, 0)
+    for number in range(10):
+        # Pairs of messages share a timestamp, so ordering relies on the id tiebreak
+        Message.create(conversation=conversation, sender="student", content=f"message {number}",
+                       created_at=start + datetime.timedelta(seconds=number // 2))
+    return conversation
+
+
+@pytest.fixture
+def client(conversation):
+    app = FastAPI()
+    app.include_router(rag_api.router, prefix="/api/rag")
+    app.dependency_overrides[get_current_student_user] = lambda: conversation.student
+    return TestClient(app)
+
+
+def contents(response):
+    return [message["content"] for message in response.json()]
+
+
+def test_pages_walk_backwards_and_forwards(client, conversation):
+    url = f"/api/rag/conversations/{conversation.id}/messages"
+
+    newest = client.get(url, params={"limit": 4})
+    assert contents(newest) == [f"message {n}" for n in range(6, 10)]
+    assert "X-Next-Cursor" not in newest.headers
+
+    older = client.get(url, params={"limit": 4, "before": newest.headers["X-Prev-Cursor"]})
+    oldest = client.get(url, params={"limit": 4, "before": older.headers["X-Prev-Cursor"]})
+    assert contents(older) == [f"message {n}" for n in range(2, 6)]
+    assert contents(oldest) == ["message 0", "message 1"]
+    assert "X-Prev-Cursor" not in oldest.headers
+
+    newer = client.get(url, params={"limit": 4, "after": oldest.headers["X-Next-Cursor"]})
+    assert contents(newer) == [f"message {n}" for n in range(2, 6)]
+    assert newer.headers["X-Prev-Cursor"] and newer.headers["X-Next-Cursor"]
+
+    assert client.get(url, params={"before": "x", "after": "y"}).status_code == 400
+
+
+def test_export_streams_every_message_in_chunks(client, conversation, monkeypatch):
+    monkeypatch.setattr(rag_api.settings, "MESSAGE_EXPORT_CHUNK_SIZE", 3)
+    chunks = []
+    iter_message_chunks = crud.iter_message_chunks
+    monkeypatch.setattr(crud, "iter_message_chunks",
+                        lambda *args: (chunks.append(len(chunk)) or chunk for chunk in iter_message_chunks(*args)))
+
+    response = client.get(f"/api/rag/conversations/{conversation.id}/messages/export")
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["content"] for line in lines] == [f"message {n}" for n in range(10)]
+    assert lines[0]["conversation_id"] == conversation.id
+    assert chunks == [3, 3, 3, 1]
+
+
+def test_other_students_conversations_are_not_found(client, conversation):
+    other = User.create(name="Other", email="other@example.com", password_hash="x", role="student")
+    client.app.dependency_overrides[get_current_student_user] = lambda: other
+
+    assert client.get(f"/api/rag/conversations/{conversation.id}/messages").status_code == 404
+    assert client.get(f"/api/rag/conversations/{conversation.id}/messages/export").status_code == 404
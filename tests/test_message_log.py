@@ -0,0 +1,93 @@
+import datetime
+import threading
+import time
+
+import pytest
+
+from app.db.message_log import MessageLog
+from app.db.models import Conversation, Message, User
+
+MODELS = [User, Conversation, Message]
+
+
+@pytest.fixture
+def models():
+    return MODELS
+
+
+def make_conversations(student, count):
+    old = datetime.datetime(2020, 1, 1)
+    return [Conversation.create(student=student, created_at=old, updated_at=old) for _ in range(count)]
+
+
+def test_batches_are_written_together_and_bump_updated_at(student):
+    first, second = make_conversations(student, 2)
+    log = MessageLog(max_queue=100, batch_size=50, flush_interval_s=10)
+    log.start()
+
+    log.append(first.id, "student", "What is force?")
+    log.append(second.id, "student", "What is mass?")
+    last = log.append(first.id, "tutor", "A push or a pull.")
+    assert log.has_pending(first.id) and Message.select().count() == 0  # Still within the flush interval
+
+    assert log.flush(timeout=5)
+    log.stop()
+
+    assert not log.has_pending()
+    assert [(m.sender, m.content) for m in Message.select().where(Message.conversation == first.id)
+            .order_by(Message.created_at)] == [("student", "What is force?"), ("tutor", "A push or a pull.")]
+    assert Conversation.get_by_id(first.id).updated_at == last
+    assert Conversation.get_by_id(second.id).updated_at > datetime.datetime(2020, 1, 1)
+
+
+def test_flush_is_not_held_up_by_later_appends(student):
+    mine, busy = make_conversations(student, 2)
+    log = MessageLog(max_queue=10000, batch_size=50, flush_interval_s=0.05)
+    log.start()
+    chatting = threading.Event()
+    chatting.set()
+
+    def chat():
+        while chatting.is_set():
+            log.append(busy.id, "student", "typing...")
+            time.sleep(0.002)
+
+    chatter = threading.Thread(target=chat)
+    chatter.start()
+    try:
+        time.sleep(0.05)
+        log.append(mine.id, "student", "What is force?")
+        started = time.monotonic()
+        assert log.flush(mine.id, timeout=3)
+        assert log.flush(timeout=3)  # All conversations, up to the messages appended so far
+        assert time.monotonic() - started < 1
+    finally:
+        chatting.clear()
+        chatter.join()
+        log.stop()
+
+    assert Message.select().where(Message.conversation == mine.id).count() == 1
+
+
+def test_stop_drains_and_a_bad_row_only_loses_itself(student):
+    (conversation,) = make_conversations(student, 1)
+    log = MessageLog(max_queue=100, batch_size=2, flush_interval_s=10)
+    log.start()
+
+    for number in range(5):
+        log.append(conversation.id, "student", f"message {number}")
+    log.append(conversation.id, None, "sender is NOT NULL")
+    log.stop()
+
+    assert not log.running()
+    assert Message.select().count() == 5
+
+
+def test_messages_are_written_directly_when_the_log_is_not_running(student):
+    (conversation,) = make_conversations(student, 1)
+    log = MessageLog(max_queue=1, batch_size=10, flush_interval_s=10)
+
+    log.append(conversation.id, "student", "hello")
+
+    assert Message.select().count() == 1
+    assert not log.has_pending()
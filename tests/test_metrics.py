@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+from app.core.metrics import MetricsRegistry, monitor_event_loop_lag
+
+
+def test_snapshot_reports_percentiles_and_keeps_recent_samples():
+    registry = MetricsRegistry(max_samples=100)
+    for value in range(1, 201):
+        registry.observe("db_write_ms", float(value))
+    registry.increment("requests", 3)
+
+    snapshot = registry.snapshot()
+
+    series = snapshot["latencies"]["db_write_ms"]
+    assert series["count"] == 100
+    assert (series["p50"], series["p99"], series["max"]) == (150.0, 199.0, 200.0)
+    assert snapshot["counters"] == {"requests": 3}
+
+
+def test_event_loop_lag_monitor_sees_blocking_calls():
+    registry = MetricsRegistry()
+
+    async def scenario():
+        monitor = asyncio.create_task(monitor_event_loop_lag(registry, interval_ms=10))
+        await asyncio.sleep(0.05)
+        time.sleep(0.2)  # Blocks the loop
+        await asyncio.sleep(0.05)
+        monitor.cancel()
+
+    asyncio.run(scenario())
+
+    assert registry.snapshot()["latencies"]["event_loop_lag_ms"]["max"] >= 150
@@ -0,0 +1,85 @@
+import pytest
+
+from app.db.models import QuizBankQuestion
+from app.core.quiz_stream import validate_question
+from app.services.quiz_bank import QuizBank
+
+
+@pytest.fixture
+def models():
+    return [QuizBankQuestion]
+
+
+@pytest.fixture
+def bank(database):
+    return QuizBank(target=6, low_water=3, max_serves=2, generation_batch=4, duplicate_threshold=0.8)
+
+
+def question(text, answer="B"):
+    return {"question_text": text, "options": ["A", "B", "C", "D"], "correct_answer": answer}
+
+
+TOPICS = ["velocity", "friction", "inertia", "momentum", "voltage", "resistance", "magnetism", "refraction"]
+
+
+def test_invalid_and_near_duplicate_questions_are_not_banked(bank):
+    stored = bank.add_questions("Newton's Laws", 9, [
+        question("What does Newton's second law relate?"),
+        question("what does newtons second law relate"),  # Same text, different punctuation
+        question("What exactly does Newton's second law relate?"),  # Near-duplicate
+        question("Which quantity is measured in newtons?"),
+        question("Missing answer", answer="E"),
+        {"question_text": "", "options": ["A", "B"], "correct_answer": "A"},
+    ])
+
+    assert stored == 2
+    assert bank.remaining("  newton's   laws ", 9) == 2
+    assert bank.remaining("Newton's Laws", 10) == 0
+    assert validate_question(question(" Padded? ")) == question("Padded?")
+
+
+def test_draws_are_random_counted_and_retire_questions(bank):
+    bank.add_questions("Motion", 9, [question(f"Define {topic} in one sentence.") for topic in TOPICS[:4]])
+
+    first = bank.draw("Motion", 9, 3)
+    assert len({q["question_text"] for q in first}) == 3
+    assert bank.remaining("Motion", 9) == 4  # Served once; retired after two serves
+
+    assert bank.draw("Motion", 9, 4) is not None
+    assert bank.remaining("Motion", 9) == 1
+    assert bank.draw("Motion", 9, 2) is None  # Not enough stock; nothing is served
+    assert bank.remaining("Motion", 9) == 1
+
+
+def test_a_draw_never_serves_questions_used_up_by_a_concurrent_draw(bank, monkeypatch):
+    bank.add_questions("Motion", 9, [question(f"Define {topic} in one sentence.") for topic in TOPICS[:2]],
+                       times_served=1)
+    update = QuizBankQuestion.update
+
+    def concurrent_draw_lands_first(*args, **kwargs):
+        # Another worker serves both questions for the last time between this draw's SELECT and UPDATE
+        monkeypatch.setattr(QuizBankQuestion, "update", update)
+        update(times_served=QuizBankQuestion.times_served + 1).execute()
+        return update(*args, **kwargs)
+
+    monkeypatch.setattr(QuizBankQuestion, "update", concurrent_draw_lands_first)
+
+    assert bank.draw("Motion", 9, 2) is None
+
+
+def test_refill_tops_up_low_stock_topics(bank):
+    bank.add_questions("Motion", 9, [question("Define velocity in one sentence.")])
+    calls = []
+
+    def generate(topic, grade, num_questions):
+        calls.append(num_questions)
+        offset = sum(calls) - num_questions
+        return {"questions": [question(f"Explain {name} with an example.")
+                              for name in TOPICS[offset:offset + num_questions]]}
+
+    assert bank.low_stock() == [("motion", 9)]
+    assert bank.refill("Motion", 9, generate) == 5
+    assert calls == [4, 1]
+    assert bank.remaining("Motion", 9) == 6
+    assert bank.low_stock() == []
+    assert bank.refill("Motion", 9, lambda *args: {"error": "unused"}) == 0
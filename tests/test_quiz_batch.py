@@ -0,0 +1,104 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import quiz as quiz_api
+from app.core.dependencies import get_current_active_user
+from app.db.models import Lesson, Quiz, StudentQuizAttempt, User
+from app.services.quiz_store import QuizStore
+
+MODELS = [User, Lesson, Quiz, StudentQuizAttempt]
+
+QUESTIONS = [
+    {"question_text": "Unit of force?", "options": ["Newton", "Joule"], "correct_answer": "Newton"},
+    {"question_text": "Unit of energy?", "options": ["Newton", "Joule"], "correct_answer": "Joule"},
+]
+
+
+@pytest.fixture
+def models():
+    return MODELS
+
+
+@pytest.fixture
+def client(student, monkeypatch):
+    monkeypatch.setattr(quiz_api, "quiz_store", QuizStore(max_cached_keys=10))
+    app = FastAPI()
+    app.include_router(quiz_api.router, prefix="/api/quiz")
+    app.dependency_overrides[get_current_active_user] = lambda: student
+    return TestClient(app)
+
+
+def attempt(key, quiz_id, *answers):
+    return {"idempotency_key": key, "quiz_id": quiz_id,
+            "answers": {q["question_text"]: answer for q, answer in zip(QUESTIONS, answers)}}
+
+
+def test_a_batch_is_graded_and_stored_per_item(client):
+    quiz_id = quiz_api.quiz_store.save("Units", 9, QUESTIONS)
+
+    response = client.post("/api/quiz/submit/batch", json={"attempts": [
+        attempt("tablet-1", quiz_id, "Newton", "Joule"),
+        attempt("tablet-2", quiz_id, "Joule", "Joule"),
+        attempt("tablet-3", quiz_id + 1, "Newton"),
+        attempt("tablet-1", quiz_id, "Joule", "Newton"),  # Same key twice in one batch
+    ]})
+
+    results = response.json()["results"]
+    assert [(r["status"], r.get("score")) for r in results] == [
+        ("created", 100), ("created", 50), ("rejected", None), ("duplicate", 100)
+    ]
+    assert results[0]["attempt_id"] == results[3]["attempt_id"]
+    assert results[1]["correct_count"] == 1 and results[1]["total_questions"] == 2
+    assert StudentQuizAttempt.select().count() == 2
+    assert {a.topic for a in StudentQuizAttempt.select()} == {"Units"}
+
+
+def test_replaying_a_sync_creates_no_duplicates(client):
+    quiz_id = quiz_api.quiz_store.save("Units", 9, QUESTIONS)
+    batch = {"attempts": [attempt("a", quiz_id, "Newton", "Joule"), attempt("b", quiz_id, "Joule", "Newton")]}
+
+    first = client.post("/api/quiz/submit/batch", json=batch).json()["results"]
+    batch["attempts"].append(attempt("c", quiz_id, "Newton", "Newton"))
+    replay = client.post("/api/quiz/submit/batch", json=batch).json()["results"]
+
+    assert [r["status"] for r in replay] == ["duplicate", "duplicate", "created"]
+    assert [r["attempt_id"] for r in replay[:2]] == [r["attempt_id"] for r in first]
+    assert StudentQuizAttempt.select().count() == 3
+
+
+def test_the_first_use_of_a_key_owns_it_even_when_rejected(client):
+    quiz_id = quiz_api.quiz_store.save("Units", 9, QUESTIONS)
+    client.post("/api/quiz/submit/batch", json={"attempts": [attempt("synced", quiz_id, "Newton", "Joule")]})
+
+    results = client.post("/api/quiz/submit/batch", json={"attempts": [
+        attempt("tablet-1", quiz_id + 1, "Newton"),
+        attempt("tablet-1", quiz_id, "Newton", "Joule"),
+        attempt("synced", quiz_id + 1, "Joule"),  # Stored by the earlier sync
+    ]}).json()["results"]
+
+    assert [(r["status"], r.get("score")) for r in results] == [
+        ("rejected", None), ("duplicate", None), ("duplicate", 100)
+    ]
+    assert StudentQuizAttempt.select().count() == 1
+
+
+def test_replaying_an_attempt_without_a_stored_quiz_reports_its_score(client, student):
+    quiz_id = quiz_api.quiz_store.save("Units", 9, QUESTIONS)
+    StudentQuizAttempt.create(student=student, quiz=None, topic="Units", grade=9, answers="{}", score=50,
+                              idempotency_key="before-005")
+
+    results = client.post("/api/quiz/submit/batch", json={"attempts": [
+        attempt("before-005", quiz_id, "Newton", "Joule"),
+    ]}).json()["results"]
+
+    assert results == [{
+        "idempotency_key": "before-005", "status": "duplicate", "attempt_id": 1, "quiz_id": None,
+        "score": 50, "feedback": quiz_api.feedback_for(50), "correct_count": None, "total_questions": None,
+    }]
+
+
+def test_batches_are_bounded(client):
+    assert client.post("/api/quiz/submit/batch", json={"attempts": []}).status_code == 422
+    too_many = [attempt(str(i), 1, "Newton") for i in range(quiz_api.settings.QUIZ_BATCH_MAX_ATTEMPTS + 1)]
+    assert client.post("/api/quiz/submit/batch", json={"attempts": too_many}).status_code == 422
@@ -0,0 +1,56 @@
+import pytest
+
+from app.db.models import Lesson, Quiz
+from app.services.quiz_store import QuizStore, public_questions, quiz_hash
+
+MODELS = [Lesson, Quiz]
+
+
+@pytest.fixture
+def models():
+    return MODELS
+
+
+def quiz(*answers):
+    return [
+        {"question_text": f"Question {index}?", "options": ["A", "B", "C"], "correct_answer": answer}
+        for index, answer in enumerate(answers)
+    ]
+
+
+def test_a_question_set_is_stored_once(database):
+    first_store, second_store = QuizStore(max_cached_keys=10), QuizStore(max_cached_keys=10)
+
+    quiz_id = first_store.save("Motion ", 9, quiz("A", "B"))
+
+    assert first_store.save("Motion", 9, quiz("A", "B")) == quiz_id
+    assert second_store.save("Motion", 9, quiz("A", "B")) == quiz_id  # Another worker, same row
+    assert second_store.save("Motion", 9, list(reversed(quiz("A", "B")))) == quiz_id  # Served in another order
+    assert second_store.save("Motion", 9, quiz("A", "C")) != quiz_id
+    assert Quiz.select().count() == 2
+    assert Quiz.get_by_id(quiz_id).content_hash == quiz_hash(quiz("A", "B"))
+    assert public_questions(quiz("A")) == [{"question_text": "Question 0?", "options": ["A", "B", "C"]}]
+
+
+def test_grading_uses_the_stored_answer_key(database):
+    quiz_id = QuizStore(max_cached_keys=10).save("Motion", 9, quiz("A", "B", "C"))
+    store = QuizStore(max_cached_keys=1)  # Loads the key from the database
+
+    answer_key, correct_count = store.grade(quiz_id, {"Question 0?": "A", "Question 1?": "C", "Unknown?": "A"})
+
+    assert correct_count == 1
+    assert (answer_key.topic, answer_key.grade, len(answer_key.answers)) == ("Motion", 9, 3)
+    assert store.grade(quiz_id + 1, {}) is None
+
+
+def test_answer_keys_are_evicted_least_recently_used_first(database):
+    store = QuizStore(max_cached_keys=2)
+    first, second, _ = (store.save("Motion", 9, quiz(answer)) for answer in "ABC")
+
+    store.answer_key(first)
+    store.save("Motion", 9, quiz("D"))
+
+    assert set(store._keys) == {first, store._ids_by_hash[quiz_hash(quiz("D"))]}
+    assert quiz_hash(quiz("B")) not in store._ids_by_hash
+    Quiz.delete().execute()
+    assert store.answer_key(second) is None and store.answer_key(first) is not None
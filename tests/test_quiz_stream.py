@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+from app.core import rag_manager as rag_module
+from app.core.llm import FakeStreamingChatModel
+from app.core.quiz_stream import QuizItemParser
+from app.core.rag_manager import RagManager
+
+
+def feed_in_pieces(parser, text, size):
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(parser.feed(text[start:start + size]))
+    return items
+
+
+def test_items_are_emitted_as_their_closing_brace_arrives():
+    parser = QuizItemParser()
+    first = '{"question_text": "What is {F}?", "options": ["A \\\\\\"}", "B"], "correct_answer": "B"}'
+    text = '```json\n{"questions": [' + first + ', {"question_text": "Next"'
+
+    assert parser.feed(text[:len(text) - 30]) == []
+    assert parser.feed(text[len(text) - 30:]) == [json.loads(first)]
+    assert parser.feed(', "options": ["A", "B"], "correct_answer": "A"}]}\n```') == [
+        {"question_text": "Next", "options": ["A", "B"], "correct_answer": "A"}
+    ]
+    assert parser._buffer == ""  # Consumed text is not kept
+
+
+def test_malformed_items_are_dropped_and_parsing_continues():
+    parser = QuizItemParser()
+    text = ('[{"question_text": "Broken" "options": []}, {"question_text": "Q", "extra": [{"nested": 1}], '
+            '"options": ["A", "B"], "correct_answer": "A"}]')
+
+    items = feed_in_pieces(parser, text, 7)
+
+    assert [item["question_text"] for item in items] == ["Q"]
+    assert parser.malformed == 1
+
+
+def test_rag_manager_streams_validated_questions(monkeypatch):
+    monkeypatch.setattr(rag_module, "ChromaService", lambda: None)
+    manager = RagManager()
+    manager.llm = FakeStreamingChatModel(ttft_ms=1, tokens_per_second=1000)
+
+    async def collect():
+        return [question async for question in manager.astream_quiz("Motion", 9, num_questions=4)]
+
+    questions = asyncio.run(collect())
+
+    assert [q["question_text"] for q in questions] == [f"Sample question {n}?" for n in range(1, 5)]
+    assert all(q["correct_answer"] in q["options"] for q in questions)
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from app.api import rag as rag_api
+from app.core import rag_manager as rag_module
+from app.core.dependencies import get_current_student_user, get_rag_manager
+from app.core.rag_manager import RagManager
+from app.db.models import Conversation, Message, StudentProfile, User
+
+RETRIEVAL_DELAY = 0.3
+
+
+class SlowRetriever:
+    """Stands in for Chroma + MiniLM with a blocking delay per call."""
+    query_embedder = None
+
+    def embed_query(self, text):
+        time.sleep(RETRIEVAL_DELAY)
+        return [1.0, 0.0]
+
+    def search_by_vector(self, embedding, k, grade=None, subject=None, grade_window=0, cross_shard=False):
+        if cross_shard:
+            return []
+        time.sleep(RETRIEVAL_DELAY)
+        return [(Document(id="1_0", page_content="Newton's second law: F = ma.", metadata={"grade": 9}), 0.9)]
+
+
+def build_manager(monkeypatch):
+    monkeypatch.setattr(rag_module, "ChromaService", lambda: None)
+    monkeypatch.setattr(rag_module.settings, "SEMANTIC_CACHE_ENABLED", False)
+    monkeypatch.setattr(rag_module.settings, "HYBRID_RETRIEVAL_ENABLED", False)
+    monkeypatch.setattr(RagManager, "_retriever", SlowRetriever())
+    manager = RagManager()
+    manager.llm = GenericFakeChatModel(messages=iter([AIMessage(content="Force is mass times acceleration.")] * 16))
+    return manager
+
+
+def test_concurrent_ask_streams_do_not_block_event_loop(monkeypatch):
+    manager = build_manager(monkeypatch)
+
+    async def consume():
+        return "".join([chunk async for chunk in manager.aget_answer_stream("What is force?", 9)])
+
+    async def health_probe(stop: asyncio.Event):
+        # Mirrors a concurrent GET / while the answers are streaming
+        worst_lag = 0.0
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            worst_lag = max(worst_lag, time.perf_counter() - started - 0.01)
+        return worst_lag
+
+    async def scenario():
+        stop = asyncio.Event()
+        probe = asyncio.create_task(health_probe(stop))
+        answers = await asyncio.gather(*(consume() for _ in range(8)))
+        stop.set()
+        return answers, await probe
+
+    answers, worst_lag = asyncio.run(scenario())
+
+    assert all(answer == "Force is mass times acceleration." for answer in answers)
+    assert worst_lag < RETRIEVAL_DELAY / 2
+
+
+def test_a_question_admitted_at_once_gets_no_queue_event(monkeypatch):
+    manager = build_manager(monkeypatch)
+
+    async def kinds():
+        return [kind async for kind, _ in manager.aget_answer_events("What is force?", 9)]
+
+    events = asyncio.run(kinds())
+    assert "queue" not in events and events[0] == "sources" and "chunk" in events
+
+
+@pytest.fixture
+def models():
+    return [User, StudentProfile, Conversation, Message]
+
+
+def test_a_queued_question_reports_its_position_first(student):
+    class QueuedRagManager:
+        async def aget_answer_events(self, question, student_grade, owner=None):
+            yield "queue", {"position": 2, "estimated_wait_ms": 1500}
+            yield "chunk", "Force is mass times acceleration."
+
+    StudentProfile.create(user=student, grade=9)
+    app = FastAPI()
+    app.include_router(rag_api.router, prefix="/api/rag")
+    app.dependency_overrides[get_current_student_user] = lambda: student
+    app.dependency_overrides[get_rag_manager] = QueuedRagManager
+    client = TestClient(app)
+
+    ndjson = client.post("/api/rag/ask", json={"question": "What is force?"})
+    sse = client.post("/api/rag/ask", json={"question": "What is force?"},
+                      headers={"Accept": "text/event-stream"})
+
+    lines = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert list(lines[0]) == ["queue"] and "conversation_id" in lines[1]
+    assert lines[2] == {"message_chunk": "Force is mass times acceleration."}
+    assert sse.text.startswith("event: queue\n")
@@ -0,0 +1,46 @@
+import pytest
+
+from app.core import rate_limit
+from app.core.rate_limit import InMemoryTokenBuckets, RateLimitExceeded
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_bucket_allows_a_burst_then_refills_per_role(monkeypatch, clock):
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_STUDENT_BURST", 3)
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_STUDENT_PER_MINUTE", 6)  # One token every 10 s
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_ADMIN_BURST", 10)
+    buckets = InMemoryTokenBuckets()
+
+    for _ in range(3):
+        buckets.consume(1, "student")
+    with pytest.raises(RateLimitExceeded) as exceeded:
+        buckets.consume(1, "student")
+    assert exceeded.value.retry_after_s == pytest.approx(10)
+
+    buckets.consume(2, "student")  # Other users have their own bucket
+    for _ in range(5):
+        buckets.consume(3, "admin")
+
+    clock[0] += 10
+    buckets.consume(1, "student")
+    with pytest.raises(RateLimitExceeded):
+        buckets.consume(1, "student", cost=3)
+
+
+def test_full_buckets_are_evicted_past_the_user_cap(monkeypatch, clock):
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_STUDENT_BURST", 2)
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_STUDENT_PER_MINUTE", 60)
+    buckets = InMemoryTokenBuckets(max_users=2)
+
+    buckets.consume(1, "student")
+    buckets.consume(2, "student")
+    clock[0] += 5
+    buckets.consume(3, "student")
+
+    assert set(buckets._buckets) == {3}
@@ -0,0 +1,37 @@
+import time
+
+from langchain_core.documents import Document
+
+from app.services.reranker import CrossEncoderReranker
+
+
+class FakeCrossEncoder:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+
+    def predict(self, pairs, batch_size=32, convert_to_numpy=True):
+        self.batches.append(len(pairs))
+        time.sleep(self.delay)
+        return [float(len(passage)) for _, passage in pairs]
+
+
+CANDIDATES = [(Document(id=str(i), page_content="x" * (i + 1)), 0.5) for i in range(5)]
+
+
+def test_scores_all_candidates_in_one_batch(monkeypatch):
+    model = FakeCrossEncoder()
+    monkeypatch.setattr(CrossEncoderReranker, "_model", model)
+
+    ranked = CrossEncoderReranker().rerank("q", CANDIDATES, top_n=2, budget_ms=1000)
+
+    assert [doc.id for doc, _ in ranked] == ["4", "3"]
+    assert model.batches == [5]
+
+
+def test_falls_back_to_ann_order_when_over_budget(monkeypatch):
+    monkeypatch.setattr(CrossEncoderReranker, "_model", FakeCrossEncoder(delay=0.2))
+
+    ranked = CrossEncoderReranker().rerank("q", CANDIDATES, top_n=2, budget_ms=20)
+
+    assert [doc.id for doc, _ in ranked] == ["0", "1"]
@@ -0,0 +1,30 @@
+from langchain_core.documents import Document
+
+from app.core.retriever import rank_by_grade
+
+
+def hit(doc_id, grade, relevance):
+    return (Document(id=doc_id, page_content=doc_id, metadata={"grade": grade}), relevance)
+
+
+def test_own_grade_first_then_nearest_grades():
+    candidates = [
+        hit("g12", 12, 0.78),
+        hit("g10", 10, 0.85),
+        hit("g9-a", 9, 0.80),
+        hit("g8", 8, 0.70),
+        hit("g9-b", 9, 0.60),
+    ]
+
+    ranked = rank_by_grade(candidates, student_grade=9, k=4, grade_boost=0.3, grade_distance_penalty=0.05)
+
+    assert [doc.id for doc, _ in ranked] == ["g9-a", "g9-b", "g10", "g8"]
+    assert ranked[0][1] == 0.80  # Original relevance is preserved
+
+
+def test_other_grades_fill_when_grade_has_no_hits():
+    candidates = [hit("g10", 10, 0.7), hit("g12", 12, 0.75)]
+
+    ranked = rank_by_grade(candidates, student_grade=9, k=5, grade_boost=0.1, grade_distance_penalty=0.05)
+
+    assert [doc.id for doc, _ in ranked] == ["g10", "g12"]
@@ -0,0 +1,42 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import rag_manager as rag_module
+from app.core.dependencies import get_quiz_service, get_rag_manager
+from app.core.services import ServiceContainer
+
+
+def test_requests_share_the_services_built_for_the_app(monkeypatch):
+    monkeypatch.setattr(rag_module, "ChromaService", lambda: None)
+    app = FastAPI()
+    app.state.services = ServiceContainer()
+    seen = []
+
+    @app.get("/services")
+    def services(rag_manager=Depends(get_rag_manager), quiz_service=Depends(get_quiz_service)):
+        seen.append((rag_manager, quiz_service))
+        return {}
+
+    client = TestClient(app)
+    client.get("/services")
+    client.get("/services")
+
+    assert seen[0] == seen[1] == (app.state.services.rag_manager, app.state.services.quiz_service)
+    assert app.state.services.quiz_service.rag_manager is app.state.services.rag_manager
+
+
+def test_container_is_built_on_first_use_without_a_lifespan(monkeypatch):
+    monkeypatch.setattr(rag_module, "ChromaService", lambda: None)
+    app = FastAPI()
+    seen = []
+
+    @app.get("/services")
+    def services(quiz_service=Depends(get_quiz_service)):
+        seen.append(quiz_service)
+        return {}
+
+    client = TestClient(app)
+    client.get("/services")
+    client.get("/services")
+
+    assert seen[0] is seen[1] is app.state.services.quiz_service
@@ -0,0 +1,129 @@
+import asyncio
+
+from langchain_core.documents import Document
+
+from app.core import rag_manager as rag_module
+from app.core.llm import FakeStreamingChatModel
+from app.core.rag_manager import RagManager
+from app.core.single_flight import SingleFlight, normalize_question
+
+
+def test_late_joiner_replays_buffered_prefix():
+    flight = SingleFlight()
+    started = []
+
+    async def upstream():
+        started.append(True)
+        for chunk in ["a", "b", "c", "d"]:
+            await asyncio.sleep(0.02)
+            yield chunk
+
+    async def collect(delay):
+        await asyncio.sleep(delay)
+        return [chunk async for chunk in flight.stream("key", upstream)]
+
+    async def scenario():
+        return await asyncio.gather(collect(0), collect(0.05))
+
+    first, late = asyncio.run(scenario())
+
+    assert first == late == ["a", "b", "c", "d"]
+    assert len(started) == 1
+    assert not flight.in_flight("key")
+
+
+def test_upstream_is_cancelled_when_every_subscriber_leaves():
+    flight = SingleFlight()
+
+    async def scenario():
+        finished = []
+
+        async def upstream():
+            try:
+                for chunk in range(100):
+                    await asyncio.sleep(0.01)
+                    yield chunk
+            finally:
+                finished.append(True)
+
+        stream = flight.stream("key", upstream)
+        assert await stream.__anext__() == 0
+        await stream.aclose()
+        await asyncio.sleep(0.05)
+        return finished
+
+    assert asyncio.run(scenario()) == [True]
+    assert not flight.in_flight("key")
+
+
+def test_a_caller_arriving_after_cancellation_starts_a_fresh_flight():
+    flight = SingleFlight()
+    starts = []
+
+    async def upstream():
+        starts.append(True)
+        try:
+            for chunk in range(3):
+                await asyncio.sleep(0.01)
+                yield chunk
+        finally:
+            await asyncio.sleep(0.05)  # Slow to wind down, like an LLM client closing its connection
+
+    async def scenario():
+        abandoned = flight.stream("key", upstream)
+        assert await abandoned.__anext__() == 0
+        await abandoned.aclose()
+        return [chunk async for chunk in flight.stream("key", upstream)]
+
+    assert asyncio.run(scenario()) == [0, 1, 2]
+    assert len(starts) == 2
+
+
+class CountingModel(FakeStreamingChatModel):
+    calls: int = 0
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            yield chunk
+
+
+class StaticRetriever:
+    query_embedder = None
+
+    def embed_query(self, text):
+        return [1.0, 0.0]
+
+    def search_by_vector(self, embedding, k, grade=None, subject=None, grade_window=0, cross_shard=False):
+        if cross_shard:
+            return []
+        return [(Document(id="1_0", page_content="Newton's second law: F = ma.", metadata={"grade": 9}), 0.9)]
+
+
+def test_identical_questions_share_one_llm_stream(monkeypatch):
+    monkeypatch.setattr(rag_module, "ChromaService", lambda: None)
+    monkeypatch.setattr(rag_module.settings, "SEMANTIC_CACHE_ENABLED", False)
+    monkeypatch.setattr(rag_module.settings, "HYBRID_RETRIEVAL_ENABLED", False)
+    monkeypatch.setattr(rag_module.settings, "SINGLE_FLIGHT_ENABLED", True)
+    monkeypatch.setattr(RagManager, "_retriever", StaticRetriever())
+    manager = RagManager()
+    manager.llm = CountingModel(ttft_ms=50, tokens_per_second=500, answer_tokens=10)
+
+    async def ask(question, grade, delay=0.0):
+        await asyncio.sleep(delay)
+        return "".join([chunk async for chunk in manager.aget_answer_stream(question, grade)])
+
+    async def scenario():
+        return await asyncio.gather(
+            ask("What is force?", 9),
+            ask("  what is FORCE ", 9),
+            ask("What is force?", 9, delay=0.06),  # Joins after the first tokens arrived
+            ask("What is force?", 10),  # Other grade: its own stream
+        )
+
+    answers = asyncio.run(scenario())
+
+    assert answers[0] == answers[1] == answers[2]
+    assert len(answers[0].split()) == 10
+    assert manager.llm.calls == 2
+    assert normalize_question(" What  is force?? ") == "what is force"
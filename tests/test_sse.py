@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from app.api.sse import coalesce_chunks, format_event
+
+
+async def paced(events):
+    for delay, event in events:
+        await asyncio.sleep(delay)
+        yield event
+
+
+def collect(events, **options):
+    options = {"flush_interval_s": 0.05, "flush_bytes": 1024, "heartbeat_s": 10, **options}
+
+    async def run():
+        return [event async for event in coalesce_chunks(paced(events), **options)]
+
+    return asyncio.run(run())
+
+
+def test_chunks_are_merged_within_the_flush_window():
+    events = [(0, ("sources", [])), (0, ("chunk", "a")), (0.01, ("chunk", "b")),
+              (0.1, ("chunk", "c")), (0, ("chunk", "d"))]
+
+    assert collect(events) == [("sources", []), ("chunk", "ab"), ("chunk", "cd")]
+
+
+def test_byte_threshold_and_other_events_flush_the_buffer():
+    events = [(0, ("chunk", "aaa")), (0, ("chunk", "bbb")), (0, ("chunk", "c")), (0, ("queue", {"position": 1}))]
+
+    assert collect(events, flush_bytes=6) == [("chunk", "aaabbb"), ("chunk", "c"), ("queue", {"position": 1})]
+
+
+def test_heartbeats_fill_silences_and_errors_flush_first():
+    async def failing():
+        await asyncio.sleep(0.08)
+        yield "chunk", "partial"
+        raise RuntimeError("upstream failed")
+
+    async def run():
+        seen = []
+        with pytest.raises(RuntimeError):
+            async for event in coalesce_chunks(failing(), flush_interval_s=1, flush_bytes=1024, heartbeat_s=0.03):
+                seen.append(event)
+        return seen
+
+    seen = asyncio.run(run())
+
+    assert seen[-1] == ("chunk", "partial")  # Flushed before the error surfaces
+    assert seen[:-1] and all(event is None for event in seen[:-1])
+    assert format_event("chunk", {"text": "hi"}) == 'event: chunk\ndata: {"text": "hi"}\n\n'
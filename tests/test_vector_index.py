@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.services.vector_index import QuantizedVectorIndex
+from app.utils.versioned_dir import read_current_version
+
+
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_search_matches_exact_cosine_within_grade(tmp_path, dtype):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(60, 16)).astype(np.float32)
+    ids = [f"c{i}" for i in range(60)]
+    metadatas = [{"grade": 9 if i % 2 else 10} for i in range(60)]
+    index = QuantizedVectorIndex(str(tmp_path), dtype=dtype)
+    index.build(ids, vectors, [f"text {i}" for i in range(60)], metadatas)
+
+    query = vectors[7] + 0.01
+    hits = index.search(query, k=3, grade=9)
+
+    assert hits[0][0].id == "c7"
+    assert hits[0][0].page_content == "text 7"
+    assert all(doc.metadata["grade"] == 9 for doc, _ in hits)
+    assert hits[0][1] == pytest.approx(1.0, abs=0.02)
+    assert isinstance(index._matrices["9"], np.memmap)
+    assert index._matrices["9"].dtype == np.dtype(dtype)
+
+
+def test_search_across_grades_and_lookup_by_id(tmp_path):
+    index = QuantizedVectorIndex(str(tmp_path))
+    index.build(["a", "b"], [[1.0, 0.0], [0.0, 1.0]], ["A", "B"], [{"grade": 9}, {"grade": 10}])
+
+    assert [doc.id for doc, _ in index.search([0.1, 1.0], k=2)] == ["b", "a"]
+    assert index.search([0.1, 1.0], k=2, grade=7, grade_window=1) == []
+    assert [doc.id for doc, _ in index.search([0.1, 1.0], k=2, grade=8, grade_window=1, cross_shard=True)] == ["b"]
+    assert index.get_documents(["a", "missing"])["a"].page_content == "A"
+
+
+def test_added_chunks_reach_every_reader_without_rewriting_other_grades(tmp_path):
+    writer = QuantizedVectorIndex(str(tmp_path))
+    writer.build(["a", "b"], [[1.0, 0.0], [0.0, 1.0]], ["A", "B"], [{"grade": 9}, {"grade": 10}])
+    reader = QuantizedVectorIndex(str(tmp_path))  # Another worker, already serving
+    first_version = read_current_version(str(tmp_path))
+    assert [doc.id for doc, _ in reader.search([0.0, 1.0], k=5, grade=10)] == ["b"]
+
+    writer.add(["b", "c"], [[0.6, 0.8], [0.0, 1.0]], ["B2", "C"], [{"grade": 10}, {"grade": 10}])
+
+    hits = reader.search([0.0, 1.0], k=5, grade=10)
+    assert [doc.id for doc, _ in hits] == ["c", "b"]
+    assert reader.get_documents(["b"])["b"].page_content == "B2"
+    version = read_current_version(str(tmp_path))
+    assert os.path.samefile(tmp_path / first_version / "grade_9.npy", tmp_path / version / "grade_9.npy")